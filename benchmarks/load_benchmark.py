@@ -0,0 +1,307 @@
+"""
+Offline end-to-end load benchmark for ``python -m src.main``.
+
+Starts ``MockLLMServer`` and ``MockNCBIServer`` on local ports, points the
+pipeline at them through environment variables (``OLLAMA_API_ENDPOINT``,
+``NCBI_BASE_URL``, ``BLAST_BASE_URL``) and runs the real CLI with tool use
+over each dataset at each worker count, with caches disabled. Throughput and
+latency percentiles come from the per-question trace files; NCBI request
+counts come from the mock server.
+
+Example:
+    python -m benchmarks.load_benchmark --workers 1 5 10 \\
+        --questions-per-category 10 --output benchmarks/results/latest.json \\
+        --baseline benchmarks/results/previous.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.mock_servers import MockLLMServer, MockNCBIServer
+from src.tracing import percentile
+
+DEFAULT_DATASETS = ["data/geneturing.json", "data/genehop.json"]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_dataset(path: str, per_category: int | None) -> dict:
+    """The first ``per_category`` questions of every category (all if None)."""
+    with open(path, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    if per_category is None:
+        return dataset
+    return {
+        category: dict(list(questions.items())[:per_category])
+        for category, questions in dataset.items()
+    }
+
+
+def pipeline_env(llm: MockLLMServer, ncbi: MockNCBIServer, args) -> dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "OLLAMA_API_ENDPOINT": f"{llm.url}/v1",
+            "OLLAMA_API_KEY": "mock",
+            "NCBI_BASE_URL": ncbi.eutils_url,
+            "BLAST_BASE_URL": ncbi.blast_url,
+            "NCBI_API_KEY": "",
+            "NCBI_RATE_LIMIT": str(args.ncbi_rate_limit),
+            "BLAST_MIN_POLL_INTERVAL": str(args.blast_poll_interval),
+            "BLAST_MAX_POLL_INTERVAL": str(4 * args.blast_poll_interval),
+            # Every run starts cold so runs are comparable
+            "TOOL_CACHE_PATH": "",
+            "BLAST_CACHE_PATH": "",
+            "GENE_INDEX_PATH": "",
+            "PYTHONUNBUFFERED": "1",
+        }
+    )
+    return env
+
+
+def run_pipeline(dataset_path: str, workers: int, workdir: str, env: dict, args):
+    """Run ``src.main`` once; return its wall time and output paths."""
+    with open(os.path.join(REPO_ROOT, "src", "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    config.update(
+        {
+            "mlflow_tracking_uri": f"sqlite:///{os.path.join(workdir, 'mlflow.db')}",
+            "MAX_WORKERS": workers,
+            "ASYNC_LLM_CONCURRENCY": workers,
+            # --workers is the concurrency measured, so it must not adapt
+            "ADAPTIVE_CONCURRENCY": False,
+            "RETRY_DELAY": 0,
+        }
+    )
+    config_path = os.path.join(workdir, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f)
+    output_path = os.path.join(workdir, "results.json")
+    trace_dir = os.path.join(workdir, "traces")
+    command = [
+        sys.executable,
+        "-m",
+        "src.main",
+        "--dataset_path",
+        dataset_path,
+        "--provider",
+        "ollama",
+        "--model",
+        "qwen3:4b",
+        "--output_path",
+        output_path,
+        "--tool-use",
+        "--engine",
+        args.engine,
+        "--config_path",
+        config_path,
+        "--trace-dir",
+        trace_dir,
+    ]
+    # Run from the workdir so MLflow's ./mlruns artifacts stay out of the repo
+    env = {
+        **env,
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")])),
+    }
+    start = time.perf_counter()
+    with open(os.path.join(workdir, "pipeline.log"), "w") as log:
+        completed = subprocess.run(
+            command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f"src.main exited with {completed.returncode}; see {log.name}"
+        )
+    return wall_seconds, output_path, trace_dir
+
+
+def summarize(
+    dataset: str,
+    workers: int,
+    wall_seconds: float,
+    output_path: str,
+    trace_dir: str,
+    llm: MockLLMServer,
+    ncbi: MockNCBIServer,
+    engine: str,
+) -> dict:
+    traces = []
+    for path in glob.glob(os.path.join(trace_dir, "*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            traces.append(json.load(f))
+    with open(output_path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    latencies = [trace["duration_seconds"] for trace in traces]
+    started = min(trace["started_at"] for trace in traces)
+    finished = max(trace["started_at"] + trace["duration_seconds"] for trace in traces)
+    pipeline_seconds = finished - started
+    ncbi_stats = ncbi.stats()
+    row = {
+        "dataset": os.path.basename(dataset),
+        "engine": engine,
+        "workers": workers,
+        "questions": len(traces),
+        "wall_seconds": round(wall_seconds, 3),
+        "pipeline_seconds": round(pipeline_seconds, 3),
+        "questions_per_second": round(len(traces) / pipeline_seconds, 3),
+        "errors": sum(
+            1
+            for questions in results.values()
+            for result in questions.values()
+            if str(result.get("prediction")).startswith("ERROR_")
+        ),
+        "llm_requests": llm.stats().get("chat_completions", {}).get("ok", 0),
+        "ncbi_requests": sum(sum(c.values()) for c in ncbi_stats.values()),
+        "ncbi_throttled": sum(c.get("throttled", 0) for c in ncbi_stats.values()),
+        "ncbi_errors": sum(c.get("errors", 0) for c in ncbi_stats.values()),
+        "ncbi_requests_by_endpoint": {
+            endpoint: sum(c.values()) for endpoint, c in sorted(ncbi_stats.items())
+        },
+    }
+    for q in (50, 95, 99):
+        row[f"latency_p{q}"] = round(percentile(latencies, q), 3)
+    for field in ("llm_seconds", "tool_seconds", "limiter_wait_seconds"):
+        values = [trace["totals"][field] for trace in traces]
+        row[f"{field}_p50"] = round(percentile(values, 50), 3)
+    return row
+
+
+def print_table(rows: list[dict], baseline: list[dict] | None) -> None:
+    previous = {
+        (row["dataset"], row["engine"], row["workers"]): row for row in baseline or []
+    }
+    print(
+        f"\n{'dataset':<18}{'engine':<9}{'workers':>8}{'q/s':>9}{'p50 s':>9}"
+        f"{'p95 s':>9}{'ncbi req':>10}{'429s':>6}{'errors':>8}"
+        + (f"{'q/s vs base':>13}" if previous else "")
+    )
+    for row in rows:
+        line = (
+            f"{row['dataset']:<18}{row['engine']:<9}{row['workers']:>8}"
+            f"{row['questions_per_second']:>9.2f}{row['latency_p50']:>9.2f}"
+            f"{row['latency_p95']:>9.2f}{row['ncbi_requests']:>10}"
+            f"{row['ncbi_throttled']:>6}{row['errors']:>8}"
+        )
+        base = previous.get((row["dataset"], row["engine"], row["workers"]))
+        if base:
+            change = row["questions_per_second"] / base["questions_per_second"] - 1
+            line += f"{change:>+12.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure src.main throughput against local mock LLM and NCBI servers."
+    )
+    parser.add_argument("--datasets", nargs="+", default=DEFAULT_DATASETS)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 5, 10])
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads")
+    parser.add_argument(
+        "--questions-per-category",
+        type=int,
+        default=None,
+        help="Only run the first N questions of each category (default: all).",
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--ncbi-latency", type=float, default=0.1)
+    parser.add_argument("--ncbi-error-rate", type=float, default=0.0)
+    parser.add_argument("--ncbi-429-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--ncbi-rate-limit",
+        type=float,
+        default=10,
+        help="NCBI_RATE_LIMIT for the pipeline, in requests per second.",
+    )
+    parser.add_argument(
+        "--blast-seconds",
+        type=float,
+        default=2.0,
+        help="Seconds until a mock BLAST job reports READY.",
+    )
+    parser.add_argument(
+        "--blast-poll-interval",
+        type=float,
+        default=1.0,
+        help="BLAST_MIN_POLL_INTERVAL for the pipeline.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write the results as JSON."
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Earlier --output file to compare questions/sec against.",
+    )
+    parser.add_argument(
+        "--keep-workdir",
+        action="store_true",
+        help="Keep each run's logs, traces and results.",
+    )
+    args = parser.parse_args()
+
+    llm = MockLLMServer(args.llm_latency, args.seed).start()
+    ncbi = MockNCBIServer(
+        args.ncbi_latency,
+        args.ncbi_error_rate,
+        args.ncbi_429_rate,
+        args.blast_seconds,
+        seed=args.seed,
+    ).start()
+    env = pipeline_env(llm, ncbi, args)
+    rows = []
+    try:
+        for dataset in args.datasets:
+            for workers in args.workers:
+                workdir = tempfile.mkdtemp(prefix="genegpt-bench-")
+                dataset_path = os.path.join(workdir, os.path.basename(dataset))
+                with open(dataset_path, "w", encoding="utf-8") as f:
+                    json.dump(sample_dataset(dataset, args.questions_per_category), f)
+                llm.reset()
+                ncbi.reset()
+                print(f"Running {dataset} with {workers} workers ({workdir})...")
+                wall_seconds, output_path, trace_dir = run_pipeline(
+                    dataset_path, workers, workdir, env, args
+                )
+                rows.append(
+                    summarize(
+                        dataset,
+                        workers,
+                        wall_seconds,
+                        output_path,
+                        trace_dir,
+                        llm,
+                        ncbi,
+                        args.engine,
+                    )
+                )
+                if not args.keep_workdir:
+                    shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        llm.stop()
+        ncbi.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["runs"]
+    print_table(rows, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "runs": rows}, f, indent=2)
+        print(f"\nSaved benchmark results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Local stand-ins for the services ``src.main`` talks to, used by the load benchmark.
+
+``MockLLMServer`` is an OpenAI-compatible ``/v1/chat/completions`` endpoint
+that plays a scripted tool-call sequence per question (BLAST for sequence
+questions, SNP lookups for rsIDs, gene lookups otherwise) and then answers.
+``MockNCBIServer`` serves E-utilities (``/entrez/eutils/``) and the BLAST URL
+API (``/blast/Blast.cgi``) with synthetic data. Both add configurable latency,
+and the NCBI server injects HTTP 500s and 429s at configurable rates.
+"""
+
+import collections
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_SEQUENCE = re.compile(r"[ACGTN]{20,}")
+_RSID = re.compile(r"\brs\d+\b")
+_WORD = re.compile(r"[A-Za-z0-9-]+")
+
+
+class MockServer:
+    """Threaded HTTP server on a free local port with per-endpoint counters."""
+
+    def __init__(self, latency: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: dict[str, collections.Counter] = collections.defaultdict(
+            collections.Counter
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    def count(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            self.counts[endpoint][outcome] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {endpoint: dict(c) for endpoint, c in self.counts.items()}
+
+    def random(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def delay(self) -> None:
+        """Sleep around ``latency`` seconds (uniform +/-50%)."""
+        if self.latency > 0:
+            time.sleep(self.latency * (0.5 + self.random()))
+
+    def handle(self, method: str, path: str, params: dict, body: bytes):
+        """Return ``(status, content_type, body, headers)`` for a request."""
+        raise NotImplementedError
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, method: str):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                if self.headers.get("Content-Type", "").startswith(
+                    "application/x-www-form-urlencoded"
+                ):
+                    params.update(
+                        {k: v[-1] for k, v in parse_qs(body.decode()).items()}
+                    )
+                status, content_type, payload, headers = server.handle(
+                    method, parts.path, params, body
+                )
+                data = payload if isinstance(payload, bytes) else payload.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _stable_int(text: str, modulo: int) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:12], 16) % modulo
+
+
+class MockNCBIServer(MockServer):
+    """
+    Synthetic E-utilities and BLAST endpoints. UIDs are derived from the
+    search term, so repeated searches agree. BLAST jobs report READY
+    ``blast_seconds`` after submission.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        blast_seconds: float = 1.0,
+        retry_after: float = 0.2,
+        seed: int = 0,
+    ):
+        super().__init__(latency, seed)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.blast_seconds = blast_seconds
+        self.retry_after = retry_after
+        self._blast_jobs: dict[str, float] = {}
+
+    @property
+    def eutils_url(self) -> str:
+        return f"{self.url}/entrez/eutils/"
+
+    @property
+    def blast_url(self) -> str:
+        return f"{self.url}/blast/Blast.cgi"
+
+    def handle(self, method, path, params, body):
+        endpoint = self._endpoint(path, params)
+        self.delay()
+        roll = self.random()
+        if roll < self.throttle_rate:
+            self.count(endpoint, "throttled")
+            return (
+                429,
+                "text/plain",
+                "Too Many Requests",
+                {"Retry-After": str(self.retry_after)},
+            )
+        if roll < self.throttle_rate + self.error_rate:
+            self.count(endpoint, "errors")
+            return 500, "text/plain", "Internal Server Error", {}
+        self.count(endpoint, "ok")
+        if endpoint == "esearch":
+            return 200, "application/json", self._esearch(params), {}
+        if endpoint == "esummary":
+            return 200, "application/json", self._esummary(params), {}
+        if endpoint == "efetch":
+            return 200, "text/plain", self._efetch(params), {}
+        if endpoint == "blast_put":
+            return 200, "text/html", self._blast_put(params), {}
+        if endpoint == "blast_status":
+            return 200, "text/html", self._blast_status(params), {}
+        if endpoint == "blast_get":
+            return 200, "text/xml", self._blast_report(params), {}
+        return 404, "text/plain", "Not Found", {}
+
+    @staticmethod
+    def _endpoint(path: str, params: dict) -> str:
+        if path.endswith(".fcgi"):
+            return path.rsplit("/", 1)[-1].removesuffix(".fcgi")
+        if path.endswith("Blast.cgi"):
+            if params.get("CMD") == "Put":
+                return "blast_put"
+            if params.get("FORMAT_OBJECT") == "SearchInfo":
+                return "blast_status"
+            return "blast_get"
+        return "unknown"
+
+    def _esearch(self, params: dict) -> str:
+        term = params.get("term", "")
+        retmax = int(params.get("retmax", 5))
+        first = 1000 + _stable_int(f"{params.get('db')}:{term}", 10**6)
+        ids = [str(first + i) for i in range(min(retmax, 3))]
+        return json.dumps({"esearchresult": {"count": str(len(ids)), "idlist": ids}})
+
+    def _esummary(self, params: dict) -> str:
+        database = params.get("db", "gene")
+        uids = [uid for uid in params.get("id", "").split(",") if uid]
+        result: dict = {"uids": uids}
+        for uid in uids:
+            symbol = f"GENE{int(uid) % 997}"
+            chromosome = str(int(uid) % 22 + 1)
+            if database == "snp":
+                result[uid] = {
+                    "uid": uid,
+                    "snp_id": uid,
+                    "genes": [{"name": symbol, "gene_id": str(int(uid) % 99991)}],
+                    "chr": chromosome,
+                    "chrpos": f"{chromosome}:{int(uid) * 7}",
+                    "fxn_class": "intron_variant",
+                    "docsum": f"HGVS=NC_0000{chromosome}.11:g.{uid}A>G",
+                    # Bulk the real records carry and projections drop
+                    "global_mafs": [
+                        {"study": str(i), "freq": "A=0.1"} for i in range(20)
+                    ],
+                }
+                continue
+            result[uid] = {
+                "uid": uid,
+                "name": symbol,
+                "description": f"{symbol} mock gene",
+                "nomenclaturesymbol": symbol,
+                "organism": {"scientificname": "Homo sapiens", "taxid": 9606},
+                "chromosome": chromosome,
+                "maplocation": f"{chromosome}q{int(uid) % 40}.1",
+                "summary": f"{symbol} is a synthetic {database} record. " * 5,
+                # Bulk the real records carry and projections drop
+                "locationhist": [{"annotationrelease": str(i)} for i in range(20)],
+            }
+        return json.dumps({"header": {"type": "esummary"}, "result": result})
+
+    def _efetch(self, params: dict) -> str:
+        return "\n".join(
+            f"{uid}\n    mock record for {params.get('db')}\n"
+            for uid in params["id"].split(",")
+        )
+
+    def _blast_put(self, params: dict) -> str:
+        with self._lock:
+            rid = f"MOCK{len(self._blast_jobs) + 1:08d}"
+            self._blast_jobs[rid] = time.monotonic()
+        rtoe = max(1, round(self.blast_seconds))
+        return (
+            "<!--QBlastInfoBegin\n"
+            f"    RID = {rid}\n    RTOE = {rtoe}\n"
+            "QBlastInfoEnd\n-->"
+        )
+
+    def _blast_status(self, params: dict) -> str:
+        with self._lock:
+            submitted = self._blast_jobs.get(params.get("RID", ""))
+        if submitted is None:
+            return "QBlastInfoBegin\n\tStatus=UNKNOWN\nQBlastInfoEnd"
+        if time.monotonic() - submitted < self.blast_seconds:
+            return "QBlastInfoBegin\n\tStatus=WAITING\nQBlastInfoEnd"
+        return "QBlastInfoBegin\n\tStatus=READY\n\tThereAreHits=yes\nQBlastInfoEnd"
+
+    def _blast_report(self, params: dict) -> str:
+        hits = "".join(
+            f"<Hit><Hit_def>Homo sapiens chromosome {i}, mock assembly</Hit_def>"
+            f"<Hit_accession>NC_0000{i:02d}.11</Hit_accession><Hit_hsps><Hsp>"
+            f"<Hsp_bit-score>{100 - i}</Hsp_bit-score><Hsp_evalue>1e-{30 - i}</Hsp_evalue>"
+            "<Hsp_query-from>1</Hsp_query-from><Hsp_query-to>50</Hsp_query-to>"
+            f"<Hsp_hit-from>{1000 * i}</Hsp_hit-from><Hsp_hit-to>{1000 * i + 49}</Hsp_hit-to>"
+            "<Hsp_identity>50</Hsp_identity><Hsp_align-len>50</Hsp_align-len>"
+            "</Hsp></Hit_hsps></Hit>"
+            for i in range(1, 6)
+        )
+        return (
+            '<?xml version="1.0"?>\n<BlastOutput>'
+            "<BlastOutput_program>blastn</BlastOutput_program>"
+            "<BlastOutput_db>nt</BlastOutput_db>"
+            "<BlastOutput_query-len>50</BlastOutput_query-len>"
+            f"<BlastOutput_iterations><Iteration><Iteration_hits>{hits}"
+            "</Iteration_hits></Iteration></BlastOutput_iterations></BlastOutput>"
+        )
+
+
+def plan_tool_calls(question: str) -> list[str]:
+    """The scripted tool sequence for a question."""
+    if _SEQUENCE.search(question):
+        return ["blast_put", "blast_get"]
+    return ["esearch_ncbi", "esummary_ncbi"]
+
+
+class MockLLMServer(MockServer):
+    """
+    OpenAI-compatible chat completions endpoint. Each question gets the tool
+    calls from ``plan_tool_calls`` (arguments taken from the question and the
+    previous tool result), one per turn, followed by a JSON answer. Usage is
+    reported with prompt tokens estimated at four characters each.
+    """
+
+    def handle(self, method, path, params, body):
+        if not path.endswith("/chat/completions"):
+            self.count("unknown", "ok")
+            return 404, "application/json", json.dumps({"error": "not found"}), {}
+        request = json.loads(body)
+        self.delay()
+        self.count("chat_completions", "ok")
+        message = self._next_message(request["messages"], request.get("tool_choice"))
+        prompt_chars = sum(
+            len(str(m.get("content") or "")) for m in request["messages"]
+        )
+        completion = {
+            "id": f"chatcmpl-mock-{self.random():.12f}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": (
+                        "tool_calls" if message.get("tool_calls") else "stop"
+                    ),
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": 40,
+                "total_tokens": prompt_chars // 4 + 40,
+                # The system prompt and few-shot examples are a shared prefix
+                "prompt_tokens_details": {"cached_tokens": 1024},
+            },
+        }
+        return 200, "application/json", json.dumps(completion), {}
+
+    def _next_message(self, messages: list[dict], tool_choice) -> dict:
+        question_index = max(i for i, m in enumerate(messages) if m["role"] == "user")
+        question = messages[question_index]["content"]
+        turns = messages[question_index + 1 :]
+        step = sum(1 for m in turns if m["role"] == "assistant")
+        plan = plan_tool_calls(question)
+        last_result = self._last_tool_result(turns)
+        if tool_choice == "none" or step >= len(plan) or "error" in last_result:
+            return {"role": "assistant", "content": self._answer(question, last_result)}
+        name = plan[step]
+        call = {
+            "id": f"call_{step}_{_stable_int(question, 10**8)}",
+            "type": "function",
+            "function": {
+                "name": name,
+                "arguments": json.dumps(self._arguments(name, question, last_result)),
+            },
+        }
+        return {"role": "assistant", "content": None, "tool_calls": [call]}
+
+    @staticmethod
+    def _last_tool_result(turns: list[dict]) -> dict:
+        for message in reversed(turns):
+            if message["role"] == "tool":
+                try:
+                    result = json.loads(message["content"])
+                except (TypeError, ValueError):
+                    return {}
+                return result if isinstance(result, dict) else {}
+        return {}
+
+    @staticmethod
+    def _arguments(name: str, question: str, last_result: dict) -> dict:
+        rsid = _RSID.search(question)
+        database = "snp" if rsid else "gene"
+        if name == "esearch_ncbi":
+            words = _WORD.findall(question.rstrip("?"))
+            term = rsid.group(0) if rsid else (words[-1] if words else question)
+            return {"database": database, "term": term, "retmax": 5}
+        if name == "esummary_ncbi":
+            return {
+                "database": database,
+                "uids": last_result.get("uids", [])[:5],
+                "retmax": 5,
+            }
+        if name == "blast_put":
+            return {
+                "sequence": _SEQUENCE.search(question).group(0),
+                "program": "blastn",
+                "database": "nt",
+                "megablast": True,
+                "hitlist_size": 10,
+            }
+        return {"rid": last_result.get("rid", ""), "format_type": "Text", "raw": False}
+
+    @staticmethod
+    def _answer(question: str, last_result: dict) -> str:
+        if last_result.get("hits"):
+            answer = last_result["hits"][0]["description"]
+        elif last_result:
+            answer = next(
+                (
+                    doc.get("nomenclaturesymbol")
+                    or doc.get("name")
+                    or ",".join(gene["name"] for gene in doc.get("genes", []))
+                    for doc in last_result.values()
+                    if isinstance(doc, dict)
+                ),
+                "NA",
+            )
+        else:
+            answer = "NA"
+        return json.dumps(
+            {"thoughts": f"Mock answer for: {question[:60]}", "answer": answer}
+        )
@@ -0,0 +1,250 @@
+"""This module contains the AIMD concurrency limit used for LLM and NCBI traffic."""
+
+import asyncio
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+EWMA_ALPHA = 0.2
+# How fast the baseline latency follows a slower EWMA (it follows a faster one at once)
+BASELINE_DRIFT = 0.01
+# Minimum time between two decreases before any latency has been observed
+DEFAULT_DECREASE_INTERVAL = 1.0  # Seconds
+
+
+def outcome_for_status(status_code: int) -> str:
+    """Classify an HTTP response for ``AdaptiveLimit.record``."""
+    if status_code == 429:
+        return "throttled"
+    if status_code >= 500:
+        return "error"
+    return "ok"
+
+
+def outcome_for_exception(error: Exception) -> str:
+    """Classify a failed request, e.g. an ``openai.RateLimitError`` (HTTP 429)."""
+    return "throttled" if getattr(error, "status_code", None) == 429 else "error"
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that adapts with AIMD (additive increase, multiplicative
+    decrease), shared by threads (``slot``) and event loops (``async_slot``).
+
+    Every finished request is reported with ``record``. A success raises the
+    limit by ``1 / limit``, i.e. by about one per round of ``limit`` requests.
+    An HTTP 429, an error, or a latency EWMA above ``latency_tolerance`` times
+    the baseline (the lowest EWMA seen, drifting slowly upwards) multiplies it
+    by ``decrease_factor``, at most once per observed latency, so a burst of
+    failures from one round counts once. With ``adaptive`` False the limit
+    stays where it was configured.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        adaptive: bool = False,
+        latency_tolerance: float = 3.0,
+        decrease_factor: float = 0.5,
+        warmup: int = 10,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit if max_limit is not None else limit
+        self.adaptive = adaptive
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.warmup = warmup
+        self._cond = threading.Condition()
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._in_flight = 0
+        self._reset_state(limit)
+
+    def _reset_state(self, limit: int) -> None:
+        self._limit = float(min(max(limit, self.min_limit), self.max_limit))
+        self._ewma: float | None = None
+        self._baseline: float | None = None
+        self._samples = 0
+        self._last_decrease = float("-inf")
+        self._counts = {"ok": 0, "throttled": 0, "error": 0}
+        self._increases = 0
+        self._decreases = 0
+        self._peak_in_flight = 0
+        self._history = [(time.time(), self.limit)]
+
+    def configure(
+        self,
+        limit: int | None = None,
+        max_limit: int | None = None,
+        adaptive: bool | None = None,
+        latency_tolerance: float | None = None,
+    ) -> None:
+        """Set the bounds and starting limit, and forget earlier observations."""
+        with self._cond:
+            if adaptive is not None:
+                self.adaptive = adaptive
+            if latency_tolerance is not None:
+                self.latency_tolerance = latency_tolerance
+            limit = int(self._limit) if limit is None else limit
+            self.max_limit = max(max_limit if max_limit is not None else limit, limit)
+            if not self.adaptive:
+                self.max_limit = limit
+            self._reset_state(limit)
+            self._notify()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def _set_limit(self, value: float) -> None:
+        before = self.limit
+        self._limit = min(max(value, self.min_limit), self.max_limit)
+        if self.limit != before:
+            self._history.append((time.time(), self.limit))
+            if self.limit > before:
+                self._increases += 1
+                self._notify()
+            else:
+                self._decreases += 1
+
+    def record(self, latency: float | None, outcome: str = "ok") -> None:
+        """Report a finished request: its latency in seconds and its outcome."""
+        with self._cond:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            if latency is not None and outcome == "ok":
+                if self._ewma is None:
+                    self._ewma = self._baseline = latency
+                else:
+                    self._ewma += EWMA_ALPHA * (latency - self._ewma)
+                    self._baseline = min(
+                        self._ewma,
+                        self._baseline + BASELINE_DRIFT * (self._ewma - self._baseline),
+                    )
+                self._samples += 1
+            if not self.adaptive:
+                return
+            congested = outcome != "ok" or (
+                self.latency_tolerance > 0
+                and self._samples >= self.warmup
+                and self._ewma > self.latency_tolerance * self._baseline
+            )
+            if not congested:
+                self._set_limit(self._limit + 1 / self._limit)
+                return
+            now = time.monotonic()
+            interval = (
+                self._ewma if self._ewma is not None else DEFAULT_DECREASE_INTERVAL
+            )
+            if now - self._last_decrease >= interval:
+                self._last_decrease = now
+                self._set_limit(self._limit * self.decrease_factor)
+
+    @contextlib.contextmanager
+    def observe(self, timed: bool = True):
+        """
+        Time the block and record it. The block may set ``outcome`` on the
+        yielded object, e.g. from an HTTP status; exceptions are classified
+        with ``outcome_for_exception`` and re-raised. With ``timed`` False
+        only the outcome is recorded, for requests whose latency says nothing
+        about congestion.
+        """
+        request = SimpleNamespace(outcome="ok")
+        start = time.perf_counter()
+        try:
+            yield request
+        except Exception as e:
+            self.record(None, outcome_for_exception(e))
+            raise
+        latency = time.perf_counter() - start if timed else None
+        self.record(latency, request.outcome)
+
+    def _try_take(self) -> bool:
+        if self._in_flight >= self.limit:
+            return False
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        return True
+
+    def _notify(self) -> None:
+        """Wake as many waiting threads and tasks as there are free slots."""
+        free = self.limit - self._in_flight
+        if free <= 0:
+            return
+        self._cond.notify(free)
+        woken, self._async_waiters = (
+            self._async_waiters[:free],
+            self._async_waiters[free:],
+        )
+        for loop, waiter in woken:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._notify()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Hold one of ``limit`` slots, blocking the thread until one is free."""
+        with self._cond:
+            while not self._try_take():
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        """Hold one of ``limit`` slots, suspending the task until one is free."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._try_take():
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    else:  # Already woken: pass the free slot on
+                        self._notify()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def history(self) -> list[tuple[float, int]]:
+        """``(unix time, limit)`` for the starting limit and every change since."""
+        with self._cond:
+            return list(self._history)
+
+    def stats(self, prefix: str) -> dict:
+        """Return the current limit, its range and the observed outcomes."""
+        with self._cond:
+            limits = [limit for _, limit in self._history]
+            return {
+                f"{prefix}_limit": self.limit,
+                f"{prefix}_limit_min": min(limits),
+                f"{prefix}_limit_max": max(limits),
+                f"{prefix}_limit_increases": self._increases,
+                f"{prefix}_limit_decreases": self._decreases,
+                f"{prefix}_peak_in_flight": self._peak_in_flight,
+                f"{prefix}_requests": sum(self._counts.values()),
+                f"{prefix}_throttled": self._counts["throttled"],
+                f"{prefix}_errors": self._counts["error"],
+                f"{prefix}_latency_ewma_seconds": self._ewma or 0.0,
+            }
@@ -0,0 +1,474 @@
+"""
+Asyncio execution engine for ``python -m src.main --engine async``.
+
+Every question becomes a task on one event loop, so hundreds of conversations
+can be in flight at once. LLM requests and tool calls are bounded by separate
+semaphores (``ASYNC_LLM_CONCURRENCY`` and ``ASYNC_TOOL_CONCURRENCY`` in
+``src/config.yaml``), and BLAST waits or slow model responses suspend a task
+instead of parking an OS thread. Blocking file and SQLite writes (tool and LLM
+caches, checkpoints, the results log) run in ``asyncio.to_thread``, so they
+never stall the loop.
+"""
+
+import asyncio
+import contextlib
+import json
+
+from tqdm import tqdm
+
+from .async_tools import ASYNC_AVAILABLE_FUNCTIONS, close_async_http_client
+from .cache import make_cache_key
+from .checkpoints import (
+    ConversationCheckpoints,
+    resume_blast_jobs,
+    tool_call_from_dict,
+)
+from .llm_cache import LLMReplayMiss
+from .llm_interface import (
+    conversation_limit,
+    format_tool_calls_for_messages,
+    get_async_client,
+    make_messages,
+    make_messages_tool_use,
+    tool_single_flight,
+    validate_response_schema,
+)
+from .models import ResponseSchema
+from .prompts import FEW_SHOT_PROMPT, SYSTEM_PROMPT, TOOL_USE_SYSTEM_PROMPT
+from .results_log import ResultsLog
+from .tools import get_tools_definition
+from .tracing import annotate, llm_usage, tracer
+
+DEFAULT_LLM_CONCURRENCY = 50
+DEFAULT_TOOL_CONCURRENCY = 20
+
+
+class AsyncLimits:
+    """Separate concurrency limits for LLM requests and tool calls."""
+
+    def __init__(self, llm_concurrency: int, tool_concurrency: int):
+        self.llm_concurrency = llm_concurrency
+        self.tool_concurrency = tool_concurrency
+        self.llm = asyncio.Semaphore(llm_concurrency)
+        self.tools = asyncio.Semaphore(tool_concurrency)
+
+
+async def execute_tool_call_async(tool_call, limits: AsyncLimits) -> dict:
+    """Async version of ``llm_interface.execute_tool_call``."""
+    with tracer.span(
+        "tool", tool_call.function.name, tool_call_id=tool_call.id
+    ) as span:
+        tool_response = await _execute_tool_call_async(tool_call, limits)
+        span["bytes"] = len(str(tool_response["content"]).encode("utf-8"))
+        return tool_response
+
+
+async def _execute_tool_call_async(tool_call, limits: AsyncLimits) -> dict:
+    function_name = tool_call.function.name
+    tool_call_id = tool_call.id
+
+    print(f"  Function: {function_name}")
+
+    try:
+        function_args = json.loads(tool_call.function.arguments)
+        print(f"  Arguments: {function_args}")
+    except json.JSONDecodeError:
+        print(f"  Error: Could not parse arguments for {function_name}")
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "name": function_name,
+            "content": json.dumps(
+                {"error": f"Invalid arguments format: {tool_call.function.arguments}"}
+            ),
+        }
+
+    if function_name not in ASYNC_AVAILABLE_FUNCTIONS:
+        print(f"  Error: Unknown function '{function_name}'")
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "name": function_name,
+            "content": json.dumps({"error": f"Function '{function_name}' not found"}),
+        }
+
+    executed = []
+
+    async def run_tool():
+        executed.append(True)
+        async with limits.tools:
+            return await ASYNC_AVAILABLE_FUNCTIONS[function_name](**function_args)
+
+    try:
+        function_response = await tool_single_flight.do_async(
+            function_name, make_cache_key(function_name, function_args), run_tool
+        )
+        if not executed:
+            annotate(cache="shared")
+        print(f"  Tool executed. Response: {str(function_response)[:100]}...")
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "name": function_name,
+            "content": function_response,
+        }
+    except Exception as e:
+        print(f"  Error executing {function_name}: {e}")
+        annotate(error=str(e))
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "name": function_name,
+            "content": json.dumps({"error": f"Error in {function_name}: {str(e)}"}),
+        }
+
+
+async def call_llm_async(
+    client,
+    model: str,
+    question: str,
+    max_retries: int,
+    retry_delay: int,
+    limits: AsyncLimits,
+) -> ResponseSchema:
+    """Async version of ``llm_interface.call_llm``."""
+    messages = make_messages(question, SYSTEM_PROMPT, FEW_SHOT_PROMPT)
+    for attempt in range(max_retries):
+        try:
+            async with limits.llm:
+                with tracer.span("llm", model, turn=1, attempt=attempt + 1) as span:
+                    with conversation_limit.observe():
+                        response = await client.beta.chat.completions.parse(
+                            model=model,
+                            messages=messages,
+                            response_format=ResponseSchema,
+                        )
+                    span.update(llm_usage(response))
+            parsed_response = response.choices[0].message.parsed
+            if isinstance(parsed_response, ResponseSchema):
+                return parsed_response
+            elif isinstance(parsed_response, dict):
+                return ResponseSchema(**parsed_response)
+            else:
+                print(f"Unexpected parsed response type: {type(parsed_response)}")
+                return ResponseSchema(
+                    thoughts="Unexpected response structure",
+                    answer=str(parsed_response),
+                )
+        except LLMReplayMiss:
+            raise  # Retrying cannot help; fail the question quickly
+        except Exception as e:
+            print(f"Error calling LLM (attempt {attempt + 1}/{max_retries}): {e}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(retry_delay)
+            else:
+                print("Max retries reached. Failing.")
+                return ResponseSchema(
+                    thoughts=f"LLM call failed after {max_retries} retries: {e}",
+                    answer=None,
+                )
+    return ResponseSchema(
+        thoughts=f"LLM call failed after {max_retries} retries. No response.",
+        answer=None,
+    )
+
+
+async def call_llm_with_tools_async(
+    client,
+    model: str,
+    question: str,
+    max_turns: int,
+    max_retries: int,
+    retry_delay: int,
+    use_web_search: bool,
+    limits: AsyncLimits,
+    checkpoints: ConversationCheckpoints | None = None,
+) -> ResponseSchema:
+    """Async version of ``llm_interface.call_llm_with_tools``."""
+    messages = make_messages_tool_use(question, TOOL_USE_SYSTEM_PROMPT, FEW_SHOT_PROMPT)
+    tools = get_tools_definition(use_web_search)
+    start_turn = 0
+    state = await asyncio.to_thread(checkpoints.load, question) if checkpoints else None
+    if state is not None:
+        print(f"Resuming conversation from checkpoint before turn {state.turn + 1}")
+        messages, start_turn = state.messages, state.turn
+        resume_blast_jobs(state.blast_rids)
+        for tool_response in await asyncio.gather(
+            *(
+                execute_tool_call_async(tool_call_from_dict(call), limits)
+                for call in state.pending_tool_calls
+            )
+        ):
+            messages.append(tool_response)
+            await asyncio.to_thread(checkpoints.save, question, start_turn, messages)
+
+    for turn in range(start_turn, max_turns):
+        response_message = None
+        for attempt in range(max_retries):
+            try:
+                async with limits.llm:
+                    with tracer.span(
+                        "llm", model, turn=turn + 1, attempt=attempt + 1
+                    ) as span:
+                        with conversation_limit.observe():
+                            response = await client.chat.completions.create(
+                                model=model,
+                                messages=messages,
+                                tools=tools,
+                                tool_choice="auto",
+                            )
+                        span.update(llm_usage(response))
+                response_message = response.choices[0].message
+                break
+            except LLMReplayMiss:
+                raise  # Retrying cannot help; fail the question quickly
+            except Exception as e:
+                print(
+                    f"Error calling LLM (attempt {attempt + 1}/{max_retries}) in turn {turn + 1}: {e}"
+                )
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay)
+                else:
+                    return ResponseSchema(
+                        thoughts=f"Error communicating with AI model after {max_retries} retries in turn {turn + 1}: {e}",
+                        answer=f"Error: {str(e)}",
+                    )
+
+        if response_message is None:
+            return ResponseSchema(
+                thoughts=f"Error communicating with AI model after {max_retries} retries in turn {turn + 1}. No response message.",
+                answer="Error: LLM call failed after multiple retries.",
+            )
+
+        if response_message.tool_calls:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": response_message.content,
+                    "tool_calls": format_tool_calls_for_messages(
+                        response_message.tool_calls
+                    ),
+                }
+            )
+            if checkpoints:
+                await asyncio.to_thread(checkpoints.save, question, turn + 1, messages)
+            # gather keeps tool_call_id order; limits.tools bounds the concurrency
+            for tool_response in await asyncio.gather(
+                *(
+                    execute_tool_call_async(tool_call, limits)
+                    for tool_call in response_message.tool_calls
+                )
+            ):
+                messages.append(tool_response)
+                if checkpoints:
+                    await asyncio.to_thread(
+                        checkpoints.save, question, turn + 1, messages
+                    )
+        elif response_message.content:
+            return validate_response_schema(response_message.content)
+        else:
+            return ResponseSchema(
+                thoughts="LLM provided no content",
+                answer="No response content received",
+            )
+
+    print("Max turns reached. Attempting to get a final answer without tool use...")
+    try:
+        async with limits.llm:
+            with tracer.span("llm", model, turn=max_turns + 1, attempt=1) as span:
+                with conversation_limit.observe():
+                    final_response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        tools=tools,
+                        tool_choice="none",
+                    )
+                span.update(llm_usage(final_response))
+        final_response_message = final_response.choices[0].message
+        if final_response_message and final_response_message.content:
+            return validate_response_schema(final_response_message.content)
+        return ResponseSchema(
+            thoughts="Max turns reached, LLM provided no content in final attempt",
+            answer="Conversation ended, no final answer generated after max turns.",
+        )
+    except Exception as e:
+        print(f"Error during final LLM call after max turns: {e}")
+        return ResponseSchema(
+            thoughts=f"Max turns reached, error during final LLM call: {e}",
+            answer="Conversation ended, error during final answer generation.",
+        )
+
+
+async def process_single_question_async(
+    client,
+    model_name: str,
+    question: str,
+    tool_use: bool,
+    use_web_search: bool,
+    max_turns: int,
+    max_retries: int,
+    retry_delay: int,
+    ground_truth_answer: str,
+    limits: AsyncLimits,
+    checkpoints: ConversationCheckpoints | None = None,
+    category: str = "",
+) -> tuple[str, dict]:
+    """Async version of ``main.process_single_question``."""
+    with tracer.question(category, question):
+        return await _process_single_question_async(
+            client,
+            model_name,
+            question,
+            tool_use,
+            use_web_search,
+            max_turns,
+            max_retries,
+            retry_delay,
+            ground_truth_answer,
+            limits,
+            checkpoints,
+        )
+
+
+async def _process_single_question_async(
+    client,
+    model_name: str,
+    question: str,
+    tool_use: bool,
+    use_web_search: bool,
+    max_turns: int,
+    max_retries: int,
+    retry_delay: int,
+    ground_truth_answer: str,
+    limits: AsyncLimits,
+    checkpoints: ConversationCheckpoints | None,
+) -> tuple[str, dict]:
+    try:
+        if tool_use:
+            llm_response = await call_llm_with_tools_async(
+                client,
+                model_name,
+                question,
+                max_turns,
+                max_retries,
+                retry_delay,
+                use_web_search,
+                limits,
+                checkpoints,
+            )
+            if checkpoints:
+                await asyncio.to_thread(checkpoints.clear, question)
+        else:
+            llm_response = await call_llm_async(
+                client, model_name, question, max_retries, retry_delay, limits
+            )
+    except Exception as e:
+        print(f"Failed to call LLM for question '{question[:50]}...': {e}")
+        return question, {
+            "answer": ground_truth_answer,
+            "thoughts": f"Critical error in processing: {e}",
+            "prediction": "ERROR_PROCESSING",
+        }
+
+    if llm_response:
+        return question, {
+            "answer": ground_truth_answer,
+            "thoughts": llm_response.thoughts,
+            "prediction": llm_response.answer,
+        }
+    return question, {
+        "answer": ground_truth_answer,
+        "thoughts": "LLM call returned no response after retries.",
+        "prediction": None,
+    }
+
+
+async def process_dataset_async(
+    provider: str,
+    model_name: str,
+    dataset: dict,
+    tool_use: bool,
+    use_web_search: bool,
+    config: dict,
+    max_turns: int,
+    max_retries: int,
+    retry_delay: int,
+    results_log: ResultsLog | None = None,
+    checkpoints: ConversationCheckpoints | None = None,
+    questions: list[tuple] | None = None,
+) -> dict:
+    """
+    Processes every question in the dataset concurrently on the running
+    event loop and returns results in the same shape as ``process_dataset``.
+    ``questions`` lists ``(category, question, answer)`` in the order they
+    should start (default: dataset order).
+    """
+    client = get_async_client(provider)
+    limits = AsyncLimits(
+        config.get("ASYNC_LLM_CONCURRENCY", DEFAULT_LLM_CONCURRENCY),
+        config.get("ASYNC_TOOL_CONCURRENCY", DEFAULT_TOOL_CONCURRENCY),
+    )
+    print(
+        f"Async engine: up to {limits.llm_concurrency} concurrent LLM requests "
+        f"and {limits.tool_concurrency} concurrent tool calls."
+    )
+
+    results = {category: {} for category in dataset}
+
+    # With ADAPTIVE_CONCURRENCY, conversation_limit also bounds the questions
+    # in flight; otherwise every question starts at once, bounded by limits.llm
+    def conversation_slot():
+        if conversation_limit.adaptive:
+            return conversation_limit.async_slot()
+        return contextlib.nullcontext()
+
+    async def run(category: str, question: str, ground_truth_answer):
+        try:
+            async with conversation_slot():
+                _, q_result = await process_single_question_async(
+                    client,
+                    model_name,
+                    question,
+                    tool_use,
+                    use_web_search,
+                    max_turns,
+                    max_retries,
+                    retry_delay,
+                    ground_truth_answer,
+                    limits,
+                    checkpoints,
+                    category,
+                )
+        except Exception as exc:
+            print(f"Question '{question[:50]}...' generated an exception: {exc}")
+            q_result = {
+                "answer": ground_truth_answer,
+                "thoughts": f"Error during async execution: {exc}",
+                "prediction": "ERROR_TASK_EXECUTION",
+            }
+        return category, question, q_result
+
+    if questions is None:
+        questions = [
+            (category, question, ground_truth_answer)
+            for category, questions_answers in dataset.items()
+            for question, ground_truth_answer in questions_answers.items()
+        ]
+    tasks = [
+        asyncio.create_task(run(category, question, ground_truth_answer))
+        for category, question, ground_truth_answer in questions
+    ]
+    try:
+        for next_done in tqdm(
+            asyncio.as_completed(tasks), total=len(tasks), desc="Processing Questions"
+        ):
+            category, question, q_result = await next_done
+            results[category][question] = q_result
+            if results_log is not None:
+                await asyncio.to_thread(
+                    results_log.append, category, question, q_result
+                )
+    finally:
+        await close_async_http_client()
+        await client.close()
+    return results
@@ -0,0 +1,397 @@
+"""
+This module contains asyncio versions of the tools in ``src/tools.py``.
+
+Requests go through one shared ``httpx.AsyncClient`` and take tokens from the
+same NCBI rate limiter and result cache as the blocking tools, so both
+engines respect the same limits. Request building and response parsing are
+shared with ``src/tools.py``; only the transport and the waits differ.
+"""
+
+import asyncio
+import json
+import xml.etree.ElementTree as ET
+
+import httpx
+
+from .adaptive import outcome_for_status
+from .blast_backends import LOCAL_RID_PREFIX
+from .blast_hits import BlastHitParser
+from .http_session import DEFAULT_HEADERS
+from .rate_limit import parse_retry_after
+from .tools import (
+    BLAST_BACKEND,
+    BLAST_BASE_URL,
+    BLAST_GET_TIMEOUT,
+    BLAST_MAX_HITS,
+    BLAST_XML_CHUNK_SIZE,
+    NCBI_BASE_URL,
+    NCBI_DEFAULT_BACKOFF,
+    NCBI_MAX_THROTTLE_RETRIES,
+    NCBI_TIMEOUT,
+    WEB_SEARCH_URL,
+    blast_get_formats,
+    blast_get_params,
+    blast_hits_error,
+    blast_jobs,
+    blast_put_cache_hit,
+    blast_put_params,
+    blast_waiting_response,
+    cached_blast_get,
+    cached_rid_resubmission,
+    cached_tool,
+    can_batch_esummary,
+    efetch_params,
+    esearch_params,
+    esummary_batcher,
+    esummary_params,
+    finish_blast_get,
+    finish_local_blast,
+    format_blast_table,
+    format_efetch_response,
+    gene_index_first,
+    is_blast_status_page,
+    local_blast,
+    local_gene_esearch,
+    local_gene_esummary,
+    ncbi_concurrency,
+    ncbi_rate_limiter,
+    parse_blast_put_response,
+    parse_esearch_response,
+    parse_esummary_response,
+    parse_web_search_response,
+    register_blast_submission,
+    store_blast_report,
+    submit_local_blast,
+)
+from .tracing import add_to_span
+
+try:  # HTTP/2 is used when the optional ``h2`` package is installed
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_clients: dict[int, httpx.AsyncClient] = {}
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient for the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    client = _clients.get(loop_id)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS, follow_redirects=True, http2=HTTP2_AVAILABLE
+        )
+        _clients[loop_id] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """Close the AsyncClient bound to the running event loop, if any."""
+    client = _clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def ncbi_request_async(
+    method: str, url: str, stream: bool = False, **kwargs
+) -> httpx.Response:
+    """
+    Async counterpart of ``tools.ncbi_request``; waits without blocking. A
+    ``stream`` response's body is read by the caller, who must close it.
+    """
+    client = get_async_http_client()
+    timed = url.startswith(NCBI_BASE_URL)
+    for attempt in range(NCBI_MAX_THROTTLE_RETRIES + 1):
+        async with ncbi_concurrency.async_slot():
+            wait = ncbi_rate_limiter.reserve()
+            add_to_span("limiter_wait_seconds", wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            with ncbi_concurrency.observe(timed) as request:
+                response = await client.send(
+                    client.build_request(method, url, **kwargs), stream=stream
+                )
+                request.outcome = outcome_for_status(response.status_code)
+        if response.status_code != 429 or attempt == NCBI_MAX_THROTTLE_RETRIES:
+            return response
+        await response.aclose()
+        delay = parse_retry_after(
+            response.headers.get("Retry-After"), NCBI_DEFAULT_BACKOFF * 2**attempt
+        )
+        print(f"NCBI rate limit hit (HTTP 429). Backing off for {delay:.1f}s...")
+        ncbi_rate_limiter.backoff(delay)
+    return response
+
+
+@gene_index_first(local_gene_esearch)
+@cached_tool
+async def esearch_ncbi(database: str, term: str, retmax: int = 5) -> str:
+    """Async version of ``tools.esearch_ncbi``."""
+    print(
+        f"TOOL EXECUTING: esearch_ncbi with database: {database}, term: {term}, retmax: {retmax}"
+    )
+    try:
+        url = f"{NCBI_BASE_URL}esearch.fcgi"
+        params = esearch_params(database, term, retmax)
+        response = await ncbi_request_async(
+            "GET", url, params=params, timeout=NCBI_TIMEOUT
+        )
+        response.raise_for_status()
+        return parse_esearch_response(response.json(), database, term)
+    except httpx.HTTPError as e:
+        print(f"TOOL ERROR: esearch_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except json.JSONDecodeError as e:
+        print(f"TOOL ERROR: esearch_ncbi JSON decode failed: {e}")
+        return json.dumps({"error": "Failed to parse NCBI response."})
+    except Exception as e:
+        print(f"TOOL ERROR: esearch_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+@gene_index_first(local_gene_esummary)
+@cached_tool
+async def esummary_ncbi(database: str, uids: list[str], retmax: int = 5) -> str:
+    """Async version of ``tools.esummary_ncbi``."""
+    if not uids:
+        return json.dumps({"error": "No UIDs provided for esummary_ncbi."})
+    ids_str = ",".join(uids)
+    print(
+        f"TOOL EXECUTING: esummary_ncbi with database: {database}, UIDs: {ids_str}, retmax: {retmax}"
+    )
+    try:
+        if can_batch_esummary(uids, retmax):
+            future = esummary_batcher.submit(database, uids)
+            data = await asyncio.wrap_future(future)
+            return parse_esummary_response(data, database, ids_str)
+        url = f"{NCBI_BASE_URL}esummary.fcgi"
+        params = esummary_params(database, ids_str, retmax)
+        response = await ncbi_request_async(
+            "GET", url, params=params, timeout=NCBI_TIMEOUT
+        )
+        response.raise_for_status()
+        return parse_esummary_response(response.json(), database, ids_str)
+    except httpx.HTTPError as e:
+        print(f"TOOL ERROR: esummary_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except json.JSONDecodeError as e:
+        print(f"TOOL ERROR: esummary_ncbi JSON decode failed: {e}")
+        return json.dumps({"error": "Failed to parse NCBI response."})
+    except Exception as e:
+        print(f"TOOL ERROR: esummary_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+@cached_tool
+async def efetch_ncbi(
+    database: str, uids: list[str], retmode: str = "text", rettype: str = "default"
+) -> str:
+    """Async version of ``tools.efetch_ncbi``."""
+    if not uids:
+        return json.dumps({"error": "No UIDs provided for efetch_ncbi."})
+    ids_str = ",".join(uids)
+    print(
+        f"TOOL EXECUTING: efetch_ncbi with database: {database}, UIDs: {ids_str}, retmode: {retmode}, rettype: {rettype}"
+    )
+    try:
+        url = f"{NCBI_BASE_URL}efetch.fcgi"
+        params = efetch_params(database, ids_str, retmode, rettype)
+        response = await ncbi_request_async(
+            "GET", url, params=params, timeout=2 * NCBI_TIMEOUT
+        )
+        response.raise_for_status()
+        return format_efetch_response(response.text, ids_str, database)
+    except httpx.HTTPError as e:
+        print(f"TOOL ERROR: efetch_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        print(f"TOOL ERROR: efetch_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+async def submit_blast_put(
+    sequence: str, program: str, database: str, megablast: bool, hitlist_size: int
+) -> str:
+    """Async version of ``tools.submit_blast_put``."""
+    put_args = {
+        "sequence": sequence,
+        "program": program,
+        "database": database,
+        "megablast": megablast,
+        "hitlist_size": hitlist_size,
+    }
+    params = blast_put_params(**put_args)
+    try:
+        response = await ncbi_request_async(
+            "POST", BLAST_BASE_URL, data=params, timeout=2 * NCBI_TIMEOUT
+        )
+        response.raise_for_status()
+        result = parse_blast_put_response(response.text)
+        await asyncio.to_thread(
+            register_blast_submission, result, response.text, put_args
+        )
+        return result
+    except httpx.HTTPError as e:
+        print(f"TOOL ERROR: blast_put failed: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        print(f"TOOL ERROR: blast_put unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+async def blast_put(
+    sequence: str,
+    program: str = "blastn",
+    database: str = "nt",
+    megablast: bool = True,
+    hitlist_size: int = 10,
+) -> str:
+    """Async version of ``tools.blast_put``."""
+    print(
+        f"TOOL EXECUTING: blast_put with sequence (first 30 chars): {sequence[:30]}..., program: {program}, database: {database}"
+    )
+    put_args = {
+        "sequence": sequence,
+        "program": program,
+        "database": database,
+        "megablast": megablast,
+        "hitlist_size": hitlist_size,
+    }
+    cached = await asyncio.to_thread(blast_put_cache_hit, put_args)
+    if cached is not None:
+        return cached
+    if BLAST_BACKEND == "local":
+        return await asyncio.to_thread(submit_local_blast, put_args)
+    return await submit_blast_put(**put_args)
+
+
+async def local_blast_get(rid: str, format_type: str, raw: bool = False) -> str:
+    """Async version of ``tools.local_blast_get``."""
+    report_format, cache_format = blast_get_formats(format_type, raw)
+    job = local_blast.job(rid, report_format)
+    if job is None:
+        return json.dumps({"error": f"Unknown local BLAST RID {rid}."})
+    try:
+        outcome = await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(job)), BLAST_GET_TIMEOUT
+        )
+        result = finish_local_blast(rid, *outcome, raw=raw)
+    except asyncio.TimeoutError:
+        return blast_waiting_response(rid)
+    except Exception as e:
+        print(f"TOOL ERROR: local blast_get failed for RID {rid}: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+    await asyncio.to_thread(store_blast_report, rid, cache_format, result)
+    return result
+
+
+async def finish_streamed_blast_hits(chunks, rid: str) -> str:
+    """Async version of ``tools.finish_streamed_blast_hits``."""
+    head = await anext(chunks, b"")
+    if is_blast_status_page(head, rid):
+        rest = b"".join([chunk async for chunk in chunks])
+        return finish_blast_get((head + rest).decode("utf-8", "replace"), rid)
+    parser = BlastHitParser(BLAST_MAX_HITS)
+    try:
+        parser.feed(head)
+        async for chunk in chunks:
+            parser.feed(chunk)
+        table = parser.close()
+    except ET.ParseError as e:
+        return blast_hits_error(rid, e)
+    return format_blast_table(table, rid)
+
+
+async def blast_get(rid: str, format_type: str = "Text", raw: bool = False) -> str:
+    """
+    Async version of ``tools.blast_get``. Waiting on the BLAST job manager
+    suspends only this conversation, not a worker thread.
+    """
+    print(
+        f"TOOL EXECUTING: blast_get with RID: {rid}, format_type: {format_type}, raw: {raw}"
+    )
+    report_format, cache_format = blast_get_formats(format_type, raw)
+    cached = await asyncio.to_thread(cached_blast_get, rid, cache_format)
+    if cached is not None:
+        return cached
+    put_args = await asyncio.to_thread(cached_rid_resubmission, rid)
+    if put_args is not None:
+        print(f"Cached RID {rid} has no {cache_format} result; resubmitting search.")
+        if BLAST_BACKEND == "local":
+            submitted = json.loads(
+                await asyncio.to_thread(submit_local_blast, put_args)
+            )
+        else:
+            submitted = json.loads(await submit_blast_put(**put_args))
+        if "rid" not in submitted:
+            return json.dumps(submitted)
+        rid = submitted["rid"]
+    if rid.startswith(LOCAL_RID_PREFIX):
+        return await local_blast_get(rid, format_type, raw)
+
+    job = asyncio.wrap_future(blast_jobs.track(rid))
+    try:
+        # shield: a timeout here must not cancel the future other callers share
+        status, error_msg = await asyncio.wait_for(
+            asyncio.shield(job), BLAST_GET_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        return blast_waiting_response(rid)
+    if status != "READY":
+        print(f"TOOL RESULT: {error_msg}")
+        return json.dumps({"error": error_msg})
+
+    try:
+        response = await ncbi_request_async(
+            "GET",
+            BLAST_BASE_URL,
+            stream=True,
+            params=blast_get_params(rid, report_format),
+            timeout=4 * NCBI_TIMEOUT,
+        )
+        try:
+            response.raise_for_status()
+            if raw:
+                await response.aread()
+                result = finish_blast_get(response.text, rid, raw)
+            else:
+                result = await finish_streamed_blast_hits(
+                    response.aiter_bytes(BLAST_XML_CHUNK_SIZE), rid
+                )
+        finally:
+            await response.aclose()
+        await asyncio.to_thread(store_blast_report, rid, cache_format, result)
+        return result
+    except httpx.HTTPError as e:
+        print(f"TOOL ERROR: blast_get failed for RID {rid}: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        print(f"TOOL ERROR: blast_get unexpected error for RID {rid}: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+async def web_search(query: str, max_results: int = 5) -> str:
+    """Async version of ``tools.web_search``."""
+    print(f"TOOL EXECUTING: web_search with query: {query}, max_results: {max_results}")
+    params = {"q": query, "format": "json", "no_redirect": 1, "no_html": 1}
+    try:
+        response = await get_async_http_client().get(
+            WEB_SEARCH_URL, params=params, timeout=10
+        )
+        response.raise_for_status()
+        return parse_web_search_response(response.json(), max_results)
+    except Exception as e:
+        print(f"TOOL ERROR: web_search failed: {e}")
+        return json.dumps({"error": str(e)})
+
+
+ASYNC_AVAILABLE_FUNCTIONS = {
+    "esearch_ncbi": esearch_ncbi,
+    "esummary_ncbi": esummary_ncbi,
+    "efetch_ncbi": efetch_ncbi,
+    "blast_put": blast_put,
+    "blast_get": blast_get,
+    "web_search": web_search,
+}
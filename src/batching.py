@@ -0,0 +1,129 @@
+"""This module contains the micro-batcher that coalesces concurrent esummary calls."""
+
+import concurrent.futures
+import threading
+from typing import Callable
+
+
+class _Batch:
+    def __init__(self):
+        self.ids: dict[str, None] = {}  # Ordered set of UIDs
+        self.callers: list[tuple[list[str], concurrent.futures.Future]] = []
+
+
+def batch_failed(data: dict) -> bool:
+    """
+    Whether NCBI rejected a multi-ID request as a whole, e.g. with an
+    ``esummaryresult`` error because one of the IDs is invalid.
+    """
+    return "result" not in data or "error" in data or "error" in data["result"]
+
+
+def split_esummary_result(data: dict, uids: list[str]) -> dict:
+    """
+    Cut a multi-ID esummary response down to what a request for ``uids``
+    alone would have returned.
+    """
+    if "result" not in data:
+        return data
+    result = data["result"]
+    returned = set(result.get("uids", []))
+    wanted = [uid for uid in dict.fromkeys(uids) if uid in returned]
+    own = {"uids": wanted}
+    own.update({uid: result[uid] for uid in wanted if uid in result})
+    return {**data, "result": own}
+
+
+class EsummaryBatcher:
+    """
+    Gathers esummary requests for the same database that arrive within
+    ``window`` seconds and sends them to NCBI as one comma-separated ``id``
+    list. ``submit`` returns a future resolving to the caller's own slice of
+    the response. If the batched request fails, or NCBI rejects it as a
+    whole, every caller's request is re-issued on its own, so one bad ID
+    cannot fail the others. Full batches (``max_ids`` UIDs) are flushed early
+    on a background thread, never on the submitting one, which may be an
+    event loop.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, list[str]], dict],
+        window: float = 0.05,
+        max_ids: int = 200,
+    ):
+        self._fetch = fetch
+        self.window = window
+        self.max_ids = max_ids
+        self._lock = threading.Lock()
+        self._pending: dict[str, _Batch] = {}
+        self._requests = 0
+        self._callers = 0
+        self._fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def submit(self, database: str, uids: list[str]) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            self._callers += 1
+            batch = self._pending.get(database)
+            if batch is None:
+                batch = self._pending[database] = _Batch()
+                timer = threading.Timer(self.window, self._flush, (database, batch))
+                timer.daemon = True
+                timer.start()
+            batch.ids.update(dict.fromkeys(uids))
+            batch.callers.append((list(uids), future))
+            full = len(batch.ids) >= self.max_ids
+        if full:
+            threading.Thread(
+                target=self._flush, args=(database, batch), daemon=True
+            ).start()
+        return future
+
+    def _flush(self, database: str, batch: _Batch) -> None:
+        with self._lock:
+            if self._pending.get(database) is not batch:
+                return  # Already flushed
+            del self._pending[database]
+            self._requests += 1
+        if len(batch.callers) == 1:  # The caller's own request
+            _, future = batch.callers[0]
+            try:
+                future.set_result(self._fetch(database, list(batch.ids)))
+            except Exception as e:
+                future.set_exception(e)
+            return
+        try:
+            data = self._fetch(database, list(batch.ids))
+        except Exception:
+            data = None
+        if data is None or batch_failed(data):
+            self._fetch_separately(database, batch)
+            return
+        for uids, future in batch.callers:
+            future.set_result(split_esummary_result(data, uids))
+
+    def _fetch_separately(self, database: str, batch: _Batch) -> None:
+        with self._lock:
+            self._requests += len(batch.callers)
+            self._fallbacks += 1
+        for uids, future in batch.callers:
+            try:
+                future.set_result(self._fetch(database, uids))
+            except Exception as e:
+                future.set_exception(e)
+
+    def stats(self, prefix: str = "esummary_batch") -> dict:
+        with self._lock:
+            return {
+                f"{prefix}_requests": self._requests,
+                f"{prefix}_callers": self._callers,
+                f"{prefix}_fallbacks": self._fallbacks,
+                f"{prefix}_callers_per_request": (
+                    self._callers / self._requests if self._requests else 0.0
+                ),
+            }
@@ -0,0 +1,121 @@
+"""This module contains the local BLAST backend used when BLAST_BACKEND=local."""
+
+import concurrent.futures
+import os
+import shlex
+import subprocess
+import threading
+import uuid
+
+LOCAL_RID_PREFIX = "LOCAL-"
+
+# blast_get format_type -> BLAST+ -outfmt
+OUTFMT_BY_FORMAT_TYPE = {
+    "Text": "0",
+    "XML": "5",
+    "Tabular": "6",
+    "JSON": "15",
+    "JSON2": "15",
+}
+
+# Placeholders: {program} {task} {db} {outfmt} {hitlist_size}
+DEFAULT_LOCAL_BLAST_COMMAND = (
+    "{program} -task {task} -db {db} -outfmt {outfmt} -max_target_seqs {hitlist_size}"
+)
+
+
+def run_blast_command(
+    argv: list[str], query_fasta: str, timeout: float
+) -> tuple[int, str, str]:
+    """Run one BLAST+ search as a child process; the query is fed on stdin."""
+    try:
+        completed = subprocess.run(
+            argv, input=query_fasta, capture_output=True, text=True, timeout=timeout
+        )
+    except FileNotFoundError as e:
+        return 127, "", f"BLAST executable not found: {e}"
+    except subprocess.TimeoutExpired:
+        return 124, "", f"BLAST search timed out after {timeout} seconds"
+    return completed.returncode, completed.stdout, completed.stderr
+
+
+class LocalBlastBackend:
+    """
+    Runs ``blastn``/``blastp`` (or any configured command) against local
+    databases. The searches already run out of process, so a bounded
+    thread pool only waits on them.
+
+    ``submit`` starts the search and returns a ``LOCAL-...`` RID at once;
+    ``job`` returns a future resolving to ``(returncode, stdout, stderr)``.
+    A report in a different format is produced by re-running the search in
+    that format. The pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        db_dir: str,
+        command: str = DEFAULT_LOCAL_BLAST_COMMAND,
+        max_workers: int = 2,
+        timeout: float = 600,
+        default_format: str = "XML",
+    ):
+        self.db_dir = db_dir
+        self.command = command
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.default_format = default_format
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._queries: dict[str, dict] = {}
+        self._jobs: dict[tuple[str, str], concurrent.futures.Future] = {}
+
+    def build_command(self, put_args: dict, format_type: str) -> list[str]:
+        program = put_args["program"]
+        if program == "blastn":
+            task = "megablast" if put_args.get("megablast", True) else "blastn"
+        else:
+            task = program
+        fields = {
+            "program": program,
+            "task": task,
+            "db": os.path.join(self.db_dir, put_args["database"]),
+            "outfmt": OUTFMT_BY_FORMAT_TYPE.get(format_type, "0"),
+            "hitlist_size": put_args.get("hitlist_size", 10),
+        }
+        return [token.format(**fields) for token in shlex.split(self.command)]
+
+    def _start(self, rid: str, format_type: str) -> concurrent.futures.Future:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="local-blast"
+            )
+        put_args = self._queries[rid]
+        argv = self.build_command(put_args, format_type)
+        query_fasta = f">query\n{put_args['sequence']}\n"
+        future = self._executor.submit(
+            run_blast_command, argv, query_fasta, self.timeout
+        )
+        self._jobs[(rid, format_type)] = future
+        return future
+
+    def submit(self, put_args: dict) -> str:
+        """Queue a local search and return its RID."""
+        rid = LOCAL_RID_PREFIX + uuid.uuid4().hex[:12].upper()
+        with self._lock:
+            self._queries[rid] = dict(put_args)
+            self._start(rid, self.default_format)
+        return rid
+
+    def job(self, rid: str, format_type: str) -> concurrent.futures.Future | None:
+        """Return the search future for ``rid`` in ``format_type``, if known."""
+        with self._lock:
+            if rid not in self._queries:
+                return None
+            future = self._jobs.get((rid, format_type))
+            return future if future is not None else self._start(rid, format_type)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,109 @@
+"""This module turns BLAST XML reports into the compact hit table returned by blast_get."""
+
+import re
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable
+
+# Protein deflines name the organism in brackets, e.g. "... [Homo sapiens]"
+_ORGANISM = re.compile(r"\[([^\[\]]+)\]\s*$")
+# Nucleotide deflines usually start with it, e.g. "Homo sapiens chromosome 10, ..."
+_LEADING_ORGANISM = re.compile(r"^(?:PREDICTED: )?([A-Z][a-z]+ [a-z]+)\b")
+
+
+def _organism(description: str) -> str | None:
+    match = _ORGANISM.search(description) or _LEADING_ORGANISM.match(description)
+    return match.group(1) if match else None
+
+
+def _int(elem: ET.Element, tag: str) -> int | None:
+    text = elem.findtext(tag)
+    return int(text) if text else None
+
+
+def _float(elem: ET.Element, tag: str) -> float | None:
+    text = elem.findtext(tag)
+    return float(text) if text else None
+
+
+class BlastHitParser:
+    """
+    Incremental parser for a BLAST XML (``FORMAT_TYPE=XML`` / ``-outfmt 5``)
+    report: ``feed`` it chunks as they arrive and ``close`` it for
+    ``{"program", "database", "query_length", "hits"}``. Hits keep BLAST's
+    ranking; each is summarized by its best HSP. Every ``Hit`` element is
+    removed from the tree once it is read, so memory stays bounded by one hit
+    and the chunk being parsed, however large the report.
+    """
+
+    def __init__(self, max_hits: int):
+        self.max_hits = max_hits
+        self.summary: dict = {"program": None, "database": None, "query_length": None}
+        self.hits: list[dict] = []
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._open: list[ET.Element] = []
+
+    def feed(self, chunk: str | bytes) -> None:
+        self._parser.feed(chunk)
+        self._read_events()
+
+    def close(self) -> dict:
+        self._parser.close()
+        self._read_events()
+        return {**self.summary, "hits": self.hits}
+
+    def _read_events(self) -> None:
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._open.append(elem)
+                continue
+            self._open.pop()
+            if elem.tag == "BlastOutput_program":
+                self.summary["program"] = elem.text
+            elif elem.tag == "BlastOutput_db":
+                self.summary["database"] = elem.text
+            elif elem.tag == "BlastOutput_query-len":
+                self.summary["query_length"] = int(elem.text)
+            elif elem.tag == "Hit":
+                if len(self.hits) < self.max_hits:
+                    self.hits.append(_hit_row(elem, len(self.hits) + 1))
+                if self._open:
+                    self._open[-1].remove(elem)
+
+
+def parse_blast_xml(content: str | bytes | Iterable[bytes], max_hits: int) -> dict:
+    """
+    Parse a BLAST XML report given whole or as an iterable of chunks, e.g. a
+    streamed HTTP response's ``iter_content``; see ``BlastHitParser``.
+    """
+    parser = BlastHitParser(max_hits)
+    for chunk in [content] if isinstance(content, (str, bytes)) else content:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def _hit_row(hit: ET.Element, rank: int) -> dict:
+    description = hit.findtext("Hit_def") or ""
+    hsp = hit.find("Hit_hsps/Hsp")
+    row = {
+        "rank": rank,
+        "accession": hit.findtext("Hit_accession"),
+        "description": description,
+        "organism": _organism(description),
+    }
+    if hsp is None:
+        return row
+    identity, align_len = _int(hsp, "Hsp_identity"), _int(hsp, "Hsp_align-len")
+    row.update(
+        {
+            "percent_identity": (
+                round(100 * identity / align_len, 2) if identity and align_len else None
+            ),
+            "evalue": _float(hsp, "Hsp_evalue"),
+            "bit_score": _float(hsp, "Hsp_bit-score"),
+            "query_start": _int(hsp, "Hsp_query-from"),
+            "query_end": _int(hsp, "Hsp_query-to"),
+            "subject_start": _int(hsp, "Hsp_hit-from"),
+            "subject_end": _int(hsp, "Hsp_hit-to"),
+        }
+    )
+    return row
@@ -0,0 +1,125 @@
+"""This module contains the shared manager that polls outstanding BLAST jobs."""
+
+import concurrent.futures
+import threading
+import time
+from typing import Callable
+
+
+class _BlastJob:
+    def __init__(self, rid: str, first_poll_in: float, min_interval: float):
+        self.rid = rid
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.submitted_at = time.monotonic()
+        self.next_poll = self.submitted_at + first_poll_in
+        self.interval = min_interval
+        self.errors = 0
+
+
+class BlastJobManager:
+    """
+    Tracks every outstanding BLAST RID and polls them from one daemon thread.
+
+    Callers get a ``concurrent.futures.Future`` that resolves to
+    ``(status, error_message)`` as soon as a status-only check reports the job
+    READY, FAILED or UNKNOWN, so nobody sleeps a fixed 30 seconds. Each RID is
+    first polled after NCBI's estimate (RTOE) or ``min_interval``, then at
+    intervals growing by ``backoff`` up to ``max_interval``. Finished jobs
+    are remembered, so repeated ``blast_get`` calls return immediately.
+    """
+
+    def __init__(
+        self,
+        check_status: Callable[[str], tuple[str, str | None]],
+        min_interval: float = 10.0,
+        max_interval: float = 60.0,
+        backoff: float = 1.5,
+        max_errors: int = 3,
+    ):
+        self._check_status = check_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_errors = max_errors
+        self._jobs: dict[str, _BlastJob] = {}
+        self._finished: dict[str, concurrent.futures.Future] = {}
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._polls = 0
+        self._completed = 0
+        self._wait_seconds = 0.0
+
+    def track(
+        self, rid: str, estimated_seconds: float | None = None
+    ) -> concurrent.futures.Future:
+        """Start tracking ``rid`` (if needed) and return its shared future."""
+        with self._cond:
+            if rid in self._finished:
+                return self._finished[rid]
+            job = self._jobs.get(rid)
+            if job is None:
+                first_poll_in = max(
+                    self.min_interval, min(estimated_seconds or 0, self.max_interval)
+                )
+                job = _BlastJob(rid, first_poll_in, self.min_interval)
+                self._jobs[rid] = job
+                self._ensure_thread()
+                self._cond.notify()
+            return job.future
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="blast-job-manager", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = [job for job in self._jobs.values() if job.next_poll <= now]
+                if not due:
+                    next_poll = min(job.next_poll for job in self._jobs.values())
+                    self._cond.wait(timeout=next_poll - now)
+                    continue
+            for job in due:
+                self._poll(job)
+
+    def _poll(self, job: _BlastJob) -> None:
+        try:
+            status, error_msg = self._check_status(job.rid)
+            job.errors = 0
+        except Exception as e:
+            job.errors += 1
+            print(f"BLAST status check for RID {job.rid} failed: {e}")
+            if job.errors < self.max_errors:
+                status, error_msg = "WAITING", None
+            else:
+                status, error_msg = "FAILED", f"BLAST status check failed: {e}"
+        with self._cond:
+            self._polls += 1
+            if status == "WAITING":
+                job.next_poll = time.monotonic() + job.interval
+                job.interval = min(job.interval * self.backoff, self.max_interval)
+                return
+            del self._jobs[job.rid]
+            self._finished[job.rid] = job.future
+            self._completed += 1
+            self._wait_seconds += time.monotonic() - job.submitted_at
+        print(f"BLAST job {job.rid} finished with status {status}")
+        if not job.future.done():
+            job.future.set_result((status, error_msg))
+
+    def stats(self, prefix: str = "blast_jobs") -> dict:
+        with self._cond:
+            return {
+                f"{prefix}_completed": self._completed,
+                f"{prefix}_outstanding": len(self._jobs),
+                f"{prefix}_status_polls": self._polls,
+                f"{prefix}_avg_seconds_to_finish": (
+                    self._wait_seconds / self._completed if self._completed else 0.0
+                ),
+            }
@@ -0,0 +1,153 @@
+"""This module contains a persistent on-disk cache for tool results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Arguments NCBI treats case-insensitively, by tool; all others keep their case
+CASE_INSENSITIVE_ARGS = {
+    "esearch_ncbi": {"database", "term"},
+    "esummary_ncbi": {"database"},
+    "efetch_ncbi": {"database"},
+}
+
+
+def normalize_cache_value(value, fold_case: bool = False):
+    """
+    Normalize a tool argument so equivalent calls map to the same key:
+    collapse whitespace, and lower-case it too when ``fold_case`` is set.
+    """
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.lower() if fold_case else value
+    if isinstance(value, (list, tuple)):
+        return [normalize_cache_value(item, fold_case) for item in value]
+    if isinstance(value, dict):
+        return {str(k): normalize_cache_value(v, fold_case) for k, v in value.items()}
+    return value
+
+
+def make_cache_key(namespace: str, params: dict) -> str:
+    """Build a content-addressed key from a namespace and normalized params."""
+    case_insensitive = CASE_INSENSITIVE_ARGS.get(namespace, set())
+    normalized = {
+        k: normalize_cache_value(v, k in case_insensitive) for k, v in params.items()
+    }
+    payload = json.dumps([namespace, normalized], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ToolCache:
+    """
+    SQLite-backed key/value cache with a TTL and size-bounded LRU eviction.
+
+    A single connection is shared by all threads and guarded by a lock. The
+    database is opened lazily on first use, so importing the module does not
+    touch the filesystem. An empty ``path`` disables the cache.
+    """
+
+    def __init__(self, path: str | None, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters: dict[str, dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            dir_name = os.path.dirname(self.path)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, namespace TEXT, value TEXT, "
+                "created_at REAL, accessed_at REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache(accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, key: str, namespace: str = "default") -> str | None:
+        """Return the cached value for ``key`` or None on a miss or expiry."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds > 0:
+                if now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._count(namespace, "hits")
+            return row[0]
+
+    def set(self, key: str, value: str, namespace: str = "default") -> None:
+        """Store ``value`` under ``key``, evicting least recently used entries."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(key, namespace, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now),
+            )
+            if self.max_entries > 0:
+                (size,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+                if size > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM cache WHERE key IN ("
+                        "SELECT key FROM cache ORDER BY accessed_at ASC LIMIT ?)",
+                        (size - self.max_entries,),
+                    )
+            conn.commit()
+
+    def stats(self, prefix: str = "tool_cache") -> dict:
+        """Return hit/miss counters, overall and per namespace, for MLflow."""
+        with self._lock:
+            counters = {ns: dict(c) for ns, c in self._counters.items()}
+        hits = sum(c["hits"] for c in counters.values())
+        misses = sum(c["misses"] for c in counters.values())
+        stats = {
+            f"{prefix}_hits": hits,
+            f"{prefix}_misses": misses,
+            f"{prefix}_hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+        for namespace, c in counters.items():
+            stats[f"{prefix}_{namespace}_hits"] = c["hits"]
+            stats[f"{prefix}_{namespace}_misses"] = c["misses"]
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,133 @@
+"""This module contains per-conversation checkpoints for resuming tool-use runs."""
+
+import hashlib
+import json
+import os
+from types import SimpleNamespace
+
+from .models import ConversationState
+from .tools import CACHED_RID_PREFIX, LOCAL_RID_PREFIX, blast_jobs
+
+
+def default_checkpoint_dir(output_path: str) -> str:
+    """``results/run.json`` -> ``results/run.checkpoints``."""
+    return os.path.splitext(output_path)[0] + ".checkpoints"
+
+
+def pending_tool_calls(messages: list[dict]) -> list[dict]:
+    """Tool calls of the last assistant message that have no tool response yet."""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if message.get("role") == "assistant":
+            answered = {
+                m.get("tool_call_id")
+                for m in messages[index + 1 :]
+                if m.get("role") == "tool"
+            }
+            return [
+                call
+                for call in message.get("tool_calls") or []
+                if call["id"] not in answered
+            ]
+    return []
+
+
+def outstanding_blast_rids(messages: list[dict]) -> list[str]:
+    """RIDs returned by blast_put whose report has not been retrieved yet."""
+    calls = {
+        call["id"]: call["function"]
+        for message in messages
+        if message.get("role") == "assistant"
+        for call in message.get("tool_calls") or []
+    }
+    rids: dict[str, None] = {}
+    for message in messages:
+        if message.get("role") != "tool":
+            continue
+        try:
+            content = json.loads(message.get("content") or "")
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if not isinstance(content, dict):
+            continue
+        if message.get("name") == "blast_put" and "rid" in content:
+            rids[content["rid"]] = None
+        elif message.get("name") == "blast_get" and content.get("status") != "WAITING":
+            function = calls.get(message.get("tool_call_id"))
+            if function is not None:
+                try:
+                    rids.pop(json.loads(function["arguments"]).get("rid"), None)
+                except json.JSONDecodeError:
+                    pass
+    return list(rids)
+
+
+def tool_call_from_dict(call: dict):
+    """Rebuild the attribute-style tool call ``execute_tool_call`` expects."""
+    return SimpleNamespace(
+        id=call["id"],
+        type=call.get("type", "function"),
+        function=SimpleNamespace(
+            name=call["function"]["name"], arguments=call["function"]["arguments"]
+        ),
+    )
+
+
+def resume_blast_jobs(rids: list[str]) -> None:
+    """Start polling remote RIDs from a checkpoint before the model asks for them."""
+    for rid in rids:
+        if not rid.startswith((LOCAL_RID_PREFIX, CACHED_RID_PREFIX)):
+            blast_jobs.track(rid)
+
+
+class ConversationCheckpoints:
+    """
+    One JSON file per in-progress conversation under ``directory``, rewritten
+    atomically after every LLM turn and tool response. A finished conversation's
+    file is removed, so whatever is left after a crash can be resumed.
+    """
+
+    def __init__(self, directory: str, run_key: str):
+        self.directory = directory
+        self.run_key = run_key
+
+    def path_for(self, question: str) -> str:
+        digest = hashlib.sha256(f"{self.run_key}\n{question}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest[:24]}.json")
+
+    def reset(self) -> None:
+        """Drop checkpoints left by earlier runs."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".json.tmp")):
+                os.remove(os.path.join(self.directory, name))
+
+    def save(self, question: str, turn: int, messages: list[dict]) -> None:
+        state = ConversationState(
+            question=question,
+            turn=turn,
+            messages=messages,
+            pending_tool_calls=pending_tool_calls(messages),
+            blast_rids=outstanding_blast_rids(messages),
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(question)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(state.model_dump_json())
+        os.replace(tmp_path, path)
+
+    def load(self, question: str) -> ConversationState | None:
+        try:
+            with open(self.path_for(question), "r", encoding="utf-8") as f:
+                state = ConversationState.model_validate_json(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        return state if state.question == question else None
+
+    def clear(self, question: str) -> None:
+        try:
+            os.remove(self.path_for(question))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,295 @@
+"""
+Load balancing of LLM requests across several endpoints of one provider.
+
+Endpoints are listed per provider under ``LLM_ENDPOINTS`` in
+``src/config.yaml``, each with an optional ``weight`` and, for deployments
+named differently per region, a ``models`` map from model to deployment name.
+Every request goes to the healthy endpoint with the fewest requests in
+flight per unit of weight (ties go to the one that has served the fewest
+requests per weight). Endpoints whose TPM/RPM window is full are skipped
+while another one has room. An endpoint that fails with a server error, a
+timeout, a connection error or a 429 is ejected for a cooldown (at least the
+server's Retry-After) and the request fails over to the next endpoint.
+"""
+
+import functools
+import threading
+import time
+from types import SimpleNamespace
+
+from .llm_budget import retry_after_seconds
+from .tracing import annotate, percentile
+
+DEFAULT_COOLDOWN_SECONDS = 30.0
+# Client errors caused by the request itself; retrying elsewhere cannot help
+REQUEST_ERROR_STATUSES = range(400, 500)
+RETRYABLE_CLIENT_STATUSES = {408, 409, 429}
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """Whether ``error`` says more about the endpoint than about the request."""
+    status = getattr(error, "status_code", None)
+    return not (
+        status in REQUEST_ERROR_STATUSES and status not in RETRYABLE_CLIENT_STATUSES
+    )
+
+
+class Endpoint:
+    """One endpoint of the pool, its clients and its counters."""
+
+    def __init__(self, spec: dict, factory):
+        self.spec = spec
+        self.name = spec["name"]
+        self.weight = float(spec.get("weight", 1))
+        self.models = spec.get("models", {})
+        self._factory = factory
+        self._clients = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: list[float] = []
+
+    def client(self, is_async: bool):
+        with self._lock:
+            if is_async not in self._clients:
+                self._clients[is_async] = self._factory(self.spec, is_async)
+            return self._clients[is_async]
+
+
+class EndpointPool:
+    """
+    Routes requests over the endpoints configured for one provider. With no
+    endpoints configured, ``get_client`` builds the single client from the
+    environment as before.
+    """
+
+    def __init__(self, cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS):
+        self.cooldown_seconds = cooldown_seconds
+        self.endpoints: list[Endpoint] = []
+        self._delay = None
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        specs: list[dict] | None,
+        factory,
+        cooldown_seconds: float | None = None,
+        delay=None,
+    ) -> None:
+        """
+        ``specs`` are endpoint dicts with a unique ``name``; ``factory(spec,
+        is_async)`` builds the client for one of them. ``delay(endpoint,
+        deployment)``, if given, returns the seconds until the endpoint's
+        rate-limit window has room for a request to that deployment.
+        """
+        if cooldown_seconds is not None:
+            self.cooldown_seconds = cooldown_seconds
+        self._delay = delay
+        names = [spec["name"] for spec in specs or []]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate LLM endpoint names: {names}")
+        with self._lock:
+            self.endpoints = [Endpoint(spec, factory) for spec in specs or []]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    def acquire(
+        self, exclude: set[str] = frozenset(), model: str | None = None
+    ) -> Endpoint | None:
+        """
+        Pick the least-loaded healthy endpoint not in ``exclude``, preferring
+        those with room in their rate-limit window for ``model``.
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.name not in exclude]
+            if not candidates:
+                return None
+            now = time.monotonic()
+            healthy = [e for e in candidates if e.ejected_until <= now]
+            if healthy:
+                delays = {
+                    e.name: (
+                        self._delay(e.spec, e.models.get(model, model))
+                        if self._delay is not None and model is not None
+                        else 0.0
+                    )
+                    for e in healthy
+                }
+                endpoint = min(
+                    healthy,
+                    key=lambda e: (
+                        delays[e.name],
+                        e.in_flight / e.weight,
+                        e.requests / e.weight,
+                    ),
+                )
+            else:  # Everything is cooling down: use the one that recovers first
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float, response=None) -> None:
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.latencies.append(latency)
+            if usage is not None:
+                endpoint.prompt_tokens += usage.prompt_tokens or 0
+                endpoint.completion_tokens += usage.completion_tokens or 0
+
+    def abandon(self, endpoint: Endpoint) -> None:
+        """Forget a request that was cancelled, without blaming the endpoint."""
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def fail(self, endpoint: Endpoint, error: Exception) -> None:
+        """Count a failed request and eject the endpoint if it is to blame."""
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.errors += 1
+            if not is_endpoint_failure(error):
+                return
+            cooldown = self.cooldown_seconds
+            if getattr(error, "status_code", None) == 429:
+                cooldown = max(cooldown, retry_after_seconds(error))
+            endpoint.ejections += 1
+            endpoint.ejected_until = time.monotonic() + cooldown
+        print(
+            f"LLM endpoint '{endpoint.name}' failed ({error}); "
+            f"ejected for {cooldown:.0f}s"
+        )
+
+    def wrap(self, is_async: bool):
+        """A client that sends each request through the pool."""
+        return PooledClient(self, is_async)
+
+    def stats(self, prefix: str = "llm_endpoint") -> dict:
+        with self._lock:
+            stats = {}
+            for e in self.endpoints:
+                latencies = e.latencies or [0.0]
+                stats.update(
+                    {
+                        f"{prefix}_{e.name}_requests": e.requests,
+                        f"{prefix}_{e.name}_errors": e.errors,
+                        f"{prefix}_{e.name}_ejections": e.ejections,
+                        f"{prefix}_{e.name}_latency_p50": percentile(latencies, 50),
+                        f"{prefix}_{e.name}_latency_p95": percentile(latencies, 95),
+                        f"{prefix}_{e.name}_prompt_tokens": e.prompt_tokens,
+                        f"{prefix}_{e.name}_completion_tokens": e.completion_tokens,
+                    }
+                )
+            return stats
+
+
+class _PooledEndpoint:
+    """One completions method, sent to a pool endpoint with failover."""
+
+    def __init__(self, pool: EndpointPool, path: str, is_async: bool):
+        self._pool = pool
+        self._path = path
+        self._is_async = is_async
+
+    def _method(self, endpoint: Endpoint):
+        client = endpoint.client(self._is_async)
+        return functools.reduce(getattr, self._path.split("."), client)
+
+    @staticmethod
+    def _kwargs(endpoint: Endpoint, kwargs: dict) -> dict:
+        model = kwargs.get("model")
+        if model in endpoint.models:
+            return {**kwargs, "model": endpoint.models[model]}
+        return kwargs
+
+    def __call__(self, **kwargs):
+        tried = set()
+        while True:
+            endpoint = self._pool.acquire(tried, kwargs.get("model"))
+            tried.add(endpoint.name)
+            annotate(endpoint=endpoint.name)
+            start = time.perf_counter()
+            try:
+                response = self._method(endpoint)(**self._kwargs(endpoint, kwargs))
+            except Exception as e:
+                self._pool.fail(endpoint, e)
+                if not is_endpoint_failure(e) or len(tried) == len(
+                    self._pool.endpoints
+                ):
+                    raise
+                continue
+            except BaseException:  # e.g. asyncio.CancelledError
+                self._pool.abandon(endpoint)
+                raise
+            self._pool.release(endpoint, time.perf_counter() - start, response)
+            return response
+
+
+class _AsyncPooledEndpoint(_PooledEndpoint):
+    async def __call__(self, **kwargs):
+        tried = set()
+        while True:
+            endpoint = self._pool.acquire(tried, kwargs.get("model"))
+            tried.add(endpoint.name)
+            annotate(endpoint=endpoint.name)
+            start = time.perf_counter()
+            try:
+                response = await self._method(endpoint)(
+                    **self._kwargs(endpoint, kwargs)
+                )
+            except Exception as e:
+                self._pool.fail(endpoint, e)
+                if not is_endpoint_failure(e) or len(tried) == len(
+                    self._pool.endpoints
+                ):
+                    raise
+                continue
+            except BaseException:  # e.g. asyncio.CancelledError
+                self._pool.abandon(endpoint)
+                raise
+            self._pool.release(endpoint, time.perf_counter() - start, response)
+            return response
+
+
+class PooledClient:
+    """
+    Exposes ``chat.completions.create`` and ``beta.chat.completions.parse``
+    over an ``EndpointPool``; ``close`` closes every endpoint's client.
+    """
+
+    def __init__(self, pool: EndpointPool, is_async: bool):
+        self._pool = pool
+        self.is_async = is_async
+        endpoint = _AsyncPooledEndpoint if is_async else _PooledEndpoint
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(
+                create=endpoint(pool, "chat.completions.create", is_async)
+            )
+        )
+        self.beta = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(
+                    parse=endpoint(pool, "beta.chat.completions.parse", is_async)
+                )
+            )
+        )
+
+    def close(self):
+        clients = [e.client(self.is_async) for e in self._pool.endpoints]
+        if not self.is_async:
+            for client in clients:
+                client.close()
+            return None
+
+        async def close_all():
+            for client in clients:
+                await client.close()
+
+        return close_all()
@@ -0,0 +1,321 @@
+"""
+Offline gene index built from NCBI ``gene_info`` dumps.
+
+Build an index once (the input may be gzipped, and can be restricted to
+some organisms):
+
+    python -m src.gene_index gene_info.gz --output data/gene_index.sqlite --tax-id 9606
+
+Then point ``GENE_INDEX_PATH`` at it. ``esearch_ncbi`` and ``esummary_ncbi``
+calls against the ``gene`` database are answered from the index in the same
+JSON shape as the live E-utilities, and fall back to NCBI when the index
+cannot answer.
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sqlite3
+import threading
+
+GENE_INFO_COLUMNS = [
+    "tax_id",
+    "gene_id",
+    "symbol",
+    "locus_tag",
+    "synonyms",
+    "dbxrefs",
+    "chromosome",
+    "map_location",
+    "description",
+    "type_of_gene",
+    "nomenclature_symbol",
+    "nomenclature_name",
+    "nomenclature_status",
+    "other_designations",
+]
+
+# Organisms that appear in GeneTuring/GeneHop, as NCBI esummary reports them
+ORGANISMS = {
+    9606: ("Homo sapiens", "human"),
+    10090: ("Mus musculus", "house mouse"),
+    10116: ("Rattus norvegicus", "Norway rat"),
+    7955: ("Danio rerio", "zebrafish"),
+    6239: ("Caenorhabditis elegans", ""),
+    9031: ("Gallus gallus", "chicken"),
+    7227: ("Drosophila melanogaster", "fruit fly"),
+    559292: ("Saccharomyces cerevisiae S288C", "baker's yeast"),
+}
+ORGANISM_TAX_IDS = {
+    name.lower(): tax_id
+    for tax_id, names in ORGANISMS.items()
+    for name in names + (names[0].split(" S288C")[0],)
+    if name
+}
+ORGANISM_TAX_IDS.update({"mouse": 10090, "rat": 10116, "yeast": 559292})
+
+# Search fields we can answer; anything else falls back to NCBI
+SYMBOL_FIELDS = {"sym", "symbol", "gene name", "preferred symbol", "gene"}
+ORGANISM_FIELDS = {"orgn", "organism"}
+UID_FIELDS = {"uid", "gene id", "geneid"}
+
+# Match kinds, best first
+KIND_RANK = {"gene_id": 0, "symbol": 1, "ensembl": 1, "alias": 2}
+
+_CLAUSE = re.compile(r'^"?(?P<value>[^"\[\]]+?)"?\s*(?:\[(?P<field>[^\]]+)\])?$')
+
+
+def _field(value: str) -> str:
+    return "" if value == "-" else value
+
+
+def _open_gene_info(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _terms(row: dict) -> list[tuple[str, str]]:
+    terms = [(row["gene_id"], "gene_id"), (row["symbol"].lower(), "symbol")]
+    if row["nomenclature_symbol"]:
+        terms.append((row["nomenclature_symbol"].lower(), "symbol"))
+    for synonym in row["synonyms"].split("|"):
+        if synonym:
+            terms.append((synonym.lower(), "alias"))
+    for xref in row["dbxrefs"].split("|"):
+        if xref.startswith("Ensembl:"):
+            terms.append((xref.split(":", 1)[1].lower(), "ensembl"))
+    return list(dict.fromkeys(terms))
+
+
+def build_gene_index(
+    gene_info_paths: list[str], db_path: str, tax_ids: set[int] | None = None
+) -> int:
+    """
+    Build (or rebuild) the SQLite gene index at ``db_path`` from one or more
+    ``gene_info`` files. Returns the number of genes indexed.
+    """
+    dir_name = os.path.dirname(db_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE genes (gene_id INTEGER PRIMARY KEY, tax_id INTEGER, "
+        + ", ".join(f"{c} TEXT" for c in GENE_INFO_COLUMNS[2:])
+        + ")"
+    )
+    conn.execute("CREATE TABLE gene_terms (term TEXT, kind TEXT, gene_id INTEGER)")
+
+    count = 0
+    genes, terms = [], []
+    for path in gene_info_paths:
+        with _open_gene_info(path) as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                values = line.rstrip("\n").split("\t")
+                row = {
+                    c: _field(v)
+                    for c, v in zip(GENE_INFO_COLUMNS, values, strict=False)
+                }
+                if tax_ids and int(row["tax_id"]) not in tax_ids:
+                    continue
+                genes.append(tuple(row.get(c, "") for c in GENE_INFO_COLUMNS))
+                terms.extend((t, k, int(row["gene_id"])) for t, k in _terms(row))
+                count += 1
+                if len(genes) >= 10_000:
+                    _flush(conn, genes, terms)
+    _flush(conn, genes, terms)
+    conn.execute("CREATE INDEX gene_terms_term ON gene_terms(term)")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return count
+
+
+def _flush(conn: sqlite3.Connection, genes: list, terms: list) -> None:
+    placeholders = ", ".join("?" for _ in GENE_INFO_COLUMNS)
+    conn.executemany(
+        "INSERT OR REPLACE INTO genes (tax_id, gene_id, "
+        + ", ".join(GENE_INFO_COLUMNS[2:])
+        + f") VALUES ({placeholders})",
+        genes,
+    )
+    conn.executemany("INSERT INTO gene_terms VALUES (?, ?, ?)", terms)
+    genes.clear()
+    terms.clear()
+
+
+def parse_search_term(term: str) -> tuple[str, set[str], int | None] | None:
+    """
+    Parse simple Entrez queries such as ``TP53``, ``LMP10[sym]`` or
+    ``PFKL AND human[orgn]`` into (value, allowed kinds, tax id). Returns
+    None for anything the index cannot answer exactly (OR, NOT, other fields).
+    """
+    value, kinds, tax_id = None, set(KIND_RANK), None
+    for clause in re.split(r"\s+AND\s+", term.strip()):
+        match = _CLAUSE.match(clause.strip())
+        if not match or re.search(r"\b(OR|NOT)\b|[()]", clause):
+            return None
+        field = (match.group("field") or "").strip().lower()
+        clause_value = match.group("value").strip()
+        if field in ORGANISM_FIELDS:
+            name = clause_value.lower()
+            tax_id = int(name) if name.isdigit() else ORGANISM_TAX_IDS.get(name)
+            if tax_id is None:
+                return None
+        elif value is not None:
+            return None
+        elif field in ("", "all fields"):
+            value = clause_value
+        elif field in SYMBOL_FIELDS:
+            value, kinds = clause_value, {"symbol"}
+        elif field in UID_FIELDS:
+            value, kinds = clause_value, {"gene_id"}
+        else:
+            return None
+    if value is None:
+        return None
+    return value.lower(), kinds, tax_id
+
+
+class GeneIndex:
+    """Read-only, thread-safe access to a gene index built by ``build_gene_index``."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.lookups = 0
+        self.hits = 0
+
+    @property
+    def available(self) -> bool:
+        return bool(self.path) and os.path.exists(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.row_factory = sqlite3.Row
+            self._conn = conn
+        return self._conn
+
+    def search(self, term: str, retmax: int) -> list[str] | None:
+        """Return gene IDs for ``term``, best match first, or None if unsupported."""
+        parsed = parse_search_term(term)
+        if parsed is None:
+            return None
+        value, kinds, tax_id = parsed
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT t.gene_id, t.kind, g.tax_id FROM gene_terms t "
+                    "JOIN genes g ON g.gene_id = t.gene_id WHERE t.term = ?",
+                    (value,),
+                )
+                .fetchall()
+            )
+            self.lookups += 1
+        best: dict[int, tuple] = {}
+        for row in rows:
+            if row["kind"] not in kinds or (tax_id and row["tax_id"] != tax_id):
+                continue
+            rank = (KIND_RANK[row["kind"]], row["tax_id"] != 9606, row["gene_id"])
+            best[row["gene_id"]] = min(best.get(row["gene_id"], rank), rank)
+        ranked = sorted(best, key=best.get)[:retmax]
+        if ranked:
+            with self._lock:
+                self.hits += 1
+        return [str(gene_id) for gene_id in ranked]
+
+    def summaries(self, uids: list[str]) -> dict | None:
+        """
+        Return esummary-format data (``{"result": {...}}``) for ``uids``, or
+        None if any of them is not in the index.
+        """
+        if not all(str(uid).isdigit() for uid in uids):
+            return None
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    f"SELECT * FROM genes WHERE gene_id IN ({', '.join('?' for _ in uids)})",
+                    [int(uid) for uid in uids],
+                )
+                .fetchall()
+            )
+            self.lookups += 1
+        by_id = {str(row["gene_id"]): row for row in rows}
+        if any(str(uid) not in by_id for uid in uids):
+            return None
+        result = {"uids": [str(uid) for uid in uids]}
+        for uid in result["uids"]:
+            result[uid] = gene_summary(by_id[uid])
+        with self._lock:
+            self.hits += 1
+        return {"result": result}
+
+    def stats(self, prefix: str = "gene_index") -> dict:
+        with self._lock:
+            return {f"{prefix}_lookups": self.lookups, f"{prefix}_hits": self.hits}
+
+
+def gene_summary(row) -> dict:
+    """Render an index row like an NCBI esummary document for the gene database."""
+    tax_id = row["tax_id"]
+    scientific_name, common_name = ORGANISMS.get(tax_id, ("", ""))
+    xrefs = row["dbxrefs"].split("|") if row["dbxrefs"] else []
+    return {
+        "uid": str(row["gene_id"]),
+        "name": row["symbol"],
+        "description": row["description"],
+        "status": "",
+        "chromosome": row["chromosome"],
+        "geneticsource": "genomic",
+        "maplocation": row["map_location"],
+        "otheraliases": ", ".join(s for s in row["synonyms"].split("|") if s),
+        "otherdesignations": row["other_designations"],
+        "nomenclaturesymbol": row["nomenclature_symbol"],
+        "nomenclaturename": row["nomenclature_name"],
+        "nomenclaturestatus": ("Official" if row["nomenclature_status"] == "O" else ""),
+        "mim": [x.split(":", 1)[1] for x in xrefs if x.startswith("MIM:")],
+        "organism": {
+            "scientificname": scientific_name,
+            "commonname": common_name,
+            "taxid": tax_id,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build an offline gene index from NCBI gene_info files."
+    )
+    parser.add_argument(
+        "gene_info", nargs="+", help="gene_info file(s), optionally .gz"
+    )
+    parser.add_argument(
+        "--output", default="data/gene_index.sqlite", help="Path of the index to write"
+    )
+    parser.add_argument(
+        "--tax-id",
+        type=int,
+        action="append",
+        help="Only index genes from this taxonomy ID (repeatable, e.g. 9606)",
+    )
+    args = parser.parse_args()
+    count = build_gene_index(
+        args.gene_info, args.output, set(args.tax_id) if args.tax_id else None
+    )
+    print(f"Indexed {count} genes into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
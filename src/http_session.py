@@ -0,0 +1,126 @@
+"""This module contains the pooled keep-alive HTTP session shared by all tools."""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "genegpt-tool-use/0.1",
+}
+
+
+class PooledSession:
+    """
+    Thread-safe wrapper around a single ``requests.Session``.
+
+    Connections are kept alive and reused per host, so repeated NCBI calls
+    skip the TCP and TLS handshakes. The pool is sized to the number of worker
+    threads; extra concurrent requests open short-lived connections rather
+    than blocking. Per-host request counts, bytes, latency and the number of
+    connections actually opened are tracked for reporting.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, float]] = {}
+        self._origins: dict[str, str] = {}
+        self.pool_size = pool_size
+        self._session = self._build_session(pool_size)
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session
+
+    def configure(self, pool_size: int) -> None:
+        """Resize the connection pool, e.g. to match ``MAX_WORKERS``."""
+        with self._lock:
+            if pool_size == self.pool_size:
+                return
+            old_session = self._session
+            self._session = self._build_session(pool_size)
+            self.pool_size = pool_size
+        old_session.close()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the shared pool and record per-host stats.
+        The body of a ``stream=True`` response is left for the caller to read,
+        so its size is taken from the Content-Length header.
+        """
+        parts = urlsplit(url)
+        host = parts.netloc
+        self._origins.setdefault(host, f"{parts.scheme}://{host}")
+        start = time.perf_counter()
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(host, time.perf_counter() - start, 0, error=True)
+            raise
+        if kwargs.get("stream"):
+            nbytes = int(response.headers.get("Content-Length") or 0)
+        else:
+            nbytes = len(response.content)
+        self._record(
+            host,
+            time.perf_counter() - start,
+            nbytes,
+            error=response.status_code >= 400,
+        )
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, host: str, seconds: float, nbytes: int, error: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                host, {"requests": 0, "errors": 0, "bytes": 0, "seconds": 0.0}
+            )
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["bytes"] += nbytes
+            stats["seconds"] += seconds
+
+    def _connections_opened(self, host: str) -> int:
+        """Number of connections the pool has opened for ``host``."""
+        parts = urlsplit(self._origins[host])
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        poolmanager = self._session.get_adapter(self._origins[host]).poolmanager
+        opened = 0
+        for key in poolmanager.pools.keys():
+            if key.key_host == parts.hostname and key.key_port == port:
+                pool = poolmanager.pools.get(key)
+                opened += getattr(pool, "num_connections", 0) if pool else 0
+        return opened
+
+    def stats(self, prefix: str = "http") -> dict:
+        """Return per-host pool stats as a flat dict for MLflow."""
+        with self._lock:
+            snapshot = {host: dict(s) for host, s in self._stats.items()}
+        stats = {f"{prefix}_pool_size": self.pool_size}
+        for host, s in snapshot.items():
+            stats[f"{prefix}_{host}_requests"] = s["requests"]
+            stats[f"{prefix}_{host}_errors"] = s["errors"]
+            stats[f"{prefix}_{host}_bytes"] = s["bytes"]
+            stats[f"{prefix}_{host}_avg_latency"] = s["seconds"] / s["requests"]
+            stats[f"{prefix}_{host}_connections_opened"] = self._connections_opened(
+                host
+            )
+        return stats
+
+
+http_session = PooledSession()
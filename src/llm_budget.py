@@ -0,0 +1,424 @@
+"""
+Tokens- and requests-per-minute pacing for LLM deployments.
+
+Every chat completion first reserves its estimated tokens (prompt, counted
+with tiktoken, or as characters / 4 if its encoding cannot be loaded, plus
+the expected completion) in a rolling ``WINDOW_SECONDS`` window for its
+deployment, and is dispatched when the window has room under ``headroom``
+times that window's share of the deployment's TPM and RPM quota. Once the
+response arrives the reservation is corrected to the reported usage. A 429 that still gets through pauses the
+deployment's window for the server's Retry-After and the request is paced
+again, instead of every worker sleeping a fixed delay and retrying at once.
+"""
+
+import asyncio
+import collections
+import functools
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from .llm_cache import is_async_client
+from .rate_limit import parse_retry_after
+from .tracing import add_to_span
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to characters / 4
+    tiktoken = None
+
+# Azure evaluates per-minute quotas over short intervals, so the window is
+# shorter than a minute and holds a proportional share of the quota
+WINDOW_SECONDS = 10.0
+# Per-message framing tokens, as in OpenAI's token counting guide
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_PRIMING_TOKENS = 3
+CHARS_PER_TOKEN = 4
+MAX_THROTTLE_RETRIES = 3
+DEFAULT_THROTTLE_BACKOFF = 5.0  # Seconds, used when a 429 has no Retry-After
+
+
+@functools.lru_cache(maxsize=None)
+def _log_fallback(reason: str) -> None:
+    """Say once per reason that prompt tokens are estimated from characters."""
+    print(f"LLM budget: {reason}; estimating prompt tokens as characters / 4")
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str):
+    if tiktoken is None:
+        _log_fallback("tiktoken is not installed")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # e.g. the BPE file cannot be downloaded
+        _log_fallback(f"tiktoken encoding unavailable ({type(e).__name__})")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_prompt_tokens(model: str, messages: list, tools=None) -> int:
+    """Estimate the prompt tokens of a chat completion request."""
+    tokens = REPLY_PRIMING_TOKENS
+    for message in messages:
+        if not isinstance(message, dict):  # e.g. an SDK message object
+            message = message.model_dump(exclude_none=True)
+        tokens += MESSAGE_OVERHEAD_TOKENS
+        for value in message.values():
+            if value is None:
+                continue
+            text = value if isinstance(value, str) else json.dumps(value)
+            tokens += count_tokens(text, model)
+    if tools:
+        tokens += count_tokens(json.dumps(tools), model)
+    return tokens
+
+
+class RollingBudget:
+    """
+    Rolling window of dispatched requests and their tokens for one deployment.
+
+    ``reserve`` books a request at the earliest time the window (including
+    requests already booked for later) has room for it, and returns how long
+    the caller must wait. Requests are booked in arrival order.
+    """
+
+    def __init__(
+        self,
+        tpm: float,
+        rpm: float,
+        headroom: float = 0.9,
+        window_seconds: float = WINDOW_SECONDS,
+    ):
+        self.tpm = tpm
+        self.rpm = rpm
+        self.headroom = headroom
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._entries: collections.deque[list] = collections.deque()
+        self._paused_until = 0.0
+        self._requests = 0
+        self._estimated_tokens = 0
+        self._actual_tokens = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._throttled = 0
+
+    def _limits(self) -> tuple[float, float]:
+        share = self.headroom * self.window_seconds / 60
+        return self.tpm * share, self.rpm * share
+
+    def _dispatch_time(self, tokens: int, now: float) -> float:
+        """Earliest time a request of ``tokens`` fits the window; call locked."""
+        while self._entries and self._entries[0][0] <= now - self.window_seconds:
+            self._entries.popleft()
+        token_limit, request_limit = self._limits()
+        at = max(now, self._paused_until)
+        if self._entries:
+            at = max(at, self._entries[-1][0])
+        in_window = [e for e in self._entries if e[0] > at - self.window_seconds]
+        used, count = sum(e[1] for e in in_window), len(in_window)
+        # Wait for the oldest bookings to leave the window until this one fits
+        for oldest in in_window:
+            if used + tokens <= token_limit and count < request_limit:
+                break
+            at = max(at, oldest[0] + self.window_seconds)
+            used -= oldest[1]
+            count -= 1
+        return at
+
+    def delay(self, tokens: int = 1) -> float:
+        """Seconds a request of ``tokens`` would wait, without booking it."""
+        with self._lock:
+            now = time.monotonic()
+            return self._dispatch_time(tokens, now) - now
+
+    def reserve(self, tokens: int) -> tuple[list, float]:
+        """Book ``tokens``; return the booking and the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            at = self._dispatch_time(tokens, now)
+            entry = [at, tokens]
+            self._entries.append(entry)
+            # A request bigger than a window's share goes out on an empty window,
+            # which then stays closed until the quota has paid for all of it
+            token_limit, request_limit = self._limits()
+            overshoot = max(tokens / token_limit, 1 / request_limit)
+            if overshoot > 1:
+                self._paused_until = max(
+                    self._paused_until, at + self.window_seconds * overshoot
+                )
+            wait = at - now
+            self._requests += 1
+            self._estimated_tokens += tokens
+            self._wait_seconds += wait
+            self._max_wait_seconds = max(self._max_wait_seconds, wait)
+            return entry, wait
+
+    def settle(self, entry: list, tokens: int) -> None:
+        """Replace a booking's estimate with the tokens the response reported."""
+        with self._lock:
+            entry[1] = tokens
+            self._actual_tokens += tokens
+
+    def release(self, entry: list) -> None:
+        """Drop the tokens of a booking whose request failed, e.g. with a 429."""
+        with self._lock:
+            entry[1] = 0
+
+    def pause(self, seconds: float) -> None:
+        """Dispatch nothing for ``seconds``, e.g. after an HTTP 429."""
+        with self._lock:
+            self._throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self, prefix: str) -> dict:
+        with self._lock:
+            return {
+                f"{prefix}_requests": self._requests,
+                f"{prefix}_estimated_tokens": self._estimated_tokens,
+                f"{prefix}_actual_tokens": self._actual_tokens,
+                f"{prefix}_wait_seconds": self._wait_seconds,
+                f"{prefix}_max_wait_seconds": self._max_wait_seconds,
+                f"{prefix}_throttled": self._throttled,
+            }
+
+
+def retry_after_seconds(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):  # Azure OpenAI
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_retry_after(headers.get("retry-after"), DEFAULT_THROTTLE_BACKOFF)
+
+
+def _metric_name(model: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in model)
+
+
+class LLMBudgets:
+    """
+    One ``RollingBudget`` per deployment with a configured quota. Clients are
+    wrapped by ``wrap``; deployments without a quota, and all of them when
+    none is configured, are not paced.
+
+    A client of one endpoint of an ``EndpointPool`` is wrapped with that
+    endpoint's spec, so each endpoint's deployment of a model gets its own
+    budget. Its quota is the endpoint's own ``rate_limits`` entry, or else the
+    ``rate_limits`` entry, for the deployment name or the model it serves.
+    """
+
+    def __init__(self):
+        self.headroom = 0.9
+        self.expected_completion_tokens = 0
+        self.rate_limits: dict[str, dict] = {}
+        self.budgets: dict[str, RollingBudget] = {}
+        self._lock = threading.Lock()
+        self._endpoint_budgets: dict[tuple[str, str], RollingBudget | None] = {}
+
+    def configure(
+        self,
+        rate_limits: dict | None,
+        headroom: float = 0.9,
+        expected_completion_tokens: int = 0,
+    ) -> None:
+        """``rate_limits`` maps a model to ``{"tpm": ..., "rpm": ...}``."""
+        self.headroom = headroom
+        self.expected_completion_tokens = expected_completion_tokens
+        self.rate_limits = dict(rate_limits or {})
+        self.budgets = {
+            model: self._new_budget(limits)
+            for model, limits in self.rate_limits.items()
+        }
+        with self._lock:
+            self._endpoint_budgets = {}
+
+    def _new_budget(self, limits: dict) -> RollingBudget:
+        return RollingBudget(
+            limits.get("tpm", float("inf")),
+            limits.get("rpm", float("inf")),
+            self.headroom,
+        )
+
+    def _endpoint_limits(self, deployment: str, endpoint: dict) -> dict | None:
+        served = {name: model for model, name in endpoint.get("models", {}).items()}
+        for rate_limits in (endpoint.get("rate_limits") or {}, self.rate_limits):
+            for name in (deployment, served.get(deployment)):
+                if name in rate_limits:
+                    return rate_limits[name]
+        return None
+
+    def budget(self, model: str, endpoint: dict | None = None) -> RollingBudget | None:
+        """
+        The budget requests for ``model`` are paced by: the one shared by
+        every client, or that of ``endpoint``'s deployment named ``model``.
+        """
+        if endpoint is None:
+            return self.budgets.get(model)
+        key = (endpoint["name"], model)
+        with self._lock:
+            if key not in self._endpoint_budgets:
+                limits = self._endpoint_limits(model, endpoint)
+                self._endpoint_budgets[key] = (
+                    self._new_budget(limits) if limits is not None else None
+                )
+            return self._endpoint_budgets[key]
+
+    def delay(self, model: str, endpoint: dict | None = None) -> float:
+        """Seconds until ``model``'s window has room for another request."""
+        budget = self.budget(model, endpoint)
+        return budget.delay() if budget is not None else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.budgets)
+
+    def wrap(self, client, endpoint: dict | None = None):
+        """
+        Wrap a sync or async OpenAI client, unless no quota is configured.
+        The client of a pool ``endpoint`` is paced per endpoint, and its 429s
+        are left to the pool to fail over instead of being retried here.
+        """
+        if not (self.enabled or endpoint and endpoint.get("rate_limits")):
+            return client
+        return PacedClient(client, self, endpoint)
+
+    def stats(self, prefix: str = "llm_budget") -> dict:
+        stats = {}
+        for model, budget in self.budgets.items():
+            stats.update(budget.stats(f"{prefix}_{_metric_name(model)}"))
+        with self._lock:
+            endpoint_budgets = dict(self._endpoint_budgets)
+        for (name, model), budget in endpoint_budgets.items():
+            if budget is not None:
+                stats.update(
+                    budget.stats(f"{prefix}_{_metric_name(name)}_{_metric_name(model)}")
+                )
+        return stats
+
+
+class _PacedEndpoint:
+    """One completions method of the wrapped client, paced by its deployment."""
+
+    def __init__(
+        self, client, path: str, budgets: LLMBudgets, endpoint: dict | None = None
+    ):
+        self._client = client
+        self._path = path
+        self._budgets = budgets
+        self._endpoint = endpoint
+        # A pool fails over on a 429 rather than retrying the same endpoint
+        self._max_retries = MAX_THROTTLE_RETRIES if endpoint is None else 0
+
+    def _method(self):
+        return functools.reduce(getattr, self._path.split("."), self._client)
+
+    def _reserve(self, kwargs: dict):
+        budget = self._budgets.budget(kwargs.get("model"), self._endpoint)
+        if budget is None:
+            return None, None, 0.0
+        tokens = (
+            estimate_prompt_tokens(
+                kwargs["model"], kwargs.get("messages", []), kwargs.get("tools")
+            )
+            + self._budgets.expected_completion_tokens
+        )
+        entry, wait = budget.reserve(tokens)
+        add_to_span("budget_wait_seconds", wait)
+        return budget, entry, wait
+
+    @staticmethod
+    def _settle(budget, entry, response) -> None:
+        usage = getattr(response, "usage", None)
+        if budget is not None and usage is not None:
+            budget.settle(entry, usage.total_tokens)
+
+    def __call__(self, **kwargs):
+        for attempt in range(self._max_retries + 1):
+            budget, entry, wait = self._reserve(kwargs)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = self._method()(**kwargs)
+            except Exception as e:
+                if budget is not None:
+                    budget.release(entry)
+                if (
+                    budget is None
+                    or getattr(e, "status_code", None) != 429
+                    or attempt == self._max_retries
+                ):
+                    if budget is not None and getattr(e, "status_code", None) == 429:
+                        budget.pause(retry_after_seconds(e))
+                    raise
+                budget.pause(retry_after_seconds(e))
+                continue
+            self._settle(budget, entry, response)
+            return response
+
+
+class _AsyncPacedEndpoint(_PacedEndpoint):
+    async def __call__(self, **kwargs):
+        for attempt in range(self._max_retries + 1):
+            budget, entry, wait = self._reserve(kwargs)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await self._method()(**kwargs)
+            except Exception as e:
+                if budget is not None:
+                    budget.release(entry)
+                if (
+                    budget is None
+                    or getattr(e, "status_code", None) != 429
+                    or attempt == self._max_retries
+                ):
+                    if budget is not None and getattr(e, "status_code", None) == 429:
+                        budget.pause(retry_after_seconds(e))
+                    raise
+                budget.pause(retry_after_seconds(e))
+                continue
+            self._settle(budget, entry, response)
+            return response
+
+
+class PacedClient:
+    """
+    Exposes ``chat.completions.create`` and ``beta.chat.completions.parse``
+    of ``client`` through ``LLMBudgets``; everything else is forwarded.
+    """
+
+    def __init__(self, client, budgets: LLMBudgets, endpoint: dict | None = None):
+        self._client = client
+        self.is_async = is_async_client(client)
+        paced = _AsyncPacedEndpoint if self.is_async else _PacedEndpoint
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(
+                create=paced(client, "chat.completions.create", budgets, endpoint)
+            )
+        )
+        self.beta = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(
+                    parse=paced(
+                        client, "beta.chat.completions.parse", budgets, endpoint
+                    )
+                )
+            )
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -0,0 +1,178 @@
+"""This module contains the record/replay cache for LLM chat completions."""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import threading
+from types import SimpleNamespace
+
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion, ParsedChatCompletion
+from pydantic import BaseModel
+
+from .cache import ToolCache
+
+LLM_CACHE_MODES = ("passthrough", "record", "replay")
+
+
+def is_async_client(client) -> bool:
+    """Whether ``client``, or the client a wrapper forwards to, is async."""
+    is_async = getattr(client, "is_async", None)
+    if isinstance(is_async, bool):
+        return is_async
+    return isinstance(client, AsyncOpenAI) or inspect.iscoroutinefunction(
+        client.chat.completions.create
+    )
+
+
+class LLMReplayMiss(Exception):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def completion_key(endpoint: str, kwargs: dict) -> str:
+    """
+    Hash of the endpoint and every request parameter (model, messages, tools,
+    tool_choice, response_format, ...). Unlike tool keys, nothing is
+    normalized: any change to the prompt is a different request.
+    """
+    params = {
+        name: (
+            value.model_json_schema()
+            if isinstance(value, type) and issubclass(value, BaseModel)
+            else value
+        )
+        for name, value in kwargs.items()
+    }
+    payload = json.dumps(
+        [endpoint, params], sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Stores chat completions on disk keyed on ``completion_key``.
+
+    ``record`` answers recorded requests from disk and records new ones,
+    ``replay`` answers only from disk and raises ``LLMReplayMiss`` otherwise,
+    and ``passthrough`` leaves clients unwrapped.
+    """
+
+    def __init__(self, path: str, mode: str = "passthrough"):
+        self.store = ToolCache(path, ttl_seconds=0, max_entries=1_000_000)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._replay_misses = 0
+        self._recorded = 0
+
+    def configure(self, mode: str | None = None, path: str | None = None) -> None:
+        if mode is not None:
+            if mode not in LLM_CACHE_MODES:
+                raise ValueError(f"Invalid LLM cache mode: {mode}")
+            self.mode = mode
+        if path is not None and path != self.store.path:
+            self.store.close()
+            self.store = ToolCache(path, ttl_seconds=0, max_entries=1_000_000)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "passthrough" and self.store.enabled
+
+    def lookup(self, endpoint: str, key: str, response_format=None):
+        """Return the recorded completion, or None if it should be requested."""
+        value = self.store.get(key, namespace=endpoint)
+        if value is not None:
+            if response_format is not None:
+                return ParsedChatCompletion[response_format].model_validate_json(value)
+            return ChatCompletion.model_validate_json(value)
+        if self.mode == "replay":
+            with self._lock:
+                self._replay_misses += 1
+            raise LLMReplayMiss(f"No recorded {endpoint} completion for key {key}")
+        return None
+
+    def record(self, endpoint: str, key: str, response) -> None:
+        self.store.set(key, response.model_dump_json(), namespace=endpoint)
+        with self._lock:
+            self._recorded += 1
+
+    def wrap(self, client):
+        """Wrap a sync or async OpenAI client, unless in passthrough mode."""
+        if not self.enabled:
+            return client
+        return RecordReplayClient(client, self)
+
+    def stats(self, prefix: str = "llm_cache") -> dict:
+        stats = self.store.stats(prefix)
+        with self._lock:
+            stats[f"{prefix}_recorded"] = self._recorded
+            stats[f"{prefix}_replay_misses"] = self._replay_misses
+        return stats
+
+
+class _Endpoint:
+    """One completions method of the wrapped client, served through the cache."""
+
+    def __init__(self, client, path: str, cache: LLMCache):
+        self._client = client
+        self._path = path
+        self._cache = cache
+        self._endpoint = path.replace(".", "_")
+
+    def _method(self):
+        # Resolved per call, so clients without e.g. ``beta`` can still be wrapped
+        return functools.reduce(getattr, self._path.split("."), self._client)
+
+    def __call__(self, **kwargs):
+        key = completion_key(self._endpoint, kwargs)
+        cached = self._cache.lookup(self._endpoint, key, kwargs.get("response_format"))
+        if cached is not None:
+            return cached
+        response = self._method()(**kwargs)
+        self._cache.record(self._endpoint, key, response)
+        return response
+
+
+class _AsyncEndpoint(_Endpoint):
+    """Reads and writes the SQLite store off the event loop."""
+
+    async def __call__(self, **kwargs):
+        key = completion_key(self._endpoint, kwargs)
+        cached = await asyncio.to_thread(
+            self._cache.lookup, self._endpoint, key, kwargs.get("response_format")
+        )
+        if cached is not None:
+            return cached
+        response = await self._method()(**kwargs)
+        await asyncio.to_thread(self._cache.record, self._endpoint, key, response)
+        return response
+
+
+class RecordReplayClient:
+    """
+    Exposes ``chat.completions.create`` and ``beta.chat.completions.parse``
+    of ``client`` through an ``LLMCache``; everything else (``close``, ...)
+    is forwarded to the client.
+    """
+
+    def __init__(self, client, cache: LLMCache):
+        self._client = client
+        self.is_async = is_async_client(client)
+        endpoint = _AsyncEndpoint if self.is_async else _Endpoint
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(
+                create=endpoint(client, "chat.completions.create", cache)
+            )
+        )
+        self.beta = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(
+                    parse=endpoint(client, "beta.chat.completions.parse", cache)
+                )
+            )
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
@@ -1,31 +1,147 @@
+import concurrent.futures
+import contextvars
+import functools
 import json
 import os
 import re
+import threading
 import time
 
-from openai import AzureOpenAI, OpenAI
+from openai import (
+    DEFAULT_MAX_RETRIES,
+    AsyncAzureOpenAI,
+    AsyncOpenAI,
+    AzureOpenAI,
+    OpenAI,
+)
+
+from .adaptive import AdaptiveLimit
+from .cache import make_cache_key
+from .checkpoints import (
+    ConversationCheckpoints,
+    resume_blast_jobs,
+    tool_call_from_dict,
+)
+from .endpoint_pool import EndpointPool
+from .llm_budget import LLMBudgets
+from .llm_cache import LLMCache, LLMReplayMiss
 from .models import ResponseSchema
 from .prompts import FEW_SHOT_PROMPT, SYSTEM_PROMPT, TOOL_USE_SYSTEM_PROMPT
+from .single_flight import SingleFlight
 from .tools import AVAILABLE_FUNCTIONS, get_tools_definition
+from .tracing import annotate, llm_usage, tracer
 
+# Identical tool calls in flight at the same time share one execution
+tool_single_flight = SingleFlight()
 
-def get_client(provider: str):
-    """Get a client for a given provider and model."""
+# Record/replay cache for chat completions: "passthrough", "record" or "replay"
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "passthrough")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+llm_cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MODE)
+
+# TPM/RPM pacing per deployment, configured from LLM_RATE_LIMITS in config.yaml
+llm_budgets = LLMBudgets()
+
+DEFAULT_TOOL_WORKERS = 10
+DEFAULT_CONVERSATION_LIMIT = 10
+
+# Conversations in flight; adapts to LLM latency, 429s and errors when
+# configured to (see ADAPTIVE_CONCURRENCY in config.yaml)
+conversation_limit = AdaptiveLimit("conversations", DEFAULT_CONVERSATION_LIMIT)
+
+
+PROVIDERS = ("azure", "ollama")
+DEFAULT_ENDPOINT_ENV = {
+    "azure": ("AZURE_OPENAI_API_ENDPOINT", "AZURE_OPENAI_API_KEY"),
+    "ollama": ("OLLAMA_API_ENDPOINT", "OLLAMA_API_KEY"),
+}
+
+# Per-provider load balancing over the endpoints in LLM_ENDPOINTS (config.yaml);
+# a provider without endpoints uses the one endpoint in the environment
+llm_endpoints = {provider: EndpointPool() for provider in PROVIDERS}
+
+
+def make_client(
+    provider: str,
+    spec: dict,
+    is_async: bool = False,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+):
+    """
+    Build the OpenAI client of one endpoint. ``spec`` may give the
+    ``endpoint`` URL or the ``endpoint_env`` variable holding it, the
+    ``api_key_env`` variable and, for Azure, the ``api_version``; unset
+    values come from the provider's usual environment variables.
+    ``max_retries`` are the SDK's own retries of 429s and 5xx errors.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Invalid provider: {provider}")
+    endpoint_env, api_key_env = DEFAULT_ENDPOINT_ENV[provider]
+    endpoint = spec.get("endpoint") or os.getenv(spec.get("endpoint_env", endpoint_env))
+    api_key = os.getenv(spec.get("api_key_env", api_key_env))
     if provider == "azure":
-        client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_API_ENDPOINT"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        client_class = AsyncAzureOpenAI if is_async else AzureOpenAI
+        return client_class(
+            api_key=api_key,
+            azure_endpoint=endpoint,
+            api_version=spec.get("api_version")
+            or os.getenv("AZURE_OPENAI_API_VERSION"),
+            max_retries=max_retries,
         )
-        return client
-    elif provider == "ollama":
-        client = OpenAI(
-            api_key=os.getenv("OLLAMA_API_KEY"),
-            base_url=os.getenv("OLLAMA_API_ENDPOINT"),
+    client_class = AsyncOpenAI if is_async else OpenAI
+    return client_class(api_key=api_key, base_url=endpoint, max_retries=max_retries)
+
+
+def make_endpoint_client(provider: str, spec: dict, is_async: bool = False):
+    """
+    The client of one pool endpoint, paced by its own deployments' quotas.
+    Failures must reach the pool at once to fail over, not after SDK retries.
+    """
+    return llm_budgets.wrap(make_client(provider, spec, is_async, 0), endpoint=spec)
+
+
+def endpoint_delay(spec: dict, deployment: str) -> float:
+    return llm_budgets.delay(deployment, spec)
+
+
+def configure_endpoints(
+    endpoints: dict | None, cooldown_seconds: float | None = None
+) -> None:
+    """Set up ``llm_endpoints`` from ``LLM_ENDPOINTS``: provider -> endpoint specs."""
+    for provider, pool in llm_endpoints.items():
+        pool.configure(
+            (endpoints or {}).get(provider),
+            functools.partial(make_endpoint_client, provider),
+            cooldown_seconds,
+            endpoint_delay,
         )
-        return client
-    else:
+
+
+def _base_client(provider: str, is_async: bool):
+    if provider not in PROVIDERS:
         raise ValueError(f"Invalid provider: {provider}")
+    if llm_endpoints[provider].enabled:
+        return llm_endpoints[provider].wrap(is_async)
+    # Paced requests are retried by llm_budgets after the server's Retry-After;
+    # SDK retries would sleep and resend them behind its back
+    max_retries = 0 if llm_budgets.enabled else DEFAULT_MAX_RETRIES
+    return llm_budgets.wrap(make_client(provider, {}, is_async, max_retries))
+
+
+def get_client(provider: str):
+    """
+    Get a client for a given provider and model, balanced over the
+    provider's ``llm_endpoints`` when several are configured, paced by
+    ``llm_budgets`` (per endpoint, for a pool) when a quota is configured and
+    wrapped by ``llm_cache`` unless it is in passthrough mode, so replayed
+    completions do not use the quota.
+    """
+    return llm_cache.wrap(_base_client(provider, is_async=False))
+
+
+def get_async_client(provider: str):
+    """Get an asyncio client for a given provider, used by ``--engine async``."""
+    return llm_cache.wrap(_base_client(provider, is_async=True))
 
 
 def make_messages(question: str, system_prompt: str, few_shot_prompt: str) -> list:
@@ -73,6 +189,15 @@ def validate_response_schema(content: str) -> ResponseSchema:
 
 def execute_tool_call(tool_call) -> dict:
     """Execute a single tool call and return the response message."""
+    with tracer.span(
+        "tool", tool_call.function.name, tool_call_id=tool_call.id
+    ) as span:
+        tool_response = _execute_tool_call(tool_call)
+        span["bytes"] = len(str(tool_response["content"]).encode("utf-8"))
+        return tool_response
+
+
+def _execute_tool_call(tool_call) -> dict:
     function_name = tool_call.function.name
     tool_call_id = tool_call.id
 
@@ -103,9 +228,19 @@ def execute_tool_call(tool_call) -> dict:
             "content": json.dumps({"error": f"Function '{function_name}' not found"}),
         }
 
+    executed = []
+
+    def run_tool():
+        executed.append(True)
+        return AVAILABLE_FUNCTIONS[function_name](**function_args)
+
     # Execute the function
     try:
-        function_response = AVAILABLE_FUNCTIONS[function_name](**function_args)
+        function_response = tool_single_flight.do(
+            function_name, make_cache_key(function_name, function_args), run_tool
+        )
+        if not executed:
+            annotate(cache="shared")
         print(
             f"  Tool executed. Response: {str(function_response)[:100]}..."
         )  # Ensure response is string for slicing
@@ -117,6 +252,7 @@ def execute_tool_call(tool_call) -> dict:
         }
     except Exception as e:
         print(f"  Error executing {function_name}: {e}")
+        annotate(error=str(e))
         return {
             "role": "tool",
             "tool_call_id": tool_call_id,
@@ -125,6 +261,49 @@ def execute_tool_call(tool_call) -> dict:
         }
 
 
+class ToolExecutor:
+    """
+    Bounded thread pool shared by all conversations for running the tool
+    calls of one turn concurrently. Tools still take NCBI tokens from the
+    shared rate limiter, so this only overlaps their waits.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_TOOL_WORKERS):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def configure(self, max_workers: int) -> None:
+        """Resize the pool; takes effect for the next batch of tool calls."""
+        with self._lock:
+            if self._executor is not None and max_workers != self.max_workers:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.max_workers = max_workers
+
+    def run(self, tool_calls) -> list[dict]:
+        """Execute ``tool_calls`` and return their messages in the original order."""
+        if len(tool_calls) == 1:
+            return [execute_tool_call(tool_calls[0])]
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tool"
+                )
+            # Each call runs in a copy of the caller's context, so its spans
+            # land in the trace of the question that requested it
+            futures = [
+                self._executor.submit(
+                    contextvars.copy_context().run, execute_tool_call, tool_call
+                )
+                for tool_call in tool_calls
+            ]
+        return [future.result() for future in futures]
+
+
+tool_executor = ToolExecutor()
+
+
 def format_tool_calls_for_messages(tool_calls):
     """Convert tool_calls to the format needed for messages."""
     return (
@@ -155,11 +334,14 @@ def call_llm(
     messages = make_messages(question, SYSTEM_PROMPT, FEW_SHOT_PROMPT)
     for attempt in range(max_retries):
         try:
-            response = client.beta.chat.completions.parse(
-                model=model,
-                messages=messages,
-                response_format=ResponseSchema,
-            )
+            with tracer.span("llm", model, turn=1, attempt=attempt + 1) as span:
+                with conversation_limit.observe():
+                    response = client.beta.chat.completions.parse(
+                        model=model,
+                        messages=messages,
+                        response_format=ResponseSchema,
+                    )
+                span.update(llm_usage(response))
             parsed_response = response.choices[0].message.parsed
             if isinstance(parsed_response, ResponseSchema):
                 return parsed_response
@@ -176,6 +358,8 @@ def call_llm(
                     answer=str(parsed_response),
                 )
 
+        except LLMReplayMiss:
+            raise  # Retrying cannot help; fail the question quickly
         except Exception as e:
             print(f"Error calling LLM (attempt {attempt + 1}/{max_retries}): {e}")
             if attempt < max_retries - 1:
@@ -200,6 +384,7 @@ def call_llm_with_tools(
     max_retries: int,
     retry_delay: int,
     use_web_search: bool,
+    checkpoints: ConversationCheckpoints | None = None,
 ) -> ResponseSchema:
     """Call the LLM with tools and return a validated ResponseSchema.
 
@@ -207,24 +392,44 @@ def call_llm_with_tools(
     ----------
     use_web_search : bool
         If False, the ``web_search`` tool will be excluded from the tool list.
+    checkpoints : ConversationCheckpoints, optional
+        If given, the conversation is saved after every LLM turn and tool
+        response, and continues from a saved checkpoint for this question.
     """
     messages = make_messages_tool_use(question, TOOL_USE_SYSTEM_PROMPT, FEW_SHOT_PROMPT)
+    start_turn = 0
+    state = checkpoints.load(question) if checkpoints else None
+    if state is not None:
+        print(f"Resuming conversation from checkpoint before turn {state.turn + 1}")
+        messages, start_turn = state.messages, state.turn
+        resume_blast_jobs(state.blast_rids)
+        pending = [tool_call_from_dict(call) for call in state.pending_tool_calls]
+        for tool_response in tool_executor.run(pending) if pending else []:
+            messages.append(tool_response)
+            checkpoints.save(question, start_turn, messages)
 
-    for turn in range(max_turns):
+    for turn in range(start_turn, max_turns):
         print(f"\n--- Turn {turn + 1} ---")
 
         response_message = None
         for attempt in range(max_retries):
             try:
                 # Make the LLM call
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    tools=get_tools_definition(use_web_search),
-                    tool_choice="auto",
-                )
+                with tracer.span(
+                    "llm", model, turn=turn + 1, attempt=attempt + 1
+                ) as span:
+                    with conversation_limit.observe():
+                        response = client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            tools=get_tools_definition(use_web_search),
+                            tool_choice="auto",
+                        )
+                    span.update(llm_usage(response))
                 response_message = response.choices[0].message
                 break  # Success, exit retry loop
+            except LLMReplayMiss:
+                raise  # Retrying cannot help; fail the question quickly
             except Exception as e:
                 print(
                     f"Error calling LLM (attempt {attempt + 1}/{max_retries}) in turn {turn + 1}: {e}"
@@ -257,9 +462,12 @@ def call_llm_with_tools(
                     ),
                 }
             )
-            for tool_call in response_message.tool_calls:
-                tool_response = execute_tool_call(tool_call)
+            if checkpoints:
+                checkpoints.save(question, turn + 1, messages)
+            for tool_response in tool_executor.run(response_message.tool_calls):
                 messages.append(tool_response)
+                if checkpoints:
+                    checkpoints.save(question, turn + 1, messages)
         else:
             print("LLM provided direct answer")
             if response_message.content:
@@ -274,14 +482,17 @@ def call_llm_with_tools(
     print("Max turns reached. Attempting to get a final answer without tool use...")
     try:
         # Direct call with existing messages and tool_choice="none".
-        final_response = client.chat.completions.create(
-            model=model,
-            messages=messages,  # Use the accumulated conversation history
-            tools=get_tools_definition(
-                use_web_search
-            ),  # Still provide tool definitions as context, but restrict choice
-            tool_choice="none",  # Instruct the LLM not to call any tools
-        )
+        with tracer.span("llm", model, turn=max_turns + 1, attempt=1) as span:
+            with conversation_limit.observe():
+                final_response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,  # Use the accumulated conversation history
+                    tools=get_tools_definition(
+                        use_web_search
+                    ),  # Still provide tool definitions as context, but restrict choice
+                    tool_choice="none",  # Instruct the LLM not to call any tools
+                )
+            span.update(llm_usage(final_response))
         final_response_message = final_response.choices[0].message
         if final_response_message and final_response_message.content:
             print("LLM provided a final direct answer after max turns.")
@@ -6,25 +6,64 @@ calls the respective LLM API, and appends the results to the dataset.
 """
 
 import argparse
+import asyncio
 import concurrent.futures
-import mlflow
-from tqdm import tqdm
+import os
 
+import mlflow
 from dotenv import load_dotenv
+from mlflow.entities import Metric
+from tqdm import tqdm
 
-from .file_io import load_json, save_json, load_yaml
-from .reporting import create_log_table, log_metrics
+from .adaptive import AdaptiveLimit
+from .async_engine import process_dataset_async
+from .checkpoints import ConversationCheckpoints, default_checkpoint_dir
+from .file_io import load_json, load_yaml, save_json
+from .http_session import http_session
+from .llm_cache import LLM_CACHE_MODES
 from .llm_interface import (
-    get_client,
     call_llm,
     call_llm_with_tools,
+    configure_endpoints,
+    conversation_limit,
+    get_client,
+    llm_budgets,
+    llm_cache,
+    llm_endpoints,
+    tool_executor,
+    tool_single_flight,
 )
+from .reporting import create_log_table, log_metrics
+from .results_log import ResultsLog, default_log_path, make_run_key
+from .scheduling import CostModel, order_questions, schedule_report
+from .tools import (
+    blast_cache,
+    blast_jobs,
+    esummary_batcher,
+    gene_index,
+    ncbi_concurrency,
+    ncbi_rate_limiter,
+    tool_cache,
+    tool_projections,
+)
+from .tracing import Tracer, default_trace_dir, tracer
 
 # Default values if not found in config, though config.yaml should provide them
 DEFAULT_MAX_TURNS = 10
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 5
 DEFAULT_MAX_WORKERS = 10
+DEFAULT_TOOL_WORKERS = 10
+DEFAULT_LLM_CONCURRENCY = 50
+DEFAULT_ADAPTIVE_CONCURRENCY = False
+DEFAULT_ADAPTIVE_MAX_CONVERSATIONS = 50
+DEFAULT_NCBI_CONCURRENCY = 10
+DEFAULT_ADAPTIVE_MAX_NCBI_CONCURRENCY = 20
+DEFAULT_ADAPTIVE_LATENCY_TOLERANCE = 3.0
+DEFAULT_QUESTION_ORDER = "dataset"
+DEFAULT_LLM_BUDGET_HEADROOM = 0.9
+DEFAULT_LLM_EXPECTED_COMPLETION_TOKENS = 300
+DEFAULT_LLM_ENDPOINT_COOLDOWN = 30
 
 load_dotenv()
 
@@ -39,8 +78,38 @@ def process_single_question(
     max_retries: int,
     retry_delay: int,
     ground_truth_answer: str,
+    checkpoints: ConversationCheckpoints | None = None,
+    category: str = "",
+    question_tracer: Tracer = tracer,
 ) -> tuple[str, dict]:
     """Helper function to process a single question. To be run in a thread."""
+    with conversation_limit.slot(), question_tracer.question(category, question):
+        return _process_single_question(
+            client,
+            model_name,
+            question,
+            tool_use,
+            use_web_search,
+            max_turns,
+            max_retries,
+            retry_delay,
+            ground_truth_answer,
+            checkpoints,
+        )
+
+
+def _process_single_question(
+    client,
+    model_name: str,
+    question: str,
+    tool_use: bool,
+    use_web_search: bool,
+    max_turns: int,
+    max_retries: int,
+    retry_delay: int,
+    ground_truth_answer: str,
+    checkpoints: ConversationCheckpoints | None,
+) -> tuple[str, dict]:
     try:
         if tool_use:
             llm_response = call_llm_with_tools(
@@ -51,7 +120,10 @@ def process_single_question(
                 max_retries,
                 retry_delay,
                 use_web_search,
+                checkpoints,
             )
+            if checkpoints:
+                checkpoints.clear(question)
         else:
             llm_response = call_llm(
                 client, model_name, question, max_retries, retry_delay
@@ -79,6 +151,74 @@ def process_single_question(
         }
 
 
+def configure_concurrency(config: dict, engine: str) -> int:
+    """
+    Set the starting and maximum limits of ``conversation_limit`` and
+    ``ncbi_concurrency`` from the config and return the number of worker
+    threads the threads engine needs.
+    """
+    adaptive = config.get("ADAPTIVE_CONCURRENCY", DEFAULT_ADAPTIVE_CONCURRENCY)
+    latency_tolerance = config.get(
+        "ADAPTIVE_LATENCY_TOLERANCE", DEFAULT_ADAPTIVE_LATENCY_TOLERANCE
+    )
+    if engine == "async":
+        conversations = config.get("ASYNC_LLM_CONCURRENCY", DEFAULT_LLM_CONCURRENCY)
+    else:
+        conversations = config.get("MAX_WORKERS", DEFAULT_MAX_WORKERS)
+    conversation_limit.configure(
+        limit=conversations,
+        max_limit=config.get(
+            "ADAPTIVE_MAX_CONVERSATIONS", DEFAULT_ADAPTIVE_MAX_CONVERSATIONS
+        ),
+        adaptive=adaptive,
+        latency_tolerance=latency_tolerance,
+    )
+    ncbi_concurrency.configure(
+        limit=config.get("NCBI_CONCURRENCY", DEFAULT_NCBI_CONCURRENCY),
+        max_limit=config.get(
+            "ADAPTIVE_MAX_NCBI_CONCURRENCY", DEFAULT_ADAPTIVE_MAX_NCBI_CONCURRENCY
+        ),
+        adaptive=adaptive,
+        latency_tolerance=latency_tolerance,
+    )
+    if adaptive:
+        print(
+            f"Adaptive concurrency: {conversation_limit.limit} conversations "
+            f"(up to {conversation_limit.max_limit}) and {ncbi_concurrency.limit} "
+            f"NCBI requests (up to {ncbi_concurrency.max_limit}) to start with."
+        )
+    # Threads beyond the current limit wait in conversation_limit.slot()
+    return conversation_limit.max_limit
+
+
+def configure_workers(config: dict, engine: str, parallel_runs: int = 1) -> int:
+    """
+    Configure the concurrency limits, the tool-call pool and the HTTP
+    connection pool for ``parallel_runs`` datasets processed at the same
+    time, and return the worker threads each of them needs.
+    """
+    max_workers = configure_concurrency(config, engine)
+    if engine == "threads":
+        tool_workers = config.get("TOOL_WORKERS", DEFAULT_TOOL_WORKERS)
+        tool_executor.configure(tool_workers)
+        http_session.configure(pool_size=max_workers * parallel_runs + tool_workers)
+    return max_workers
+
+
+def log_adaptive_limit(limit: AdaptiveLimit, prefix: str) -> dict:
+    """Log a limit's stats and how it changed over the run to MLflow."""
+    stats = limit.stats(prefix)
+    mlflow.log_metrics(stats)
+    history = [
+        Metric(f"{prefix}_limit_over_time", value, int(timestamp * 1000), step)
+        for step, (timestamp, value) in enumerate(limit.history())
+    ]
+    mlflow.tracking.MlflowClient().log_batch(
+        mlflow.active_run().info.run_id, metrics=history
+    )
+    return stats
+
+
 def process_dataset(
     provider: str,
     model_name: str,
@@ -86,29 +226,103 @@ def process_dataset(
     tool_use: bool,
     use_web_search: bool,
     config: dict,
+    engine: str = "threads",
+    results_log: ResultsLog | None = None,
+    completed: dict | None = None,
+    checkpoints: ConversationCheckpoints | None = None,
+    cost_model: CostModel | None = None,
+    question_tracer: Tracer = tracer,
+    max_workers: int | None = None,
 ) -> dict:
     """
     Processes each question in the dataset using the LLM and appends results.
-    Uses ThreadPoolExecutor for concurrent question processing.
+    Uses ThreadPoolExecutor for concurrent question processing, or a single
+    asyncio event loop when ``engine`` is "async". With ``QUESTION_ORDER:
+    longest_first`` questions start in order of ``cost_model``'s estimates.
+    ``max_workers`` is given when the workers were already configured with
+    ``configure_workers``, e.g. by the matrix runner. The threads engine
+    records question traces with ``question_tracer``.
+
+    Questions in ``completed`` (from a resumed ``results_log``) are skipped and
+    merged into the returned results; every newly finished question is
+    appended to ``results_log`` as soon as it is done. With ``checkpoints``,
+    tool-use conversations continue from their last saved turn.
     """
-    client = get_client(provider)
-    results = {}
+    if completed:
+        pending = {
+            category: {
+                question: answer
+                for question, answer in questions_answers.items()
+                if question not in completed.get(category, {})
+            }
+            for category, questions_answers in dataset.items()
+        }
+        skipped = sum(len(qa) for qa in dataset.values()) - sum(
+            len(qa) for qa in pending.values()
+        )
+        print(f"Resuming: skipping {skipped} questions already in the results log.")
+        new_results = process_dataset(
+            provider,
+            model_name,
+            pending,
+            tool_use,
+            use_web_search,
+            config,
+            engine,
+            results_log,
+            checkpoints=checkpoints,
+            cost_model=cost_model,
+            question_tracer=question_tracer,
+            max_workers=max_workers,
+        )
+        return {
+            category: {**completed.get(category, {}), **new_results[category]}
+            for category in dataset
+        }
 
     max_turns = config.get("MAX_TURNS", DEFAULT_MAX_TURNS)
     max_retries = config.get("MAX_RETRIES", DEFAULT_MAX_RETRIES)
     retry_delay = config.get("RETRY_DELAY", DEFAULT_RETRY_DELAY)
-    max_workers = config.get("MAX_WORKERS", DEFAULT_MAX_WORKERS)
+    if max_workers is None:
+        max_workers = configure_workers(config, engine)
+    all_questions_with_category = order_questions(
+        [
+            (category, question, ground_truth_answer)
+            for category, questions_answers in dataset.items()
+            for question, ground_truth_answer in questions_answers.items()
+        ],
+        cost_model or CostModel(),
+        config.get("QUESTION_ORDER", DEFAULT_QUESTION_ORDER),
+    )
+
+    if engine == "async":
+        return asyncio.run(
+            process_dataset_async(
+                provider,
+                model_name,
+                dataset,
+                tool_use,
+                use_web_search,
+                config,
+                max_turns,
+                max_retries,
+                retry_delay,
+                results_log,
+                checkpoints,
+                all_questions_with_category,
+            )
+        )
+
+    client = get_client(provider)
+    results = {}
+
     print(f"Using up to {max_workers} concurrent workers for question processing.")
 
-    all_questions_with_category = []
     for category, questions_answers in dataset.items():
         print(f"Processing category: {category}")
         results[category] = {}
-        for question, ground_truth_answer in questions_answers.items():
+        for question in questions_answers:
             print(f"Processing question: {question}")
-            all_questions_with_category.append(
-                (category, question, ground_truth_answer)
-            )
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         future_to_details = {
@@ -123,6 +337,9 @@ def process_dataset(
                 max_retries,
                 retry_delay,
                 ground_truth_answer,
+                checkpoints,
+                category,
+                question_tracer=question_tracer,
             ): (category, question)
             for category, question, ground_truth_answer in all_questions_with_category
         }
@@ -145,12 +362,17 @@ def process_dataset(
                     "thoughts": f"Error during threaded execution: {exc}",
                     "prediction": "ERROR_THREAD_EXECUTION",
                 }
+            if results_log is not None:
+                results_log.append(
+                    original_category,
+                    original_question_text,
+                    results[original_category][original_question_text],
+                )
     return results
 
 
-def main():
-    """Entry point"""
-
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line options of one run, shared with the matrix runner."""
     parser = argparse.ArgumentParser(
         description="Process a dataset with a specified LLM and append results."
     )
@@ -194,6 +416,65 @@ def main():
         help="Enable the web_search tool (use with --web-search). Disable with --no-web-search.",
     )
 
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="threads",
+        choices=["threads", "async"],
+        help="Execution engine: one thread per question ('threads') or a single asyncio event loop ('async').",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Skip questions already completed in the results log for the same dataset/provider/model/tool-use/web-search configuration.",
+    )
+
+    parser.add_argument(
+        "--results-log",
+        type=str,
+        default=None,
+        help="Path of the JSONL log each finished question is appended to (default: output path with a .jsonl extension).",
+    )
+
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        default=None,
+        help="Directory for per-conversation tool-use checkpoints used by --resume (default: output path with a .checkpoints extension).",
+    )
+
+    parser.add_argument(
+        "--trace-dir",
+        type=str,
+        default=None,
+        help="Directory for per-question traces of LLM turns and tool calls (default: output path with a .traces extension).",
+    )
+
+    parser.add_argument(
+        "--cost-history",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Extra trace directories (e.g. results/*.traces) to estimate question costs from, in addition to this run's earlier traces.",
+    )
+
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        default=None,
+        choices=LLM_CACHE_MODES,
+        help="Record/replay chat completions: 'record' answers known requests from the LLM cache and records new ones, 'replay' only answers from it, 'passthrough' disables it (default: LLM_CACHE_MODE or passthrough).",
+    )
+
+    parser.add_argument(
+        "--llm-cache-path",
+        type=str,
+        default=None,
+        help="SQLite file for recorded completions (default: LLM_CACHE_PATH or .cache/llm_cache.sqlite).",
+    )
+
     parser.add_argument(
         "--config_path",
         type=str,
@@ -201,26 +482,139 @@ def main():
         help="Path to the YAML configuration file (e.g., src/config.yaml)",
     )
 
-    args = parser.parse_args()
-    print("Arguments:")
-    print(f"  Dataset: {args.dataset_path}")
-    print(f"  Provider: {args.provider}")
-    print(f"  Model: {args.model}")
-    print(f"  Output Path: {args.output_path}")
-    print(f"  Tool Use: {args.tool_use}")
-    print(f"  Web Search: {args.web_search}")
+    return parser
 
-    config = load_yaml(args.config_path)
-    print(f"  Loaded config from {args.config_path}")
+
+def configure_process(
+    config: dict, llm_cache_mode: str | None = None, llm_cache_path: str | None = None
+) -> None:
+    """
+    Set up what every run in the process shares: the LLM cache, TPM/RPM
+    pacing, the LLM endpoint pools and the MLflow experiment.
+    """
+    llm_cache.configure(llm_cache_mode, llm_cache_path)
+    print(f"  LLM cache: {llm_cache.mode} ({llm_cache.store.path})")
+    llm_budgets.configure(
+        config.get("LLM_RATE_LIMITS"),
+        config.get("LLM_BUDGET_HEADROOM", DEFAULT_LLM_BUDGET_HEADROOM),
+        config.get(
+            "LLM_EXPECTED_COMPLETION_TOKENS", DEFAULT_LLM_EXPECTED_COMPLETION_TOKENS
+        ),
+    )
+    for model, budget in llm_budgets.budgets.items():
+        print(f"  LLM pacing: {budget.tpm} TPM / {budget.rpm} RPM for {model}")
+    configure_endpoints(
+        config.get("LLM_ENDPOINTS"),
+        config.get("LLM_ENDPOINT_COOLDOWN", DEFAULT_LLM_ENDPOINT_COOLDOWN),
+    )
+    for provider, endpoint_pool in llm_endpoints.items():
+        if endpoint_pool.enabled:
+            print(
+                f"  LLM endpoints ({provider}): "
+                + ", ".join(
+                    f"{e.name} (weight {e.weight:g})" for e in endpoint_pool.endpoints
+                )
+            )
 
     # Configure MLflow tracking URI and experiment name first
     mlflow.set_tracking_uri(config["mlflow_tracking_uri"])
     mlflow.set_experiment("GeneTuring(Ameer) - example")
 
+
+def log_shared_stats(tool_use: bool, providers: list[str]) -> None:
+    """
+    Log the stats of the caches, pools and limits every run in the process
+    shares to the active MLflow run.
+    """
+    if llm_cache.enabled:
+        llm_cache_stats = llm_cache.stats()
+        mlflow.log_metrics(llm_cache_stats)
+        print(
+            f"LLM cache: {llm_cache_stats['llm_cache_hits']} replayed, "
+            f"{llm_cache_stats['llm_cache_recorded']} recorded, "
+            f"{llm_cache_stats['llm_cache_replay_misses']} replay misses"
+        )
+
+    llm_budget_stats = llm_budgets.stats()  # Also covers per-endpoint budgets
+    if llm_budget_stats:
+        mlflow.log_metrics(llm_budget_stats)
+    for provider in providers:
+        endpoint_pool = llm_endpoints[provider]
+        if not endpoint_pool.enabled:
+            continue
+        endpoint_stats = endpoint_pool.stats(f"llm_endpoint_{provider}")
+        mlflow.log_metrics(endpoint_stats)
+        for e in endpoint_pool.endpoints:
+            prefix = f"llm_endpoint_{provider}_{e.name}"
+            print(
+                f"LLM endpoint {e.name}: "
+                f"{endpoint_stats[f'{prefix}_requests']} requests, "
+                f"{endpoint_stats[f'{prefix}_errors']} errors, "
+                f"{endpoint_stats[f'{prefix}_ejections']} ejections, "
+                f"p95 {endpoint_stats[f'{prefix}_latency_p95']:.2f}s"
+            )
+    conversation_stats = log_adaptive_limit(conversation_limit, "conversation_limit")
+    print(
+        f"Conversation limit: {conversation_stats['conversation_limit_limit']} "
+        f"at the end ({conversation_stats['conversation_limit_limit_min']}-"
+        f"{conversation_stats['conversation_limit_limit_max']}), "
+        f"{conversation_stats['conversation_limit_throttled']} LLM 429s"
+    )
+    if tool_use:
+        cache_stats = tool_cache.stats()
+        mlflow.log_metrics(cache_stats)
+        mlflow.log_metrics(http_session.stats())
+        mlflow.log_metrics(blast_jobs.stats())
+        mlflow.log_metrics(blast_cache.stats("blast_cache"))
+        mlflow.log_metrics(esummary_batcher.stats())
+        flight_stats = tool_single_flight.stats()
+        mlflow.log_metrics(flight_stats)
+        mlflow.log_metrics(tool_projections.stats())
+        if gene_index.available:
+            mlflow.log_metrics(gene_index.stats())
+        limiter_stats = ncbi_rate_limiter.stats("ncbi_rate_limit")
+        mlflow.log_metrics(limiter_stats)
+        ncbi_stats = log_adaptive_limit(ncbi_concurrency, "ncbi_concurrency")
+        print(
+            f"NCBI concurrency: {ncbi_stats['ncbi_concurrency_limit']} at the end "
+            f"({ncbi_stats['ncbi_concurrency_limit_min']}-"
+            f"{ncbi_stats['ncbi_concurrency_limit_max']}), "
+            f"{ncbi_stats['ncbi_concurrency_throttled']} NCBI 429s"
+        )
+        print(
+            f"NCBI rate limiter: {limiter_stats['ncbi_rate_limit_requests']} "
+            f"requests, {limiter_stats['ncbi_rate_limit_wait_seconds']:.1f}s "
+            "waiting for tokens"
+        )
+        print(
+            f"Tool cache: {cache_stats['tool_cache_hits']} hits, "
+            f"{cache_stats['tool_cache_misses']} misses"
+        )
+        print(
+            f"Single-flight: {flight_stats['single_flight_shared']} tool calls "
+            "shared an identical in-flight call"
+        )
+
+
+def run_config(
+    args: argparse.Namespace,
+    config: dict,
+    run_tracer: Tracer = tracer,
+    parent_run_id: str | None = None,
+    max_workers: int | None = None,
+    run_name: str | None = None,
+) -> dict:
+    """
+    Process one dataset/provider/model/tool-use configuration in its own
+    MLflow run and save its results to ``args.output_path``. As a child of
+    ``parent_run_id`` (the matrix runner), the stats shared with the other
+    runs are left to the parent run.
+    """
     # Start the MLflow run
-    with mlflow.start_run():
-        # Activate autologging within the run context
-        mlflow.openai.autolog()
+    with mlflow.start_run(run_name=run_name, parent_run_id=parent_run_id):
+        if parent_run_id is None:
+            # Activate autologging within the run context
+            mlflow.openai.autolog()
 
         # Log all parameters within the run context
         mlflow.log_params(vars(args))  # Logs command-line arguments
@@ -237,6 +631,37 @@ def main():
         mlflow.log_artifact(args.dataset_path)
         print(f"Loaded {len(data)} entries from {args.dataset_path}")
 
+        run_key = make_run_key(
+            args.dataset_path,
+            args.provider,
+            args.model,
+            args.tool_use,
+            args.web_search,
+        )
+        results_log = ResultsLog(
+            args.results_log or default_log_path(args.output_path), run_key
+        )
+        checkpoints = ConversationCheckpoints(
+            args.checkpoint_dir or default_checkpoint_dir(args.output_path), run_key
+        )
+        run_tracer.configure(args.trace_dir or default_trace_dir(args.output_path))
+        # Read before run_tracer.reset() removes the previous run's traces
+        cost_model = CostModel()
+        learned = cost_model.load_traces([run_tracer.directory, *args.cost_history])
+        question_order = config.get("QUESTION_ORDER", DEFAULT_QUESTION_ORDER)
+        print(f"  Question order: {question_order} ({learned} earlier traces)")
+        completed = None
+        if args.resume:
+            completed = results_log.load()
+        else:
+            results_log.reset()
+            checkpoints.reset()
+            run_tracer.reset()
+        print(f"  Results log: {results_log.path}")
+        print(f"  Traces: {run_tracer.directory}")
+        if args.tool_use:
+            print(f"  Conversation checkpoints: {checkpoints.directory}")
+
         results = process_dataset(
             args.provider,
             args.model,
@@ -244,9 +669,42 @@ def main():
             args.tool_use,
             args.web_search,
             config,
+            args.engine,
+            results_log,
+            completed,
+            checkpoints,
+            cost_model,
+            run_tracer,
+            max_workers,
         )
         print(f"Processed {len(results)} entries")
 
+        run_traces = run_tracer.traces()
+        traced = {(trace.category, trace.question) for trace in run_traces}
+        schedule_stats = schedule_report(
+            cost_model,
+            [(c, q) for c, qa in data.items() for q in qa if (c, q) in traced],
+            run_traces,
+            conversation_limit.history()[0][1],
+            question_order,
+        )
+        if schedule_stats:
+            mlflow.log_metrics(schedule_stats)
+            print(
+                f"Makespan: {schedule_stats['schedule_actual_makespan_seconds']:.1f}s "
+                f"actual, {schedule_stats['schedule_expected_makespan_seconds']:.1f}s "
+                f"expected ({question_order}), "
+                f"{schedule_stats['schedule_dataset_order_expected_makespan_seconds']:.1f}s "
+                "expected in dataset order"
+            )
+
+        mlflow.log_metrics(run_tracer.stats())
+        if os.path.isdir(run_tracer.directory):
+            mlflow.log_artifacts(run_tracer.directory, artifact_path="traces")
+
+        if parent_run_id is None:
+            log_shared_stats(args.tool_use, [args.provider])
+
         table_data = create_log_table(results)
         if table_data is not None:
             mlflow.log_table(data=table_data, artifact_file="tabular_results.json")
@@ -275,6 +733,26 @@ def main():
         save_json(results, args.output_path)
         mlflow.log_artifact(args.output_path)
         print(f"Saved results to {args.output_path}")
+    return results
+
+
+def main():
+    """Entry point"""
+    args = build_parser().parse_args()
+    print("Arguments:")
+    print(f"  Dataset: {args.dataset_path}")
+    print(f"  Provider: {args.provider}")
+    print(f"  Model: {args.model}")
+    print(f"  Output Path: {args.output_path}")
+    print(f"  Tool Use: {args.tool_use}")
+    print(f"  Web Search: {args.web_search}")
+    print(f"  Engine: {args.engine}")
+    print(f"  Resume: {args.resume}")
+
+    config = load_yaml(args.config_path)
+    print(f"  Loaded config from {args.config_path}")
+    configure_process(config, args.llm_cache, args.llm_cache_path)
+    run_config(args, config)
 
 
 if __name__ == "__main__":
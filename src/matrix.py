@@ -0,0 +1,264 @@
+"""
+Run many dataset/provider/model/tool-use configurations in one process.
+
+Each configuration is given as the arguments of one ``python -m src.main``
+run, taken from the existing ``scripts/*.sh`` or from a YAML file:
+
+    python -m src.matrix --scripts scripts/geneturing_small_*.sh
+    python -m src.matrix --matrix matrix.yaml --parallel-runs 4
+
+    # matrix.yaml
+    runs:
+      - {dataset_path: data/genehop_small.json, provider: azure, model: gpt-4.1, tool_use: true}
+      - --dataset_path data/genehop_small.json --provider ollama --model qwen3:4b --no-tool-use
+
+Up to ``--parallel-runs`` configurations are processed at the same time, and
+all of their conversations share ``conversation_limit`` as one global budget.
+The tool cache, BLAST results, single-flight calls and HTTP pools are shared
+too, so a gene looked up by one configuration is not fetched again by the
+next. Every configuration gets its own MLflow run (a child of one "matrix"
+run, which holds the stats of what they share), traces and output file.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import shlex
+import time
+
+import mlflow
+import yaml
+
+from .file_io import load_yaml
+from .llm_cache import LLM_CACHE_MODES
+from .main import (
+    build_parser,
+    configure_process,
+    configure_workers,
+    log_shared_stats,
+    run_config,
+)
+from .tracing import Tracer
+
+DEFAULT_MATRIX_PARALLEL_RUNS = 3
+# Options of src.main spelled with underscores; the others use hyphens
+UNDERSCORE_OPTIONS = {"dataset_path", "output_path", "config_path"}
+
+
+def script_args(path: str) -> list[str]:
+    """Arguments of the ``python -m src.main`` command in a shell script."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().replace("\\\n", " ")
+    for line in text.splitlines():
+        words = shlex.split(line, comments=True)
+        if "src.main" in words:
+            return words[words.index("src.main") + 1 :]
+    raise ValueError(f"No 'python -m src.main' command in {path}")
+
+
+def default_output_path(
+    dataset_path: str, provider: str, model: str, tool_use: bool
+) -> str:
+    """``results/<dataset>_<provider>_<model>_<tools|no_tools>.json``."""
+    dataset = os.path.splitext(os.path.basename(dataset_path))[0]
+    model = "".join(c if c.isalnum() else "_" for c in model)
+    tools = "tools" if tool_use else "no_tools"
+    return os.path.join("results", f"{dataset}_{provider}_{model}_{tools}.json")
+
+
+def entry_args(entry: str | dict) -> list[str]:
+    """
+    Arguments of one YAML matrix entry: a ``src.main`` command line, or a
+    mapping of its options (``tool_use: true`` becomes ``--tool-use``). A
+    mapping without ``output_path`` gets ``default_output_path``.
+    """
+    if isinstance(entry, str):
+        return shlex.split(entry)
+    entry = dict(entry)
+    entry.setdefault(
+        "output_path",
+        default_output_path(
+            entry["dataset_path"],
+            entry["provider"],
+            entry["model"],
+            entry.get("tool_use", False),
+        ),
+    )
+    argv = []
+    for key, value in entry.items():
+        option = key if key in UNDERSCORE_OPTIONS else key.replace("_", "-")
+        if isinstance(value, bool):
+            argv.append(f"--{option}" if value else f"--no-{option}")
+        elif isinstance(value, list):
+            argv += [f"--{option}", *map(str, value)]
+        else:
+            argv += [f"--{option}", str(value)]
+    return argv
+
+
+def load_runs(matrix_path: str | None, scripts: list[str]) -> list[argparse.Namespace]:
+    """Parse the configurations of a YAML matrix file and of shell scripts."""
+    argvs = [script_args(path) for path in scripts]
+    if matrix_path:
+        with open(matrix_path, "r", encoding="utf-8") as f:
+            matrix = yaml.safe_load(f) or {}
+        argvs += [entry_args(entry) for entry in matrix.get("runs", [])]
+    parser = build_parser()
+    return [parser.parse_args(argv) for argv in argvs]
+
+
+def check_runs(runs: list[argparse.Namespace], config_path: str) -> None:
+    """Reject configurations that cannot share one process."""
+    if not runs:
+        raise ValueError("No runs given; use --matrix and/or --scripts.")
+    outputs = [run.output_path for run in runs]
+    duplicates = sorted({path for path in outputs if outputs.count(path) > 1})
+    if duplicates:
+        raise ValueError(f"Several runs write to {', '.join(duplicates)}")
+    for run in runs:
+        if run.engine != "threads":
+            raise ValueError(
+                f"{run.output_path}: the matrix runner uses the threads engine"
+            )
+        if run.config_path != config_path:
+            raise ValueError(
+                f"{run.output_path}: every run uses the matrix --config_path"
+            )
+        if run.llm_cache is not None or run.llm_cache_path is not None:
+            raise ValueError(
+                f"{run.output_path}: set --llm-cache/--llm-cache-path on the matrix"
+            )
+
+
+def run_name(run: argparse.Namespace) -> str:
+    return os.path.splitext(os.path.basename(run.output_path))[0]
+
+
+def run_matrix(
+    runs: list[argparse.Namespace],
+    config: dict,
+    parallel_runs: int,
+    parent_run_id: str | None = None,
+    max_workers: int | None = None,
+) -> dict[str, str]:
+    """
+    Process ``runs``, up to ``parallel_runs`` at a time, with tool-use runs
+    (the longest) first. Return the error of every run that failed.
+    """
+    failed = {}
+    ordered = sorted(runs, key=lambda run: not run.tool_use)
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=parallel_runs, thread_name_prefix="matrix"
+    ) as executor:
+        future_to_run = {
+            executor.submit(
+                run_config,
+                run,
+                config,
+                Tracer(),
+                parent_run_id,
+                max_workers,
+                run_name(run),
+            ): run
+            for run in ordered
+        }
+        for future in concurrent.futures.as_completed(future_to_run):
+            name = run_name(future_to_run[future])
+            try:
+                future.result()
+                print(f"Matrix run {name} finished")
+            except Exception as exc:
+                print(f"Matrix run {name} failed: {exc}")
+                failed[name] = str(exc)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run many dataset/provider/model/tool-use configurations in one process."
+    )
+    parser.add_argument(
+        "--matrix",
+        type=str,
+        default=None,
+        help="YAML file with a 'runs' list of src.main command lines or option mappings.",
+    )
+    parser.add_argument(
+        "--scripts",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Shell scripts (e.g. scripts/*.sh) whose src.main commands to run.",
+    )
+    parser.add_argument(
+        "--parallel-runs",
+        type=int,
+        default=None,
+        help="Configurations processed at the same time (default: MATRIX_PARALLEL_RUNS from the config).",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        default=None,
+        choices=LLM_CACHE_MODES,
+        help="Record/replay mode for every run, as for src.main.",
+    )
+    parser.add_argument(
+        "--llm-cache-path",
+        type=str,
+        default=None,
+        help="SQLite file for recorded completions, as for src.main.",
+    )
+    parser.add_argument(
+        "--config_path",
+        type=str,
+        default="src/config.yaml",
+        help="Path to the YAML configuration file shared by every run.",
+    )
+    args = parser.parse_args()
+
+    runs = load_runs(args.matrix, args.scripts)
+    try:
+        check_runs(runs, args.config_path)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config = load_yaml(args.config_path)
+    parallel_runs = args.parallel_runs or config.get(
+        "MATRIX_PARALLEL_RUNS", DEFAULT_MATRIX_PARALLEL_RUNS
+    )
+    print(f"Matrix: {len(runs)} runs, {parallel_runs} at a time")
+    configure_process(config, args.llm_cache, args.llm_cache_path)
+
+    start = time.perf_counter()
+    with mlflow.start_run(run_name="matrix") as parent:
+        mlflow.openai.autolog()
+        mlflow.log_params(
+            {
+                "matrix_runs": len(runs),
+                "matrix_parallel_runs": parallel_runs,
+                "config_path": args.config_path,
+            }
+        )
+        max_workers = configure_workers(config, "threads", parallel_runs)
+        failed = run_matrix(
+            runs, config, parallel_runs, parent.info.run_id, max_workers
+        )
+        log_shared_stats(
+            any(run.tool_use for run in runs), sorted({run.provider for run in runs})
+        )
+        elapsed = time.perf_counter() - start
+        mlflow.log_metrics(
+            {"matrix_seconds": elapsed, "matrix_failed_runs": len(failed)}
+        )
+
+    print(
+        f"Matrix finished in {elapsed:.1f}s: {len(runs) - len(failed)} of "
+        f"{len(runs)} runs succeeded"
+    )
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
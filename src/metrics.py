@@ -2,24 +2,25 @@
 
 from Levenshtein import distance as levenshtein_distance
 
+# Predictions mapped to the spelling of the ground truth before exact match
+PREDICTION_MAPPER = {
+    "Caenorhabditis elegans": "worm",
+    "Homo sapiens": "human",
+    "Danio rerio": "zebrafish",
+    "Mus musculus": "mouse",
+    "Saccharomyces cerevisiae": "yeast",
+    "Rattus norvegicus": "rat",
+    "Gallus gallus": "chicken",
+    "Yes": "TRUE",
+    "No": "NA",
+}
+
 
 def calculate_exact_match(ground_truth: str, prediction: str) -> float:
     """Calculate the exact match metric."""
-    mapper = {
-        "Caenorhabditis elegans": "worm",
-        "Homo sapiens": "human",
-        "Danio rerio": "zebrafish",
-        "Mus musculus": "mouse",
-        "Saccharomyces cerevisiae": "yeast",
-        "Rattus norvegicus": "rat",
-        "Gallus gallus": "chicken",
-        "Yes": "TRUE",
-        "No": "NA",
-    }
-
     # Map the prediction if it's a key in the mapper.
     # The ground_truth is used as-is for comparison.
-    prediction_mapped = mapper.get(prediction, prediction)
+    prediction_mapped = PREDICTION_MAPPER.get(prediction, prediction)
 
     return float(ground_truth == prediction_mapped)
 
@@ -6,3 +6,17 @@ class ResponseSchema(BaseModel):
 
     thoughts: str = Field(description="The thoughts process to answer the question")
     answer: str = Field(description="The final answer to the question")
+
+
+class ConversationState(BaseModel):
+    """Checkpointed state of a tool-use conversation, saved after every step."""
+
+    question: str
+    turn: int = Field(default=0, description="Index of the next LLM turn to run")
+    messages: list[dict]
+    pending_tool_calls: list[dict] = Field(
+        default_factory=list, description="Requested tool calls without a response yet"
+    )
+    blast_rids: list[str] = Field(
+        default_factory=list, description="BLAST RIDs submitted but not yet retrieved"
+    )
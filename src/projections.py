@@ -0,0 +1,173 @@
+"""This module trims esummary/efetch tool output to the fields the prompts use."""
+
+import collections
+import hashlib
+import json
+import re
+import threading
+
+# Fields kept per esummary document, by database. These are the fields
+# TOOL_USE_SYSTEM_PROMPT and the few-shot examples point the model at.
+DEFAULT_ESUMMARY_FIELDS = {
+    "gene": [
+        "uid",
+        "name",
+        "description",
+        "status",
+        "currentid",
+        "nomenclaturesymbol",
+        "nomenclaturename",
+        "nomenclaturestatus",
+        "otheraliases",
+        "otherdesignations",
+        "organism",
+        "chromosome",
+        "maplocation",
+        "genomicinfo",
+        "summary",
+    ],
+    "snp": [
+        "uid",
+        "snp_id",
+        "refsnp_id",
+        "genes",
+        "gene_name",
+        "chr",
+        "chrpos",
+        "fxn_class",
+        "clinical_significance",
+        "docsum",
+    ],
+    "omim": [
+        "uid",
+        "oid",
+        "title",
+        "alttitles",
+        "locus",
+        "genemap",
+        "textsectionlist",
+    ],
+}
+
+# Characters of efetch output kept, by database ("default" for the rest)
+DEFAULT_EFETCH_MAX_CHARS = {"default": 20000}
+
+_SPACES = re.compile(r"[ \t]{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4
+
+
+def compact_text(content: str) -> str:
+    """Drop blank lines and collapse runs of spaces (ASN.1/flat-file indentation)."""
+    lines = (_SPACES.sub(" ", line.rstrip()) for line in content.splitlines())
+    return "\n".join(line for line in lines if line.strip())
+
+
+class ToolProjections:
+    """
+    Per-database projections for esummary documents and efetch text, with
+    counters of how much output was removed per tool. Databases without a
+    configured field list are passed through unchanged. Field names match
+    case-insensitively, so ``geneMap`` keeps ``genemap``.
+    """
+
+    def __init__(
+        self,
+        esummary_fields: dict[str, list[str]] | None = None,
+        efetch_max_chars: dict[str, int] | None = None,
+        enabled: bool = True,
+    ):
+        self.esummary_fields = {
+            database: {field.lower() for field in fields}
+            for database, fields in {
+                **DEFAULT_ESUMMARY_FIELDS,
+                **(esummary_fields or {}),
+            }.items()
+        }
+        self.efetch_max_chars = {
+            **DEFAULT_EFETCH_MAX_CHARS,
+            **(efetch_max_chars or {}),
+        }
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts: dict[str, collections.Counter] = collections.defaultdict(
+            collections.Counter
+        )
+
+    @classmethod
+    def from_file(cls, path: str | None, enabled: bool = True) -> "ToolProjections":
+        """
+        Load projections from a JSON file with optional ``esummary_fields``
+        and ``efetch_max_chars`` objects keyed by database, which override
+        the defaults for those databases; an empty path uses the defaults.
+        """
+        if not path:
+            return cls(enabled=enabled)
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            config.get("esummary_fields"), config.get("efetch_max_chars"), enabled
+        )
+
+    def fingerprint(self) -> str:
+        """Hash of the projection settings, so cached output follows them."""
+        spec = {
+            "esummary_fields": {
+                database: sorted(fields)
+                for database, fields in self.esummary_fields.items()
+            },
+            "efetch_max_chars": self.efetch_max_chars,
+            "enabled": self.enabled,
+        }
+        payload = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _record(self, tool: str, before: str, after: str) -> None:
+        with self._lock:
+            counts = self._counts[tool]
+            counts["calls"] += 1
+            counts["bytes_in"] += len(before.encode("utf-8"))
+            counts["bytes_out"] += len(after.encode("utf-8"))
+            counts["tokens_saved"] += estimate_tokens(before) - estimate_tokens(after)
+
+    def esummary(self, database: str, summaries: dict) -> dict:
+        """Keep only the configured fields of each esummary document."""
+        fields = self.esummary_fields.get(database)
+        if not self.enabled or fields is None:
+            return summaries
+        projected = {
+            uid: (
+                {k: v for k, v in doc.items() if k.lower() in fields}
+                if isinstance(doc, dict) and "error" not in doc
+                else doc
+            )
+            for uid, doc in summaries.items()
+        }
+        self._record("esummary_ncbi", json.dumps(summaries), json.dumps(projected))
+        return projected
+
+    def efetch(self, database: str, content: str) -> str:
+        """Compact and truncate efetch output for ``database``."""
+        max_chars = self.efetch_max_chars.get(
+            database, self.efetch_max_chars["default"]
+        )
+        if not self.enabled:
+            return content[:max_chars]
+        projected = compact_text(content)[:max_chars]
+        self._record("efetch_ncbi", content, projected)
+        return projected
+
+    def stats(self, prefix: str = "projection") -> dict:
+        stats = {}
+        with self._lock:
+            for tool, counts in self._counts.items():
+                stats[f"{prefix}_{tool}_calls"] = counts["calls"]
+                stats[f"{prefix}_{tool}_bytes_in"] = counts["bytes_in"]
+                stats[f"{prefix}_{tool}_bytes_saved"] = (
+                    counts["bytes_in"] - counts["bytes_out"]
+                )
+                stats[f"{prefix}_{tool}_tokens_saved"] = counts["tokens_saved"]
+        return stats
@@ -62,9 +62,9 @@ These tools are for sequence alignment (e.g., mapping a DNA/protein sequence to
 
 2.  **Retrieve BLAST Results (`blast_get`)**:
     *   **Purpose**: To fetch the results of a submitted BLAST job.
-    *   **Inputs**: `rid` (from `blast_put`), `format_type` (e.g., 'Text', 'XML').
-    *   **Important**: This tool has an **internal delay of about 30 seconds**.
-    *   **Output**: The BLAST report. If the status is "WAITING" or "SEARCHING", the job is not yet complete; you may need to try `blast_get` again in a subsequent turn if the information is critical.
+    *   **Inputs**: `rid` (from `blast_put`), `format_type` (e.g., 'Text', 'XML'), `raw` (true/false).
+    *   **Important**: This tool **waits internally until the BLAST job finishes** (usually 10-60 seconds).
+    *   **Output**: With `raw=false` (recommended), a compact table of ranked hits, each with `accession`, `description`, `organism`, `percent_identity`, `evalue` and query/subject coordinates (`subject_start`, `subject_end`). Only use `raw=true` if the table lacks what you need; it returns the full report in `format_type`, which can be very long. If the status is "WAITING" or "SEARCHING", the job is not yet complete; you may need to try `blast_get` again in a subsequent turn if the information is critical.
 
 ## Final Answer Instructions:
 - **IMPORTANT**: Only provide the final JSON answer when you have completed all necessary tool calls and gathered sufficient information.
@@ -111,7 +111,7 @@ Question: What are the aliases of the gene that contains this sequence: GTAGATGG
 Workflow:
 Turn 1: Use blast_put(sequence='GTAGATGGAACTGGTAGTCAGCTGGAGAGCAGCATGGAGGCGTCCTGGGGGAGCTTCAACGCTGAGCGGGGCTGGTATGTCTCTGTCCAGCAGCCTGAAGAAGCGGAGGCCGA', program='blastn', database='nt', megablast=True, hitlist_size=5)
 Result: {"rid": "ABC123XYZ"}
-Turn 2: Use blast_get(rid='ABC123XYZ', format_type='Text')
+Turn 2: Use blast_get(rid='ABC123XYZ', format_type='Text', raw=False)
 Result: Shows top hit is gene SLC38A6 on chromosome 14
 Turn 3: Use esearch_ncbi(database='gene', term='SLC38A6', retmax=5)
 Result: {"uids": ["164091"]}
@@ -179,7 +179,7 @@ Question: Align the DNA sequence GGACAGCTGAGATCACATCAAGGATTCCAGAAAGAATTGGCACAGGA
 Workflow:
 Turn 1: Use blast_put(sequence='GGACAGCTGAGATCACATCAAGGATTCCAGAAAGAATTGGCACAGGATCATTCAAGATGCATCTCTCCGTTGCCCCTGTTCCTGGCTTTCCTTCAACTTCCTCAAAGGGGACATCATTTCGGAGTTTGGCTTCCA', program='blastn', database='nt', megablast=True, hitlist_size=1)
 Result: {"rid": "DEF456GHI"}
-Turn 2: Use blast_get(rid='DEF456GHI', format_type='Text')
+Turn 2: Use blast_get(rid='DEF456GHI', format_type='Text', raw=False)
 Result: (Simulated) BLAST report shows top alignment to 'Homo sapiens chromosome 10, GRCh38.p14' with subject start 7531973 and end 7532108.
 Final Answer:
 {
@@ -191,7 +191,7 @@ Question: Which organism does the DNA sequence AGGGGCAGCAAACACCGGGACACACCCATTCGT
 Workflow:
 Turn 1: Use blast_put(sequence='AGGGGCAGCAAACACCGGGACACACCCATTCGTGCACTAATCAGAAACTTTTTTTTCTCAAATAATTCAAACAATCAAAATTGGTTTTTTCGAGCAAGGTGGGAAATTTTTCGAT', program='blastn', database='nt', megablast=True, hitlist_size=3)
 Result: {"rid": "JKL789MNO"}
-Turn 2: Use blast_get(rid='JKL789MNO', format_type='Text')
+Turn 2: Use blast_get(rid='JKL789MNO', format_type='Text', raw=False)
 Result: (Simulated) BLAST report shows top hits to 'Caenorhabditis elegans' sequences.
 Final Answer:
 {
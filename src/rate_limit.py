@@ -0,0 +1,85 @@
+"""This module contains the token-bucket rate limiter used for NCBI requests."""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    The default capacity of one token spaces requests ``1 / rate`` apart, so
+    no one-second window holds more than ``rate`` of them; a larger capacity
+    allows bursts above the rate. Each request reserves one token; when the
+    bucket is empty the caller is
+    told how long to wait, so concurrent callers are spaced out rather than
+    all sleeping a fixed delay. ``backoff`` pauses refilling, e.g. after an
+    HTTP 429, and drops any saved-up burst.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else 1.0
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._throttled = 0
+        self._wait_seconds = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._last:
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+            self._tokens -= 1
+            ready_at = self._last + max(0.0, -self._tokens) / self.rate
+            wait = max(0.0, ready_at - now)
+            self._acquired += 1
+            self._wait_seconds += wait
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a token is available; return the time spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def backoff(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds``, e.g. after an HTTP 429."""
+        with self._lock:
+            self._throttled += 1
+            self._last = max(self._last, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def stats(self, prefix: str) -> dict:
+        """Return token counts and time spent waiting for tokens."""
+        with self._lock:
+            return {
+                f"{prefix}_rate_per_second": self.rate,
+                f"{prefix}_requests": self._acquired,
+                f"{prefix}_throttled": self._throttled,
+                f"{prefix}_wait_seconds": self._wait_seconds,
+            }
+
+
+def parse_retry_after(value: str | None, default: float) -> float:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, retry_at.timestamp() - time.time())
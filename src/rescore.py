@@ -0,0 +1,250 @@
+"""
+Offline re-scoring of saved results files and a cross-run leaderboard.
+
+Scores every results file in a directory without the LLM, NCBI or an MLflow
+server. The files are read and hashed in parallel. Files whose bytes, and the
+scoring code, are unchanged since the last run get their metrics from the
+score cache. The rest are scored together in one ``scoring.score_many`` pass:
+
+    python -m src.rescore --results-dir results --pattern "geneturing_*.json" \\
+        --baseline geneturing_azure_gpt41_no_tools --metric accuracy
+
+The leaderboard has one row per run and the chosen metric overall and per
+category. With ``--baseline``, a second table shows each run's change against
+that run.
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import json
+import math
+import os
+
+import pandas as pd
+
+from . import metrics, scoring
+from .cache import ToolCache
+
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", ".cache/score_cache.sqlite")
+DEFAULT_RESCORE_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+LEADERBOARD_METRICS = [
+    "accuracy",
+    "partial_match_accuracy",
+    "average_levenshtein_distance",
+]
+LOWER_IS_BETTER = {"average_levenshtein_distance"}
+
+
+def _scorer_fingerprint() -> str:
+    """Hash of the scoring code, so changing a metric invalidates cached scores."""
+    digest = hashlib.sha256()
+    for module in (metrics, scoring):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def run_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _read(path: str) -> tuple[str, bytes, str]:
+    with open(path, "rb") as f:
+        content = f.read()
+    return path, content, hashlib.sha256(content).hexdigest()
+
+
+def _is_results(data) -> bool:
+    return isinstance(data, dict) and all(
+        isinstance(questions, dict)
+        and all(isinstance(details, dict) for details in questions.values())
+        for questions in data.values()
+    )
+
+
+def rescore_files(
+    paths: list[str],
+    cache: ToolCache,
+    max_workers: int = DEFAULT_RESCORE_WORKERS,
+) -> dict[str, dict]:
+    """
+    Return ``{run name: {"path", "sha256", "questions", "metrics"}}`` for every
+    results file in ``paths``, with ``metrics`` as logged by ``log_metrics``.
+    Files that are not results files are skipped with a warning.
+    """
+    fingerprint = _scorer_fingerprint()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        files = list(executor.map(_read, paths))
+
+    scores = {}
+    pending = {}
+    for path, content, file_hash in files:
+        key = hashlib.sha256(f"{fingerprint}:{file_hash}".encode()).hexdigest()
+        cached = cache.get(key, namespace="scores")
+        if cached is not None:
+            scores[run_name(path)] = json.loads(cached)
+            continue
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            print(f"Skipping {path}: not valid JSON ({e})")
+            continue
+        if not _is_results(data):
+            print(f"Skipping {path}: not a results file")
+            continue
+        pending[run_name(path)] = (path, file_hash, key, data)
+
+    summaries = scoring.score_many(
+        {name: data for name, (_, _, _, data) in pending.items()}
+    )
+    for name, (path, file_hash, key, data) in pending.items():
+        scores[name] = {
+            "path": path,
+            "sha256": file_hash,
+            "questions": sum(len(questions) for questions in data.values()),
+            "metrics": summaries[name],
+        }
+        cache.set(key, json.dumps(scores[name]), namespace="scores")
+    return {
+        run_name(path): scores[run_name(path)]
+        for path, _, _ in files
+        if run_name(path) in scores
+    }
+
+
+def leaderboard(scores: dict[str, dict], metric: str = "accuracy") -> pd.DataFrame:
+    """One row per run: ``metric`` overall and per category, best run first."""
+    rows = {}
+    for name, score in scores.items():
+        summary = score["metrics"]
+        # Only this suffix is unambiguous: "partial_match_accuracy" also ends in "_accuracy"
+        suffix = "_average_levenshtein_distance"
+        categories = [key[: -len(suffix)] for key in summary if key.endswith(suffix)]
+        rows[name] = {
+            category: summary[f"{category}_{metric}"] for category in categories
+        }
+    board = pd.DataFrame.from_dict(rows, orient="index", dtype=float)
+    if board.empty:
+        return board
+    board = board[["overall"] + sorted(c for c in board.columns if c != "overall")]
+    return board.sort_values(
+        "overall", ascending=metric in LOWER_IS_BETTER, na_position="last"
+    )
+
+
+def deltas(board: pd.DataFrame, baseline: str) -> pd.DataFrame:
+    """Change of every run against ``baseline``; NaN for categories it lacks."""
+    if baseline not in board.index:
+        raise ValueError(
+            f"Baseline '{baseline}' is not one of the scored runs: {', '.join(board.index)}"
+        )
+    return board - board.loc[baseline]
+
+
+def _without_nan(value):
+    """NaN (e.g. no Levenshtein distance for any row) as null, for strict JSON."""
+    if isinstance(value, dict):
+        return {k: _without_nan(v) for k, v in value.items()}
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-score saved results files and print a cross-run leaderboard."
+    )
+    parser.add_argument(
+        "--results-dir",
+        type=str,
+        default="results",
+        help="Directory with the results JSON files (default: results).",
+    )
+    parser.add_argument(
+        "--pattern",
+        type=str,
+        default="*.json",
+        help="Glob of the results files to score (e.g. 'genehop_*.json').",
+    )
+    parser.add_argument(
+        "--metric",
+        type=str,
+        default="accuracy",
+        choices=LEADERBOARD_METRICS,
+        help="Metric shown in the leaderboard (default: accuracy).",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Run (file name without .json) to show per-category deltas against.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_RESCORE_WORKERS,
+        help="Threads used to read and hash the results files.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=SCORE_CACHE_PATH,
+        help="SQLite file for cached scores, keyed on file hash; empty disables it (default: SCORE_CACHE_PATH or .cache/score_cache.sqlite).",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the scores, leaderboard and deltas as JSON.",
+    )
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.results_dir, args.pattern)))
+    if not paths:
+        parser.error(f"No files match {os.path.join(args.results_dir, args.pattern)}")
+    baseline = run_name(args.baseline) if args.baseline else None
+
+    cache = ToolCache(args.cache_path, ttl_seconds=0, max_entries=10_000)
+    scores = rescore_files(paths, cache, args.workers)
+    stats = cache.stats("score_cache")
+    cache.close()
+    print(
+        f"Scored {len(scores)} runs from {len(paths)} files "
+        f"({stats['score_cache_hits']} cached)"
+    )
+
+    board = leaderboard(scores, args.metric)
+    if baseline and baseline not in board.index:
+        parser.error(f"Baseline '{baseline}' is not one of the scored runs")
+    with pd.option_context(
+        "display.max_columns", None, "display.width", 200, "display.precision", 3
+    ):
+        print(f"\nLeaderboard ({args.metric}):")
+        print(board.to_string())
+        if baseline:
+            change = deltas(board, baseline)
+            print(f"\nChange against {baseline}:")
+            print(change.to_string(float_format=lambda value: f"{value:+.3f}"))
+
+    if args.output:
+        output = {
+            "metric": args.metric,
+            "baseline": baseline,
+            "runs": scores,
+            "leaderboard": board.to_dict(orient="index"),
+        }
+        if baseline:
+            output["deltas"] = deltas(board, baseline).to_dict(orient="index")
+        dir_name = os.path.dirname(args.output)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(_without_nan(output), f, indent=4)
+        print(f"\nSaved leaderboard to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
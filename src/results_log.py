@@ -0,0 +1,92 @@
+"""This module contains the append-only results log used by ``--resume``."""
+
+import json
+import os
+import threading
+
+
+def make_run_key(
+    dataset_path: str, provider: str, model: str, tool_use: bool, web_search: bool
+) -> str:
+    """Identify the run configuration a logged result belongs to."""
+    return json.dumps(
+        {
+            "dataset": os.path.normpath(dataset_path),
+            "provider": provider,
+            "model": model,
+            "tool_use": tool_use,
+            "web_search": web_search,
+        },
+        sort_keys=True,
+    )
+
+
+def default_log_path(output_path: str) -> str:
+    """``results/run.json`` -> ``results/run.jsonl``."""
+    return os.path.splitext(output_path)[0] + ".jsonl"
+
+
+def is_completed(result: dict) -> bool:
+    """Errored questions (ERROR_* predictions) are retried on resume."""
+    prediction = result.get("prediction")
+    return not (isinstance(prediction, str) and prediction.startswith("ERROR_"))
+
+
+class ResultsLog:
+    """
+    One JSON line per finished question, flushed and fsynced as soon as it is
+    written, so a crash loses at most the questions still in flight. Lines
+    from other run configurations and a torn final line are ignored on load.
+    """
+
+    def __init__(self, path: str, run_key: str):
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Start a fresh log for a run that is not resuming."""
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with self._lock, open(self.path, "w", encoding="utf-8"):
+            pass
+
+    def append(self, category: str, question: str, result: dict) -> None:
+        line = json.dumps(
+            {
+                "run": self.run_key,
+                "category": category,
+                "question": question,
+                "result": result,
+            }
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self) -> dict:
+        """Return ``{category: {question: result}}`` of completed questions."""
+        completed: dict[str, dict] = {}
+        if not os.path.exists(self.path):
+            return completed
+        line = "\n"
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash
+                if record.get("run") != self.run_key:
+                    continue
+                category_results = completed.setdefault(record["category"], {})
+                if is_completed(record["result"]):
+                    category_results[record["question"]] = record["result"]
+                else:
+                    category_results.pop(record["question"], None)
+        if not line.endswith("\n"):
+            # Terminate the torn line so the next append starts cleanly
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+        return completed
@@ -0,0 +1,137 @@
+"""
+Cost-aware ordering of the questions of a run.
+
+Questions are started longest-expected-first, so BLAST-bound sequence
+questions are not left as a long tail after the fast categories finish.
+A question's expected wall time is the median duration of the same question
+in earlier traces, else the median of its category in earlier traces, else a
+per-category prior. ``schedule_report`` compares the expectation with the
+traces of the run.
+"""
+
+import glob
+import json
+import os
+import statistics
+
+QUESTION_ORDERS = ("longest_first", "dataset")
+
+# Priors in seconds per question, used until traces of a category exist
+DEFAULT_QUESTION_SECONDS = 15.0
+DEFAULT_CATEGORY_SECONDS = {
+    # BLAST searches take minutes on NCBI
+    "Human genome DNA aligment": 150.0,
+    "Multi-species DNA aligment": 150.0,
+    "sequence gene alias": 150.0,
+}
+
+
+class CostModel:
+    """Expected wall time per question, learned from question traces."""
+
+    def __init__(
+        self,
+        priors: dict[str, float] | None = None,
+        default_seconds: float = DEFAULT_QUESTION_SECONDS,
+    ):
+        self.priors = DEFAULT_CATEGORY_SECONDS if priors is None else priors
+        self.default_seconds = default_seconds
+        self._by_question: dict[tuple[str, str], list[float]] = {}
+        self._by_category: dict[str, list[float]] = {}
+
+    def observe(self, category: str, question: str, seconds: float) -> None:
+        self._by_question.setdefault((category, question), []).append(seconds)
+        self._by_category.setdefault(category, []).append(seconds)
+
+    def load_traces(self, directories: list[str]) -> int:
+        """Learn from the trace files in ``directories``; return how many were read."""
+        count = 0
+        for directory in filter(None, directories):
+            for path in glob.glob(os.path.join(directory, "*.json")):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        trace = json.load(f)
+                    seconds = float(trace["duration_seconds"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                self.observe(trace["category"], trace["question"], seconds)
+                count += 1
+        return count
+
+    def estimate(self, category: str, question: str) -> float:
+        if (category, question) in self._by_question:
+            return statistics.median(self._by_question[(category, question)])
+        if category in self._by_category:
+            return statistics.median(self._by_category[category])
+        return self.priors.get(category, self.default_seconds)
+
+
+def order_questions(
+    questions: list[tuple], cost_model: CostModel, order: str = "longest_first"
+) -> list[tuple]:
+    """
+    Sort ``(category, question, ...)`` tuples longest-expected-first; ties
+    and ``order="dataset"`` keep the dataset order.
+    """
+    if order == "dataset":
+        return list(questions)
+    if order != "longest_first":
+        raise ValueError(f"Invalid question order: {order}")
+    return sorted(questions, key=lambda item: -cost_model.estimate(item[0], item[1]))
+
+
+def simulate_makespan(costs: list[float], workers: int) -> float:
+    """Wall time of starting ``costs`` in order on ``workers`` parallel slots."""
+    free_at = [0.0] * max(1, workers)
+    for cost in costs:
+        slot = free_at.index(min(free_at))
+        free_at[slot] += cost
+    return max(free_at) if costs else 0.0
+
+
+def schedule_report(
+    cost_model: CostModel,
+    dataset_order: list[tuple],
+    traces: list,
+    workers: int,
+    order: str = "longest_first",
+    prefix: str = "schedule",
+) -> dict:
+    """
+    Expected vs actual wall time of the run: the simulated makespan in the
+    chosen and in dataset order, the traced makespan, and the mean expected
+    and actual seconds per question of each category.
+    """
+    if not traces:
+        return {}
+    expected = [cost_model.estimate(c, q) for c, q, *_ in dataset_order]
+    scheduled = [
+        cost_model.estimate(c, q)
+        for c, q, *_ in order_questions(dataset_order, cost_model, order)
+    ]
+    started = min(trace.started_at for trace in traces)
+    finished = max(trace.started_at + trace.duration_seconds for trace in traces)
+    errors = []
+    by_category: dict[str, tuple[list, list]] = {}
+    for trace in traces:
+        estimate = cost_model.estimate(trace.category, trace.question)
+        errors.append(abs(estimate - trace.duration_seconds))
+        expected_seconds, actual_seconds = by_category.setdefault(
+            trace.category, ([], [])
+        )
+        expected_seconds.append(estimate)
+        actual_seconds.append(trace.duration_seconds)
+    report = {
+        f"{prefix}_expected_makespan_seconds": simulate_makespan(scheduled, workers),
+        f"{prefix}_dataset_order_expected_makespan_seconds": simulate_makespan(
+            expected, workers
+        ),
+        f"{prefix}_actual_makespan_seconds": finished - started,
+        f"{prefix}_mean_abs_error_seconds": statistics.fmean(errors),
+    }
+    for category, (expected_seconds, actual_seconds) in by_category.items():
+        report[f"{prefix}_{category}_expected_seconds"] = statistics.fmean(
+            expected_seconds
+        )
+        report[f"{prefix}_{category}_actual_seconds"] = statistics.fmean(actual_seconds)
+    return report
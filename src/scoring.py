@@ -0,0 +1,206 @@
+"""
+Column-wise scoring of results tables.
+
+Computes the same exact match, Levenshtein distance and partial match as
+``src.metrics``, but over whole columns: answers are normalized once,
+Levenshtein distances for string pairs are computed in one batched
+``rapidfuzz.process.cpdist`` call when rapidfuzz is installed, and partial
+matches are counted with an explode/merge over comma-separated items. Rows
+with answer types the batched paths do not cover (e.g. list ground truths for
+exact match) fall back to the ``src.metrics`` functions, so every score
+matches the row-by-row implementation.
+"""
+
+import numpy as np
+import pandas as pd
+from Levenshtein import distance as levenshtein_distance
+
+from . import metrics
+from .metrics import PREDICTION_MAPPER
+
+try:  # Batched, multi-threaded pairwise distances
+    from rapidfuzz.distance import Levenshtein as _RapidfuzzLevenshtein
+    from rapidfuzz.process import cpdist
+except ImportError:  # pragma: no cover - rapidfuzz ships with Levenshtein
+    cpdist = None
+
+TABLE_COLUMNS = [
+    "category",
+    "question",
+    "ground_truth_answer",
+    "thoughts",
+    "prediction",
+    "match",
+    "levenshtein_distance",
+    "partial_match",
+]
+
+
+def results_to_frame(results: dict, source: str | None = None) -> pd.DataFrame:
+    """Flatten ``{category: {question: details}}`` into one row per question."""
+    rows = [
+        {
+            "category": category,
+            "question": question,
+            "ground_truth_answer": details.get("answer"),
+            "thoughts": details.get("thoughts"),
+            "prediction": details.get("prediction"),
+        }
+        for category, questions_answers in results.items()
+        for question, details in questions_answers.items()
+    ]
+    frame = pd.DataFrame(rows, columns=TABLE_COLUMNS[:5])
+    if source is not None:
+        frame.insert(0, "source", source)
+    return frame
+
+
+def _is_str(column: pd.Series) -> np.ndarray:
+    return column.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+
+
+def _fallback(metric, answers: pd.Series, predictions: pd.Series) -> list:
+    scores = []
+    for answer, prediction in zip(answers, predictions):
+        try:
+            scores.append(metric(answer, prediction))
+        except Exception:
+            scores.append(None)
+    return scores
+
+
+def exact_match_column(answers: pd.Series, predictions: pd.Series) -> pd.Series:
+    """``metrics.calculate_exact_match`` for every row."""
+    scores = pd.Series(np.nan, index=answers.index, dtype=object)
+    both_str = _is_str(answers) & _is_str(predictions)
+    mapped = predictions[both_str].map(lambda p: PREDICTION_MAPPER.get(p, p))
+    scores[both_str] = (answers[both_str] == mapped).astype(float)
+    rest = ~both_str
+    scores[rest] = _fallback(
+        metrics.calculate_exact_match, answers[rest], predictions[rest]
+    )
+    return scores
+
+
+def levenshtein_column(answers: pd.Series, predictions: pd.Series) -> pd.Series:
+    """``metrics.calculate_levenshtein_distance`` for every row."""
+    scores = pd.Series(np.nan, index=answers.index, dtype=object)
+    both_str = _is_str(answers) & _is_str(predictions)
+    left, right = answers[both_str].tolist(), predictions[both_str].tolist()
+    if cpdist is not None and left:
+        distances = cpdist(
+            left, right, scorer=_RapidfuzzLevenshtein.distance, workers=-1
+        ).tolist()
+    else:
+        distances = [levenshtein_distance(a, p) for a, p in zip(left, right)]
+    scores[both_str] = distances
+    rest = ~both_str
+    scores[rest] = _fallback(
+        metrics.calculate_levenshtein_distance, answers[rest], predictions[rest]
+    )
+    return scores
+
+
+def _joined(value):
+    """Lists are compared as their comma-joined items, like calculate_partial_match."""
+    if isinstance(value, list):
+        return ",".join(str(item) for item in value)
+    return value
+
+
+def _items(column: pd.Series) -> pd.DataFrame:
+    """One ``(row, item)`` pair per distinct stripped, non-empty item."""
+    items = column.str.split(",").explode().str.strip()
+    items = items[items.notna() & (items != "")]
+    return (
+        pd.DataFrame({"row": items.index, "item": items.to_numpy()})
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+
+
+def partial_match_column(answers: pd.Series, predictions: pd.Series) -> pd.Series:
+    """``metrics.calculate_partial_match`` for every row."""
+    scores = pd.Series(np.nan, index=answers.index, dtype=object)
+    answers_joined = answers.map(_joined)
+    predictions_joined = predictions.map(_joined)
+    supported = (
+        answers_joined.map(lambda v: v is None or isinstance(v, str))
+        & predictions_joined.map(lambda v: v is None or isinstance(v, str))
+    ).to_numpy(dtype=bool)
+
+    gt = answers_joined[supported].fillna("")
+    pred = predictions_joined[supported].fillna("")
+    gt_items, pred_items = _items(gt), _items(pred)
+    gt_counts = gt_items.groupby("row").size()
+    common_counts = gt_items.merge(pred_items, on=["row", "item"]).groupby("row").size()
+    ratio = (common_counts.reindex(gt_counts.index, fill_value=0) / gt_counts).reindex(
+        gt.index, fill_value=0.0
+    )
+    scores[supported] = ratio.astype(float)
+
+    rest = ~supported
+    scores[rest] = _fallback(
+        metrics.calculate_partial_match, answers[rest], predictions[rest]
+    )
+    return scores
+
+
+def score_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add ``match``, ``levenshtein_distance`` and ``partial_match`` columns."""
+    frame = frame.reset_index(drop=True)
+    answers, predictions = frame["ground_truth_answer"], frame["prediction"]
+    # to_numeric gives the dtypes a table built from per-row dicts would have
+    frame["match"] = pd.to_numeric(exact_match_column(answers, predictions))
+    frame["levenshtein_distance"] = pd.to_numeric(
+        levenshtein_column(answers, predictions)
+    )
+    frame["partial_match"] = pd.to_numeric(partial_match_column(answers, predictions))
+    return frame
+
+
+def score_results(results: dict) -> pd.DataFrame | None:
+    """Scored table for one results file, with the columns of create_log_table."""
+    frame = results_to_frame(results)
+    if frame.empty:
+        return None
+    return score_frame(frame)[TABLE_COLUMNS]
+
+
+def summarize_scores(frame: pd.DataFrame) -> dict:
+    """Overall and per-category metrics, as logged by ``reporting.log_metrics``."""
+    scores = frame[["match", "levenshtein_distance", "partial_match"]].astype(float)
+    summary = {
+        "overall_accuracy": scores["match"].mean(),
+        "overall_average_levenshtein_distance": scores["levenshtein_distance"].mean(),
+        "overall_partial_match_accuracy": scores["partial_match"].mean(),
+    }
+    if "category" in frame.columns:
+        by_category = scores.groupby(frame["category"]).mean()
+        for category, row in by_category.iterrows():
+            summary[f"{category}_accuracy"] = row["match"]
+            summary[f"{category}_average_levenshtein_distance"] = row[
+                "levenshtein_distance"
+            ]
+            summary[f"{category}_partial_match_accuracy"] = row["partial_match"]
+    return summary
+
+
+def score_many(results_by_source: dict[str, dict]) -> dict[str, dict]:
+    """
+    Score several results files in one batched pass and return the
+    ``summarize_scores`` metrics of each, keyed like ``results_by_source``.
+    """
+    frames = [
+        results_to_frame(results, source)
+        for source, results in results_by_source.items()
+    ]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return {source: {} for source in results_by_source}
+    scored = score_frame(pd.concat(frames, ignore_index=True))
+    summaries = {
+        source: summarize_scores(group.drop(columns="source"))
+        for source, group in scored.groupby("source", sort=False)
+    }
+    return {source: summaries.get(source, {}) for source in results_by_source}
@@ -0,0 +1,71 @@
+"""This module contains the single-flight layer that shares identical in-flight tool calls."""
+
+import asyncio
+import collections
+import concurrent.futures
+import threading
+from typing import Awaitable, Callable
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call
+    with the same key is in flight wait for it and get the same result (or
+    exception) instead of issuing their own. Nothing is kept after the call
+    finishes; repeated calls are the result cache's job.
+
+    ``do`` serves threads and ``do_async`` serves coroutines on one event
+    loop; calls and shared results are counted per namespace (tool name).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self._inflight_async: dict[str, asyncio.Task] = {}
+        self._calls: collections.Counter = collections.Counter()
+        self._shared: collections.Counter = collections.Counter()
+
+    def do(self, namespace: str, key: str, fn: Callable[[], object]):
+        with self._lock:
+            self._calls[namespace] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+            else:
+                self._shared[namespace] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    async def do_async(
+        self, namespace: str, key: str, fn: Callable[[], Awaitable[object]]
+    ):
+        with self._lock:
+            self._calls[namespace] += 1
+            task = self._inflight_async.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._inflight_async[key] = task
+                task.add_done_callback(lambda _: self._inflight_async.pop(key, None))
+            else:
+                self._shared[namespace] += 1
+        # shield: one caller being cancelled must not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stats(self, prefix: str = "single_flight") -> dict:
+        with self._lock:
+            stats = {f"{prefix}_shared": sum(self._shared.values())}
+            for namespace, calls in self._calls.items():
+                stats[f"{prefix}_{namespace}_calls"] = calls
+                stats[f"{prefix}_{namespace}_shared"] = self._shared[namespace]
+            return stats
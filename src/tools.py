@@ -1,25 +1,95 @@
 """This module contains the tools definitions for the LLM."""
 
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import inspect
+import itertools
 import json
 import os
 import re
-import time
+import sqlite3
 import threading
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
 
 import requests
 from dotenv import load_dotenv
 
+from .adaptive import AdaptiveLimit, outcome_for_status
+from .batching import EsummaryBatcher
+from .blast_backends import (
+    DEFAULT_LOCAL_BLAST_COMMAND,
+    LOCAL_RID_PREFIX,
+    LocalBlastBackend,
+)
+from .blast_hits import parse_blast_xml
+from .blast_jobs import BlastJobManager
+from .cache import ToolCache, make_cache_key
+from .gene_index import GeneIndex
+from .http_session import http_session
+from .projections import ToolProjections
+from .rate_limit import TokenBucket, parse_retry_after
+from .tracing import add_to_span, annotate
 
 load_dotenv()
 
-NCBI_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-BLAST_BASE_URL = "https://blast.ncbi.nlm.nih.gov/blast/Blast.cgi"
+# Overridable so benchmarks/ can point the tools at local mock servers
+NCBI_BASE_URL = os.getenv(
+    "NCBI_BASE_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+)
+BLAST_BASE_URL = os.getenv(
+    "BLAST_BASE_URL", "https://blast.ncbi.nlm.nih.gov/blast/Blast.cgi"
+)
+WEB_SEARCH_URL = "https://duckduckgo.com/"
 NCBI_API_KEY = os.getenv("NCBI_API_KEY")
 
-# NCBI Limits
-NCBI_SEMAPHORE_LIMIT = 10
+# NCBI Limits (requests per second, see NCBI E-utilities usage guidelines)
+NCBI_RATE_LIMIT = float(os.getenv("NCBI_RATE_LIMIT", 10 if NCBI_API_KEY else 3))
 NCBI_TIMEOUT = 60  # Seconds
-NCBI_REQUEST_DELAY = 0.1
+NCBI_MAX_THROTTLE_RETRIES = 3
+NCBI_DEFAULT_BACKOFF = 1.0  # Seconds, used when a 429 has no Retry-After
+DEFAULT_NCBI_CONCURRENCY = 10  # Requests in flight; see NCBI_CONCURRENCY in config.yaml
+
+# BLAST job polling (NCBI asks for at most one status check per RID a minute
+# once a job has been running a while, so intervals back off up to that)
+BLAST_MIN_POLL_INTERVAL = float(os.getenv("BLAST_MIN_POLL_INTERVAL", 10))  # Seconds
+BLAST_MAX_POLL_INTERVAL = float(os.getenv("BLAST_MAX_POLL_INTERVAL", 60))  # Seconds
+BLAST_GET_TIMEOUT = 180  # Seconds blast_get waits before reporting WAITING
+BLAST_MAX_HITS = 25  # Rows in blast_get's compact hit table
+BLAST_XML_CHUNK_SIZE = 64 * 1024  # Bytes of a streamed XML report parsed at a time
+
+# BLAST backend: "remote" (NCBI BLAST URL API) or "local" (BLAST+ executables)
+BLAST_BACKEND = os.getenv("BLAST_BACKEND", "remote")
+BLAST_LOCAL_DB_DIR = os.getenv("BLAST_LOCAL_DB_DIR", "blastdb")
+BLAST_LOCAL_COMMAND = os.getenv("BLAST_LOCAL_COMMAND", DEFAULT_LOCAL_BLAST_COMMAND)
+BLAST_LOCAL_WORKERS = int(os.getenv("BLAST_LOCAL_WORKERS", 2))
+
+# Persistent tool result cache (an empty path disables it)
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", ".cache/tool_cache.sqlite")
+TOOL_CACHE_TTL = int(os.getenv("TOOL_CACHE_TTL", 7 * 24 * 3600))  # Seconds
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", 100_000))
+# Tools whose cached output is trimmed by tool_projections
+PROJECTED_TOOLS = {"esummary_ncbi", "efetch_ncbi"}
+
+# Persistent BLAST report cache keyed on the query sequence
+BLAST_CACHE_PATH = os.getenv("BLAST_CACHE_PATH", ".cache/blast_cache.sqlite")
+BLAST_CACHE_TTL = int(os.getenv("BLAST_CACHE_TTL", 90 * 24 * 3600))  # Seconds
+BLAST_CACHE_MAX_ENTRIES = int(os.getenv("BLAST_CACHE_MAX_ENTRIES", 20_000))
+CACHED_RID_PREFIX = "CACHED-"
+
+# Concurrent esummary calls for the same database within this window are sent
+# as one multi-ID request; 0 disables batching
+ESUMMARY_BATCH_WINDOW = float(os.getenv("ESUMMARY_BATCH_WINDOW", 0.05))  # Seconds
+ESUMMARY_BATCH_MAX_IDS = int(os.getenv("ESUMMARY_BATCH_MAX_IDS", 200))
+
+# Trim esummary/efetch output to the fields the prompts use (see src/projections.py)
+TOOL_PROJECTIONS_ENABLED = os.getenv("TOOL_PROJECTIONS_ENABLED", "1") == "1"
+TOOL_PROJECTIONS_PATH = os.getenv("TOOL_PROJECTIONS_PATH", "")
+
+# Offline gene index built with `python -m src.gene_index`; empty disables it
+GENE_INDEX_PATH = os.getenv("GENE_INDEX_PATH", "")
 
 # --- Azure OpenAI Tool Schema Definition ---
 tools_definition = [
@@ -175,7 +245,7 @@ tools_definition = [
         "type": "function",
         "function": {
             "name": "blast_get",
-            "description": "Retrieves BLAST results using a Request ID (RID). Important: This tool internally waits about 30 seconds before attempting to fetch results.",
+            "description": "Retrieves BLAST results using a Request ID (RID). Important: This tool internally waits until the BLAST job has finished (usually 10-60 seconds) before fetching results.",
             "strict": True,
             "parameters": {
                 "type": "object",
@@ -186,11 +256,16 @@ tools_definition = [
                     },
                     "format_type": {
                         "type": "string",
-                        "description": "Desired format of the results (e.g., 'Text', 'XML', 'JSON').",
+                        "description": "Format of the raw report when raw is true (e.g., 'Text', 'XML', 'JSON').",
                         "default": "Text",
                     },
+                    "raw": {
+                        "type": "boolean",
+                        "description": "If false (recommended), return a compact ranked hit table (accession, description, organism, percent identity, e-value, query/subject coordinates). If true, return the raw report in format_type, which can be very large.",
+                        "default": False,
+                    },
                 },
-                "required": ["rid", "format_type"],
+                "required": ["rid", "format_type", "raw"],
                 "additionalProperties": False,
             },
         },
@@ -223,10 +298,594 @@ tools_definition = [
 
 # --- NCBI E-utils Tool Definitions (Python Functions) ---
 
-# Semaphore to limit concurrent NCBI requests to 10 from multiple threads
-ncbi_semaphore = threading.Semaphore(NCBI_SEMAPHORE_LIMIT)
+# Token bucket shared by all threads, sized to NCBI's per-second limit
+ncbi_rate_limiter = TokenBucket(NCBI_RATE_LIMIT)
+# Requests in flight; adapts to NCBI latency, 429s and errors when configured to
+ncbi_concurrency = AdaptiveLimit("ncbi", DEFAULT_NCBI_CONCURRENCY)
+
+
+def ncbi_request(method: str, url: str, **kwargs):
+    """
+    Send a request to NCBI once a concurrency slot and then a rate-limit
+    token are available. Only the HTTP call is timed for the adaptive limit,
+    and only E-utilities latencies feed it, not BLAST polling.
+    On HTTP 429 the limiter backs off for the server's Retry-After and the
+    request is retried; the last response is returned either way.
+    """
+    timed = url.startswith(NCBI_BASE_URL)
+    for attempt in range(NCBI_MAX_THROTTLE_RETRIES + 1):
+        with ncbi_concurrency.slot():
+            add_to_span("limiter_wait_seconds", ncbi_rate_limiter.acquire())
+            with ncbi_concurrency.observe(timed) as request:
+                response = http_session.request(method, url, **kwargs)
+                request.outcome = outcome_for_status(response.status_code)
+        if response.status_code != 429 or attempt == NCBI_MAX_THROTTLE_RETRIES:
+            return response
+        response.close()  # Free the connection of a streamed response
+        delay = parse_retry_after(
+            response.headers.get("Retry-After"), NCBI_DEFAULT_BACKOFF * 2**attempt
+        )
+        print(f"NCBI rate limit hit (HTTP 429). Backing off for {delay:.1f}s...")
+        ncbi_rate_limiter.backoff(delay)
+    return response
+
+
+def check_blast_status(rid: str) -> tuple[str, str | None]:
+    """Lightweight status check used by the BLAST job manager."""
+    response = ncbi_request(
+        "GET", BLAST_BASE_URL, params=blast_status_params(rid), timeout=NCBI_TIMEOUT
+    )
+    response.raise_for_status()
+    return blast_report_status(response.text, rid)
+
+
+# One manager polls every outstanding RID for all threads and event loops
+blast_jobs = BlastJobManager(
+    check_blast_status, BLAST_MIN_POLL_INTERVAL, BLAST_MAX_POLL_INTERVAL
+)
+
+
+# Used for blast_put when BLAST_BACKEND=local; blast_get dispatches on RID
+local_blast = LocalBlastBackend(
+    BLAST_LOCAL_DB_DIR, BLAST_LOCAL_COMMAND, BLAST_LOCAL_WORKERS
+)
+
+
+def submit_local_blast(put_args: dict) -> str:
+    """Queue a search on the local BLAST backend and return the tool result."""
+    rid = local_blast.submit(put_args)
+    remember_blast_query(rid, put_args)
+    print(f"TOOL RESULT: blast_put queued local search. RID: {rid}")
+    return json.dumps({"rid": rid})
+
+
+def finish_local_blast(
+    rid: str, returncode: int, stdout: str, stderr: str, raw: bool = False
+) -> str:
+    """Turn a finished local BLAST+ run into the same result as blast_get."""
+    if returncode != 0:
+        error_msg = f"Local BLAST job for RID {rid} failed: {stderr.strip()[:500]}"
+        print(f"TOOL RESULT: {error_msg}")
+        return json.dumps({"error": error_msg})
+    return format_blast_report(stdout, rid) if raw else format_blast_hits(stdout, rid)
+
+
+# Shared by all worker threads; results are keyed on the normalized arguments
+tool_cache = ToolCache(TOOL_CACHE_PATH, TOOL_CACHE_TTL, TOOL_CACHE_MAX_ENTRIES)
+
+
+def _is_cacheable(result: str) -> bool:
+    """Cache successful results and definitive empty searches, not failures."""
+    try:
+        data = json.loads(result)
+    except (json.JSONDecodeError, TypeError):
+        return False
+    if isinstance(data, dict) and "error" in data:
+        return data.get("uids") == []
+    return True
+
+
+def cached_tool(func):
+    """
+    Serve a tool from ``tool_cache`` when called with equivalent arguments.
+    Works for both the blocking tools here and their async counterparts,
+    which share cache entries because they share function names; the async
+    ones read and write the SQLite cache off the event loop. Keys of
+    projected tools include the projection settings.
+    """
+    signature = inspect.signature(func)
+
+    def _lookup(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        if func.__name__ in PROJECTED_TOOLS:
+            params["projection"] = tool_projections.fingerprint()
+        key = make_cache_key(func.__name__, params)
+        cached = tool_cache.get(key, namespace=func.__name__)
+        if cached is not None:
+            print(f"TOOL CACHE HIT: {func.__name__} with {dict(bound.arguments)}")
+        annotate(cache="hit" if cached is not None else "miss")
+        return key, cached
+
+    def _store(key, result):
+        if _is_cacheable(result):
+            tool_cache.set(key, result, namespace=func.__name__)
+        return result
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key, cached = await asyncio.to_thread(_lookup, args, kwargs)
+            if cached is not None:
+                return cached
+            return await asyncio.to_thread(_store, key, await func(*args, **kwargs))
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key, cached = _lookup(args, kwargs)
+        if cached is not None:
+            return cached
+        return _store(key, func(*args, **kwargs))
+
+    return wrapper
+
+
+def fetch_esummary_batch(database: str, uids: list[str]) -> dict:
+    """Fetch summaries for a coalesced batch of UIDs in one request."""
+    params = esummary_params(database, ",".join(uids), len(uids))
+    response = ncbi_request(
+        "GET", f"{NCBI_BASE_URL}esummary.fcgi", params=params, timeout=NCBI_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+# Shared by both engines; the batched request runs on a timer thread
+esummary_batcher = EsummaryBatcher(
+    fetch_esummary_batch,
+    window=ESUMMARY_BATCH_WINDOW,
+    max_ids=ESUMMARY_BATCH_MAX_IDS,
+)
+
+
+def can_batch_esummary(uids: list[str], retmax: int) -> bool:
+    """
+    Batching is only equivalent when ``retmax`` would not truncate the call
+    and every ID is a numeric UID; anything else (e.g. a gene symbol) makes
+    NCBI reject the whole multi-ID request.
+    """
+    return (
+        esummary_batcher.enabled
+        and len(uids) <= retmax
+        and all(str(uid).isdigit() for uid in uids)
+    )
+
+
+# --- Offline gene index ---
+
+gene_index = GeneIndex(GENE_INDEX_PATH)
+
+
+def local_gene_esearch(database: str, term: str, retmax: int = 5) -> str | None:
+    """Answer a gene esearch from ``gene_index``, or None to go to NCBI."""
+    if database != "gene" or not gene_index.available:
+        return None
+    try:
+        uids = gene_index.search(term, retmax)
+    except sqlite3.Error as e:
+        print(f"Gene index lookup failed, falling back to NCBI: {e}")
+        return None
+    if not uids:
+        return None
+    print(f"GENE INDEX HIT: esearch_ncbi with term: {term}")
+    return parse_esearch_response({"esearchresult": {"idlist": uids}}, database, term)
+
+
+def local_gene_esummary(database: str, uids: list[str], retmax: int = 5) -> str | None:
+    """Answer a gene esummary from ``gene_index``, or None to go to NCBI."""
+    if database != "gene" or not uids or not gene_index.available:
+        return None
+    try:
+        data = gene_index.summaries(uids)
+    except sqlite3.Error as e:
+        print(f"Gene index lookup failed, falling back to NCBI: {e}")
+        return None
+    if data is None:
+        return None
+    print(f"GENE INDEX HIT: esummary_ncbi with UIDs: {uids}")
+    return parse_esummary_response(data, database, ",".join(uids))
+
+
+def gene_index_first(local_lookup):
+    """
+    Try ``local_lookup`` before the wrapped tool (sync or async). The lookup
+    returns None when the offline gene index cannot answer the call.
+    """
 
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
 
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = local_lookup(*args, **kwargs)
+                if result is not None:
+                    annotate(cache="gene_index")
+                    return result
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = local_lookup(*args, **kwargs)
+            if result is not None:
+                annotate(cache="gene_index")
+                return result
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# --- BLAST report cache ---
+
+# Finished reports, keyed on (sequence hash, program, database, megablast,
+# hitlist_size). blast_put answers a repeated query with a synthetic
+# "CACHED-..." RID that blast_get serves without contacting NCBI.
+blast_cache = ToolCache(BLAST_CACHE_PATH, BLAST_CACHE_TTL, BLAST_CACHE_MAX_ENTRIES)
+
+# Real RIDs submitted in this process, mapped to their job key and arguments
+_blast_submissions: dict[str, tuple[str, dict]] = {}
+_blast_submissions_lock = threading.Lock()
+
+
+def normalize_sequence(sequence: str) -> str:
+    """Drop FASTA headers and whitespace and upper-case the residues."""
+    lines = [line for line in sequence.splitlines() if not line.startswith(">")]
+    return "".join("".join(lines).split()).upper()
+
+
+def blast_job_key(
+    sequence: str, program: str, database: str, megablast: bool, hitlist_size: int
+) -> str:
+    sequence_hash = hashlib.sha256(normalize_sequence(sequence).encode()).hexdigest()
+    return make_cache_key(
+        "blast",
+        {
+            "sequence_sha256": sequence_hash,
+            "program": program,
+            "database": database,
+            "megablast": bool(megablast) and program == "blastn",
+            "hitlist_size": int(hitlist_size),
+        },
+    )
+
+
+def blast_put_cache_hit(put_args: dict) -> str | None:
+    """Return a synthetic RID result if this query has a cached report."""
+    job_key = blast_job_key(**put_args)
+    if blast_cache.get(job_key, namespace="blast_job") is None:
+        return None
+    rid = CACHED_RID_PREFIX + job_key[:20]
+    blast_cache.set(rid, job_key, namespace="blast_rid")
+    print(f"TOOL CACHE HIT: blast_put served from BLAST cache. RID: {rid}")
+    return json.dumps({"rid": rid})
+
+
+def remember_blast_query(rid: str, put_args: dict) -> None:
+    """Remember which query a RID belongs to, so its report can be cached."""
+    with _blast_submissions_lock:
+        _blast_submissions[rid] = (blast_job_key(**put_args), put_args)
+
+
+def register_blast_submission(result: str, response_text: str, put_args: dict):
+    """Track a freshly submitted NCBI RID with the BLAST job manager."""
+    rid = json.loads(result).get("rid")
+    if not rid:
+        return
+    remember_blast_query(rid, put_args)
+    blast_jobs.track(rid, parse_blast_rtoe(response_text))
+
+
+def _blast_job_for_rid(rid: str) -> tuple[str, dict] | None:
+    if rid.startswith(CACHED_RID_PREFIX):
+        job_key = blast_cache.get(rid, namespace="blast_rid")
+        if job_key is None:
+            return None
+        put_args = blast_cache.get(job_key, namespace="blast_job")
+        return (job_key, json.loads(put_args)) if put_args else None
+    with _blast_submissions_lock:
+        return _blast_submissions.get(rid)
+
+
+def cached_blast_get(rid: str, format_type: str) -> str | None:
+    """Return the cached blast_get result for ``rid`` in ``format_type``."""
+    job = _blast_job_for_rid(rid)
+    if job is None:
+        return None
+    result = blast_cache.get(f"{job[0]}:{format_type}", namespace="blast_report")
+    if result is not None:
+        print(f"TOOL CACHE HIT: blast_get served RID {rid} from BLAST cache.")
+    return result
+
+
+def cached_rid_resubmission(rid: str) -> dict | None:
+    """
+    For a synthetic RID whose report is not cached in the requested format,
+    return the blast_put arguments needed to run the search again.
+    """
+    if not rid.startswith(CACHED_RID_PREFIX):
+        return None
+    job = _blast_job_for_rid(rid)
+    return job[1] if job else None
+
+
+def store_blast_report(rid: str, format_type: str, result: str) -> None:
+    """Cache a successful blast_get result under its query's job key."""
+    data = json.loads(result)
+    if "report" not in data and "hits" not in data:
+        return
+    job = _blast_job_for_rid(rid)
+    if job is None:
+        return
+    job_key, put_args = job
+    blast_cache.set(f"{job_key}:{format_type}", result, namespace="blast_report")
+    blast_cache.set(job_key, json.dumps(put_args), namespace="blast_job")
+
+
+# --- Request builders and response parsers shared with src/async_tools.py ---
+
+tool_projections = ToolProjections.from_file(
+    TOOL_PROJECTIONS_PATH, TOOL_PROJECTIONS_ENABLED
+)
+
+
+def esearch_params(database: str, term: str, retmax: int) -> dict:
+    params = {"db": database, "term": term, "retmax": retmax, "retmode": "json"}
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    return params
+
+
+def parse_esearch_response(data: dict, database: str, term: str) -> str:
+    if data.get("esearchresult", {}).get("idlist"):
+        uids = data["esearchresult"]["idlist"]
+        print(f"TOOL RESULT: esearch_ncbi found UIDs: {uids}")
+        return json.dumps({"uids": uids})
+    warning = (
+        data.get("esearchresult", {}).get("warninglist", {}).get("phrasesnotfound", [])
+    )
+    error_detail = f"No UIDs found for term '{term}' in database '{database}'."
+    if warning:
+        error_detail += f" Phrases not found: {', '.join(warning)}"
+    print(f"TOOL RESULT: esearch_ncbi: {error_detail}")
+    return json.dumps({"error": error_detail, "uids": []})
+
+
+def esummary_params(database: str, ids_str: str, retmax: int) -> dict:
+    params = {"db": database, "id": ids_str, "retmax": retmax, "retmode": "json"}
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    return params
+
+
+def parse_esummary_response(data: dict, database: str, ids_str: str) -> str:
+    if "result" in data:
+        # This provides the raw result for the given UIDs.
+        summaries = {
+            k: v for k, v in data["result"].items() if k != "uids"
+        }  # Exclude the 'uids' list if present
+        if not summaries and "uids" in data["result"] and not data["result"]["uids"]:
+            return json.dumps(
+                {
+                    "error": f"No results found for UIDs: {ids_str} in database {database}."
+                }
+            )
+
+        print(
+            f"TOOL RESULT: esummary_ncbi successful for UIDs: {ids_str} in database {database}"
+        )
+        return json.dumps(tool_projections.esummary(database, summaries))
+    print(
+        f"TOOL RESULT: esummary_ncbi found no summary for UIDs: {ids_str} in database {database}"
+    )
+    return json.dumps(
+        {
+            "error": f"No summary found or unexpected format for UIDs {ids_str} in {database}"
+        }
+    )
+
+
+def efetch_params(database: str, ids_str: str, retmode: str, rettype: str) -> dict:
+    params = {"db": database, "id": ids_str, "retmode": retmode}
+    if rettype != "default":
+        params["rettype"] = rettype
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    return params
+
+
+def format_efetch_response(content: str, ids_str: str, database: str = "") -> str:
+    print(
+        f"TOOL RESULT: efetch_ncbi successful for UIDs: {ids_str}. Content length: {len(content)}"
+    )
+    # Return as JSON string with content for consistency, or just content if LLM handles plain text.
+    # For now, let's wrap it to make it clear it's a tool output.
+    return json.dumps({"content": tool_projections.efetch(database, content)})
+
+
+def blast_put_params(
+    sequence: str, program: str, database: str, megablast: bool, hitlist_size: int
+) -> dict:
+    params = {
+        "CMD": "Put",
+        "PROGRAM": program,
+        "DATABASE": database,
+        "QUERY": sequence,
+        "HITLIST_SIZE": str(hitlist_size),
+    }
+    if program == "blastn" and megablast:
+        params["MEGABLAST"] = "on"
+    return params
+
+
+def parse_blast_put_response(text: str) -> str:
+    # Extract RID from the HTML response
+    match = re.search(r"RID = (\w+)", text)
+    if match:
+        rid = match.group(1)
+        print(f"TOOL RESULT: blast_put successful. RID: {rid}")
+        return json.dumps({"rid": rid})
+    # Try to find QBlastInfo if available for more detailed error
+    qblast_info_match = re.search(
+        r"QBlastInfoBegin\s*Message=(.*)\s*QBlastInfoEnd", text, re.DOTALL
+    )
+    if qblast_info_match:
+        error_msg = qblast_info_match.group(1).strip()
+        print(f"TOOL RESULT: blast_put failed. NCBI BLAST Error: {error_msg}")
+        return json.dumps({"error": f"NCBI BLAST Error: {error_msg}"})
+
+    print(f"TOOL RESULT: blast_put failed. Could not parse RID. Response: {text[:500]}")
+    return json.dumps({"error": "Could not parse RID from BLAST response."})
+
+
+def blast_report_status(content: str, rid: str) -> tuple[str, str | None]:
+    """
+    Classify a BLAST Get response as READY, WAITING, FAILED or UNKNOWN.
+    Returns the status and, for FAILED/UNKNOWN, an error message.
+    """
+    if "Status=WAITING" in content or "Status=SEARCHING" in content:
+        return "WAITING", None
+    for status, error_msg in (
+        ("FAILED", f"BLAST job for RID {rid} failed."),
+        ("UNKNOWN", f"BLAST job status for RID {rid} is UNKNOWN."),
+    ):
+        if f"Status={status}" in content:
+            message_match = re.search(r"Message=(.*)", content, re.DOTALL)
+            if message_match:
+                error_msg += (
+                    f" NCBI Message: {message_match.group(1).strip().splitlines()[0]}"
+                )
+            return status, error_msg
+    return "READY", None
+
+
+def format_blast_report(content: str, rid: str) -> str:
+    print(
+        f"TOOL RESULT: blast_get successful for RID: {rid}. Content length: {len(content)}"
+    )
+    return json.dumps({"report": content[:30000]})  # Truncate if very large
+
+
+def blast_hits_error(rid: str, error: ET.ParseError) -> str:
+    print(f"TOOL ERROR: could not parse BLAST XML for RID {rid}: {error}")
+    return json.dumps(
+        {
+            "error": f"Could not parse the BLAST XML report for RID {rid}: {error}. Call blast_get with raw=true to read the report."
+        }
+    )
+
+
+def format_blast_table(table: dict, rid: str) -> str:
+    print(
+        f"TOOL RESULT: blast_get successful for RID: {rid}. Hits: {len(table['hits'])}"
+    )
+    return json.dumps({"rid": rid, **table})
+
+
+def format_blast_hits(content: str | bytes | Iterable[bytes], rid: str) -> str:
+    """Reduce an XML report to the compact hit table blast_get returns by default."""
+    try:
+        table = parse_blast_xml(content, BLAST_MAX_HITS)
+    except ET.ParseError as e:
+        return blast_hits_error(rid, e)
+    return format_blast_table(table, rid)
+
+
+def is_blast_status_page(head: bytes, rid: str) -> bool:
+    """Whether the first chunk of a report is a status page, not the report."""
+    return blast_report_status(head.decode("utf-8", "replace"), rid)[0] != "READY"
+
+
+def blast_get_formats(format_type: str, raw: bool) -> tuple[str, str]:
+    """
+    Return the report format to request and the key to cache the result
+    under: the hit table is built from XML and cached as "hits".
+    """
+    return (format_type, format_type) if raw else ("XML", "hits")
+
+
+def parse_blast_rtoe(text: str) -> int | None:
+    """Return NCBI's estimated seconds to completion from a Put response."""
+    match = re.search(r"RTOE = (\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+def blast_get_params(rid: str, format_type: str) -> dict:
+    return {"CMD": "Get", "RID": rid, "FORMAT_TYPE": format_type}
+
+
+def blast_status_params(rid: str) -> dict:
+    """Status-only request: returns a few lines of SearchInfo, not the report."""
+    return {"CMD": "Get", "RID": rid, "FORMAT_OBJECT": "SearchInfo"}
+
+
+def blast_waiting_response(rid: str) -> str:
+    print(f"TOOL RESULT: blast_get for RID {rid} is still processing.")
+    return json.dumps(
+        {
+            "status": "WAITING",
+            "message": f"BLAST job for RID {rid} is still processing after {BLAST_GET_TIMEOUT} seconds. Try again later.",
+        }
+    )
+
+
+def finish_blast_get(content: str, rid: str, raw: bool = False) -> str:
+    """Turn a fetched report (normally READY) into the tool's JSON result."""
+    status, error_msg = blast_report_status(content, rid)
+    if status == "WAITING":
+        return blast_waiting_response(rid)
+    if status != "READY":
+        print(f"TOOL RESULT: {error_msg}")
+        return json.dumps({"error": error_msg})
+    return format_blast_report(content, rid) if raw else format_blast_hits(content, rid)
+
+
+def finish_streamed_blast_hits(chunks: Iterator[bytes], rid: str) -> str:
+    """
+    ``finish_blast_get`` for the hit table of a streamed XML report: the
+    report is parsed chunk by chunk as it arrives instead of being read into
+    memory first.
+    """
+    head = next(chunks, b"")
+    if is_blast_status_page(head, rid):
+        return finish_blast_get(
+            (head + b"".join(chunks)).decode("utf-8", "replace"), rid
+        )
+    return format_blast_hits(itertools.chain([head], chunks), rid)
+
+
+def parse_web_search_response(data: dict, max_results: int) -> str:
+    results = []
+    for topic in data.get("RelatedTopics", []):
+        if len(results) >= max_results:
+            break
+        if isinstance(topic, dict) and "Text" in topic and "FirstURL" in topic:
+            results.append({"title": topic["Text"], "url": topic["FirstURL"]})
+    print(f"TOOL RESULT: web_search returning {len(results)} results")
+    return json.dumps({"results": results})
+
+
+# --- Blocking tool implementations ---
+
+
+@gene_index_first(local_gene_esearch)
+@cached_tool
 def esearch_ncbi(database: str, term: str, retmax: int = 5) -> str:
     """
     Performs a search on NCBI Eutils for a given term in a specified database.
@@ -235,50 +894,25 @@ def esearch_ncbi(database: str, term: str, retmax: int = 5) -> str:
     print(
         f"TOOL EXECUTING: esearch_ncbi with database: {database}, term: {term}, retmax: {retmax}"
     )
-    with ncbi_semaphore:  # Acquire semaphore
-        time.sleep(NCBI_REQUEST_DELAY)  # Apply delay after acquiring semaphore
-        try:
-            params = {
-                "db": database,
-                "term": term,
-                "retmax": retmax,
-                "retmode": "json",
-            }
-            if NCBI_API_KEY:
-                params["api_key"] = NCBI_API_KEY
-
-            url = f"{NCBI_BASE_URL}esearch.fcgi"
-            response = requests.get(url, params=params, timeout=NCBI_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("esearchresult", {}).get("idlist"):
-                uids = data["esearchresult"]["idlist"]
-                print(f"TOOL RESULT: esearch_ncbi found UIDs: {uids}")
-                return json.dumps({"uids": uids})
-            else:
-                warning = (
-                    data.get("esearchresult", {})
-                    .get("warninglist", {})
-                    .get("phrasesnotfound", [])
-                )
-                error_detail = (
-                    f"No UIDs found for term '{term}' in database '{database}'."
-                )
-                if warning:
-                    error_detail += f" Phrases not found: {', '.join(warning)}"
-                print(f"TOOL RESULT: esearch_ncbi: {error_detail}")
-                return json.dumps({"error": error_detail, "uids": []})
-        except requests.exceptions.RequestException as e:
-            print(f"TOOL ERROR: esearch_ncbi failed: {e}")
-            return json.dumps({"error": str(e)})
-        except json.JSONDecodeError as e:
-            print(f"TOOL ERROR: esearch_ncbi JSON decode failed: {e}")
-            return json.dumps({"error": "Failed to parse NCBI response."})
-        except Exception as e:  # General catch-all
-            print(f"TOOL ERROR: esearch_ncbi unexpected error: {e}")
-            return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+    try:
+        url = f"{NCBI_BASE_URL}esearch.fcgi"
+        params = esearch_params(database, term, retmax)
+        response = ncbi_request("GET", url, params=params, timeout=NCBI_TIMEOUT)
+        response.raise_for_status()
+        return parse_esearch_response(response.json(), database, term)
+    except requests.exceptions.RequestException as e:
+        print(f"TOOL ERROR: esearch_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except json.JSONDecodeError as e:
+        print(f"TOOL ERROR: esearch_ncbi JSON decode failed: {e}")
+        return json.dumps({"error": "Failed to parse NCBI response."})
+    except Exception as e:  # General catch-all
+        print(f"TOOL ERROR: esearch_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
 
 
+@gene_index_first(local_gene_esummary)
+@cached_tool
 def esummary_ncbi(database: str, uids: list[str], retmax: int = 5) -> str:
     """
     Retrieves summaries for a list of UIDs from a specified NCBI Eutils database.
@@ -290,62 +924,27 @@ def esummary_ncbi(database: str, uids: list[str], retmax: int = 5) -> str:
     print(
         f"TOOL EXECUTING: esummary_ncbi with database: {database}, UIDs: {ids_str}, retmax: {retmax}"
     )
-    with ncbi_semaphore:  # Acquire semaphore
-        time.sleep(NCBI_REQUEST_DELAY)  # Apply delay
-        try:
-            params = {
-                "db": database,
-                "id": ids_str,
-                "retmax": retmax,
-                "retmode": "json",
-            }
-            if NCBI_API_KEY:
-                params["api_key"] = NCBI_API_KEY
-
-            url = f"{NCBI_BASE_URL}esummary.fcgi"
-            response = requests.get(url, params=params, timeout=NCBI_TIMEOUT)
-            response.raise_for_status()
-            data = response.json()
-            if "result" in data:
-                # This provides the raw result for the given UIDs.
-                summaries = {
-                    k: v for k, v in data["result"].items() if k != "uids"
-                }  # Exclude the 'uids' list if present
-                if (
-                    not summaries
-                    and "uids" in data["result"]
-                    and not data["result"]["uids"]
-                ):
-                    return json.dumps(
-                        {
-                            "error": f"No results found for UIDs: {ids_str} in database {database}."
-                        }
-                    )
-
-                print(
-                    f"TOOL RESULT: esummary_ncbi successful for UIDs: {ids_str} in database {database}"
-                )
-                return json.dumps(summaries)
-            else:
-                print(
-                    f"TOOL RESULT: esummary_ncbi found no summary for UIDs: {ids_str} in database {database}"
-                )
-                return json.dumps(
-                    {
-                        "error": f"No summary found or unexpected format for UIDs {ids_str} in {database}"
-                    }
-                )
-        except requests.exceptions.RequestException as e:
-            print(f"TOOL ERROR: esummary_ncbi failed: {e}")
-            return json.dumps({"error": str(e)})
-        except json.JSONDecodeError as e:
-            print(f"TOOL ERROR: esummary_ncbi JSON decode failed: {e}")
-            return json.dumps({"error": "Failed to parse NCBI response."})
-        except Exception as e:
-            print(f"TOOL ERROR: esummary_ncbi unexpected error: {e}")
-            return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+    try:
+        if can_batch_esummary(uids, retmax):
+            data = esummary_batcher.submit(database, uids).result()
+            return parse_esummary_response(data, database, ids_str)
+        url = f"{NCBI_BASE_URL}esummary.fcgi"
+        params = esummary_params(database, ids_str, retmax)
+        response = ncbi_request("GET", url, params=params, timeout=NCBI_TIMEOUT)
+        response.raise_for_status()
+        return parse_esummary_response(response.json(), database, ids_str)
+    except requests.exceptions.RequestException as e:
+        print(f"TOOL ERROR: esummary_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except json.JSONDecodeError as e:
+        print(f"TOOL ERROR: esummary_ncbi JSON decode failed: {e}")
+        return json.dumps({"error": "Failed to parse NCBI response."})
+    except Exception as e:
+        print(f"TOOL ERROR: esummary_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
 
 
+@cached_tool
 def efetch_ncbi(
     database: str, uids: list[str], retmode: str = "text", rettype: str = "default"
 ) -> str:
@@ -359,31 +958,46 @@ def efetch_ncbi(
     print(
         f"TOOL EXECUTING: efetch_ncbi with database: {database}, UIDs: {ids_str}, retmode: {retmode}, rettype: {rettype}"
     )
-    with ncbi_semaphore:  # Acquire semaphore
-        time.sleep(NCBI_REQUEST_DELAY)  # Apply delay
-        try:
-            params = {"db": database, "id": ids_str, "retmode": retmode}
-            if rettype != "default":
-                params["rettype"] = rettype
-            if NCBI_API_KEY:
-                params["api_key"] = NCBI_API_KEY
-
-            url = f"{NCBI_BASE_URL}efetch.fcgi"
-            response = requests.get(url, params=params, timeout=2 * NCBI_TIMEOUT)
-            response.raise_for_status()
-            content = response.text
-            print(
-                f"TOOL RESULT: efetch_ncbi successful for UIDs: {ids_str}. Content length: {len(content)}"
-            )
-            # Return as JSON string with content for consistency, or just content if LLM handles plain text.
-            # For now, let's wrap it to make it clear it's a tool output.
-            return json.dumps({"content": content[:20000]})  # Truncate if very large
-        except requests.exceptions.RequestException as e:
-            print(f"TOOL ERROR: efetch_ncbi failed: {e}")
-            return json.dumps({"error": str(e)})
-        except Exception as e:
-            print(f"TOOL ERROR: efetch_ncbi unexpected error: {e}")
-            return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+    try:
+        url = f"{NCBI_BASE_URL}efetch.fcgi"
+        params = efetch_params(database, ids_str, retmode, rettype)
+        response = ncbi_request("GET", url, params=params, timeout=2 * NCBI_TIMEOUT)
+        response.raise_for_status()
+        return format_efetch_response(response.text, ids_str, database)
+    except requests.exceptions.RequestException as e:
+        print(f"TOOL ERROR: efetch_ncbi failed: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        print(f"TOOL ERROR: efetch_ncbi unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+
+def submit_blast_put(
+    sequence: str, program: str, database: str, megablast: bool, hitlist_size: int
+) -> str:
+    """Submit a search to NCBI BLAST and track its RID."""
+    put_args = {
+        "sequence": sequence,
+        "program": program,
+        "database": database,
+        "megablast": megablast,
+        "hitlist_size": hitlist_size,
+    }
+    params = blast_put_params(**put_args)
+    try:
+        response = ncbi_request(
+            "POST", BLAST_BASE_URL, data=params, timeout=2 * NCBI_TIMEOUT
+        )
+        response.raise_for_status()
+        result = parse_blast_put_response(response.text)
+        register_blast_submission(result, response.text, put_args)
+        return result
+    except requests.exceptions.RequestException as e:
+        print(f"TOOL ERROR: blast_put failed: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:
+        print(f"TOOL ERROR: blast_put unexpected error: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
 
 
 def blast_put(
@@ -394,163 +1008,112 @@ def blast_put(
     hitlist_size: int = 10,
 ) -> str:
     """
-    Submits a sequence to NCBI BLAST.
+    Submits a sequence to NCBI BLAST (or the local backend when
+    BLAST_BACKEND=local), unless the same query already has a cached report,
+    in which case a synthetic RID is returned immediately.
     Returns a JSON string with the RID or an error.
     """
     print(
         f"TOOL EXECUTING: blast_put with sequence (first 30 chars): {sequence[:30]}..., program: {program}, database: {database}"
     )
-    params = {
-        "CMD": "Put",
-        "PROGRAM": program,
-        "DATABASE": database,
-        "QUERY": sequence,
-        "HITLIST_SIZE": str(hitlist_size),
+    put_args = {
+        "sequence": sequence,
+        "program": program,
+        "database": database,
+        "megablast": megablast,
+        "hitlist_size": hitlist_size,
     }
-    if program == "blastn" and megablast:
-        params["MEGABLAST"] = "on"
+    cached = blast_put_cache_hit(put_args)
+    if cached is not None:
+        return cached
+    if BLAST_BACKEND == "local":
+        return submit_local_blast(put_args)
+    return submit_blast_put(**put_args)
 
-    with ncbi_semaphore:  # Acquire semaphore
-        time.sleep(NCBI_REQUEST_DELAY)  # Apply delay
-        try:
-            response = requests.post(
-                BLAST_BASE_URL, data=params, timeout=2 * NCBI_TIMEOUT
-            )
-            response.raise_for_status()
-            # Extract RID from the HTML response
-            match = re.search(r"RID = (\w+)", response.text)
-            if match:
-                rid = match.group(1)
-                print(f"TOOL RESULT: blast_put successful. RID: {rid}")
-                return json.dumps({"rid": rid})
-            else:
-                # Try to find QBlastInfo if available for more detailed error
-                qblast_info_match = re.search(
-                    r"QBlastInfoBegin\s*Message=(.*)\s*QBlastInfoEnd",
-                    response.text,
-                    re.DOTALL,
-                )
-                if qblast_info_match:
-                    error_msg = qblast_info_match.group(1).strip()
-                    print(
-                        f"TOOL RESULT: blast_put failed. NCBI BLAST Error: {error_msg}"
-                    )
-                    return json.dumps({"error": f"NCBI BLAST Error: {error_msg}"})
-
-                print(
-                    f"TOOL RESULT: blast_put failed. Could not parse RID. Response: {response.text[:500]}"
-                )
-                return json.dumps({"error": "Could not parse RID from BLAST response."})
-        except requests.exceptions.RequestException as e:
-            print(f"TOOL ERROR: blast_put failed: {e}")
-            return json.dumps({"error": str(e)})
-        except Exception as e:
-            print(f"TOOL ERROR: blast_put unexpected error: {e}")
-            return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+
+def local_blast_get(rid: str, format_type: str, raw: bool = False) -> str:
+    """blast_get for RIDs from the local backend."""
+    report_format, cache_format = blast_get_formats(format_type, raw)
+    job = local_blast.job(rid, report_format)
+    if job is None:
+        return json.dumps({"error": f"Unknown local BLAST RID {rid}."})
+    try:
+        result = finish_local_blast(
+            rid, *job.result(timeout=BLAST_GET_TIMEOUT), raw=raw
+        )
+    except concurrent.futures.TimeoutError:
+        return blast_waiting_response(rid)
+    except Exception as e:
+        print(f"TOOL ERROR: local blast_get failed for RID {rid}: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
+    store_blast_report(rid, cache_format, result)
+    return result
 
 
-def blast_get(rid: str, format_type: str = "Text") -> str:
+def blast_get(rid: str, format_type: str = "Text", raw: bool = False) -> str:
     """
     Retrieves BLAST results using a Request ID (RID).
-    Waits 30 seconds before attempting to fetch results, as per NCBI guidelines,
-    and then retries twice if the job is still processing.
-    Returns a JSON string with the BLAST report or an error.
+    Cached reports are returned immediately and local RIDs are served by the
+    local backend. Otherwise waits on the shared BLAST job manager until the
+    job has finished (at most BLAST_GET_TIMEOUT seconds), then fetches the
+    report once and caches it.
+    Returns a JSON string with a compact ranked hit table (parsed from the
+    XML report), the raw report in ``format_type`` if ``raw``, or an error.
     """
-    print(f"TOOL EXECUTING: blast_get with RID: {rid}, format_type: {format_type}")
-    print("Initial 30-second wait for BLAST results as per NCBI guidelines...")
-    time.sleep(30)  # Initial wait
+    print(
+        f"TOOL EXECUTING: blast_get with RID: {rid}, format_type: {format_type}, raw: {raw}"
+    )
+    report_format, cache_format = blast_get_formats(format_type, raw)
+    cached = cached_blast_get(rid, cache_format)
+    if cached is not None:
+        return cached
+    put_args = cached_rid_resubmission(rid)
+    if put_args is not None:
+        print(f"Cached RID {rid} has no {cache_format} result; resubmitting search.")
+        if BLAST_BACKEND == "local":
+            submitted = json.loads(submit_local_blast(put_args))
+        else:
+            submitted = json.loads(submit_blast_put(**put_args))
+        if "rid" not in submitted:
+            return json.dumps(submitted)
+        rid = submitted["rid"]
+    if rid.startswith(LOCAL_RID_PREFIX):
+        return local_blast_get(rid, format_type, raw)
 
-    max_retries = 3  # Initial attempt + 2 retries
-    attempt_delay = 30  # Seconds to wait between retries
+    try:
+        status, error_msg = blast_jobs.track(rid).result(timeout=BLAST_GET_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        return blast_waiting_response(rid)
+    if status != "READY":
+        print(f"TOOL RESULT: {error_msg}")
+        return json.dumps({"error": error_msg})
 
-    for attempt in range(max_retries):
-        print(
-            f"Attempt {attempt + 1} of {max_retries} to fetch BLAST results for RID {rid}..."
+    try:
+        response = ncbi_request(
+            "GET",
+            BLAST_BASE_URL,
+            params=blast_get_params(rid, report_format),
+            timeout=4 * NCBI_TIMEOUT,
+            stream=True,
         )
-        params = {"CMD": "Get", "RID": rid, "FORMAT_TYPE": format_type}
-        with ncbi_semaphore:  # Acquire semaphore
-            time.sleep(NCBI_REQUEST_DELAY)  # Apply delay
-            try:
-                response = requests.get(
-                    BLAST_BASE_URL, params=params, timeout=4 * NCBI_TIMEOUT
-                )  # Increased timeout
-                response.raise_for_status()
-                content = response.text
-
-                if "Status=WAITING" in content or "Status=SEARCHING" in content:
-                    print(
-                        f"TOOL RESULT: blast_get for RID {rid} is still processing (Attempt {attempt + 1})."
-                    )
-                    if attempt < max_retries - 1:
-                        print(
-                            f"Waiting for {attempt_delay} seconds before next attempt..."
-                        )
-                        time.sleep(attempt_delay)
-                        continue  # Go to next attempt
-                    else:
-                        return json.dumps(
-                            {
-                                "status": "WAITING",
-                                "message": f"BLAST job for RID {rid} is still processing after {max_retries} attempts. Try again later.",
-                            }
-                        )
-
-                if "Status=FAILED" in content:
-                    error_msg = f"BLAST job for RID {rid} failed."
-                    message_match = re.search(r"Message=(.*)", content, re.DOTALL)
-                    if message_match:
-                        error_msg += f" NCBI Message: {message_match.group(1).strip().splitlines()[0]}"
-                    print(f"TOOL RESULT: {error_msg}")
-                    return json.dumps({"error": error_msg})
-
-                if "Status=UNKNOWN" in content:
-                    error_msg = f"BLAST job status for RID {rid} is UNKNOWN."
-                    message_match = re.search(r"Message=(.*)", content, re.DOTALL)
-                    if message_match:
-                        error_msg += f" NCBI Message: {message_match.group(1).strip().splitlines()[0]}"
-                    print(f"TOOL RESULT: {error_msg} (Attempt {attempt + 1})")
-                    if (
-                        attempt < max_retries - 1
-                    ):  # Allow one retry for UNKNOWN within the loop
-                        print(
-                            f"Waiting for {attempt_delay} seconds before retrying UNKNOWN status..."
-                        )
-                        time.sleep(attempt_delay)
-                        continue
-                    return json.dumps(
-                        {"error": error_msg + " after multiple attempts."}
-                    )
-
-                print(
-                    f"TOOL RESULT: blast_get successful for RID: {rid}. Content length: {len(content)}"
-                )
-                return json.dumps({"report": content[:30000]})  # Truncate if very large
-            except requests.exceptions.RequestException as e:
-                print(
-                    f"TOOL ERROR: blast_get failed for RID {rid} on attempt {attempt + 1}: {e}"
-                )
-                if attempt < max_retries - 1:
-                    time.sleep(attempt_delay)
-                    continue
-                return json.dumps({"error": str(e)})
-            except Exception as e:  # General catch-all
-                print(
-                    f"TOOL ERROR: blast_get unexpected error for RID {rid} on attempt {attempt + 1}: {e}"
+        try:
+            response.raise_for_status()
+            if raw:
+                result = finish_blast_get(response.text, rid, raw)
+            else:
+                result = finish_streamed_blast_hits(
+                    response.iter_content(BLAST_XML_CHUNK_SIZE), rid
                 )
-                if attempt < max_retries - 1:
-                    time.sleep(attempt_delay)
-                    continue
-                return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
-        # Release semaphore implicitly at the end of 'with' block
-
-    # This part should ideally not be reached if logic above is correct,
-    # but serves as a fallback if all retries are exhausted and status was still WAITING/SEARCHING.
-    return json.dumps(
-        {
-            "status": "TIMEOUT_OR_MAX_RETRIES",
-            "message": f"BLAST job for RID {rid} did not complete after {max_retries} attempts. Please try again later.",
-        }
-    )
+        finally:
+            response.close()
+        store_blast_report(rid, cache_format, result)
+        return result
+    except requests.exceptions.RequestException as e:
+        print(f"TOOL ERROR: blast_get failed for RID {rid}: {e}")
+        return json.dumps({"error": str(e)})
+    except Exception as e:  # General catch-all
+        print(f"TOOL ERROR: blast_get unexpected error for RID {rid}: {e}")
+        return json.dumps({"error": f"An unexpected error occurred: {str(e)}"})
 
 
 def web_search(query: str, max_results: int = 5) -> str:
@@ -558,17 +1121,9 @@ def web_search(query: str, max_results: int = 5) -> str:
     print(f"TOOL EXECUTING: web_search with query: {query}, max_results: {max_results}")
     params = {"q": query, "format": "json", "no_redirect": 1, "no_html": 1}
     try:
-        response = requests.get("https://duckduckgo.com/", params=params, timeout=10)
+        response = http_session.get(WEB_SEARCH_URL, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        results = []
-        for topic in data.get("RelatedTopics", []):
-            if len(results) >= max_results:
-                break
-            if isinstance(topic, dict) and "Text" in topic and "FirstURL" in topic:
-                results.append({"title": topic["Text"], "url": topic["FirstURL"]})
-        print(f"TOOL RESULT: web_search returning {len(results)} results")
-        return json.dumps({"results": results})
+        return parse_web_search_response(response.json(), max_results)
     except Exception as e:
         print(f"TOOL ERROR: web_search failed: {e}")
         return json.dumps({"error": str(e)})
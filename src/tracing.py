@@ -0,0 +1,224 @@
+"""This module records per-question traces of LLM turns and tool calls."""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+# The question being traced and the span currently open in this thread/task.
+# Tool threads get a copy of the caller's context, asyncio tasks inherit it.
+_current_trace: contextvars.ContextVar["QuestionTrace | None"] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_current_span: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def default_trace_dir(output_path: str) -> str:
+    """``results/run.json`` -> ``results/run.traces``."""
+    return os.path.splitext(output_path)[0] + ".traces"
+
+
+def annotate(**fields) -> None:
+    """Set fields on the open span, e.g. ``annotate(cache="hit")``; no-op outside one."""
+    span = _current_span.get()
+    if span is not None:
+        span.update(fields)
+
+
+def add_to_span(field: str, amount: float) -> None:
+    """Add ``amount`` to a numeric field of the open span, e.g. rate-limiter waits."""
+    span = _current_span.get()
+    if span is not None:
+        span[field] = span.get(field, 0) + amount
+
+
+def llm_usage(response) -> dict:
+    """Token usage and finish reason of a chat completion response."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+        "finish_reason": getattr(response.choices[0], "finish_reason", None),
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class QuestionTrace:
+    """Spans recorded while answering one question."""
+
+    def __init__(self, category: str, question: str):
+        self.category = category
+        self.question = question
+        self.started_at = time.time()
+        self.duration_seconds: float | None = None
+        self.spans: list[dict] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def offset(self) -> float:
+        return time.perf_counter() - self._start
+
+    def add(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self) -> None:
+        self.duration_seconds = self.offset()
+        with self._lock:
+            self.spans.sort(key=lambda span: span["start_seconds"])
+
+    def totals(self) -> dict:
+        """Per-question sums used for the per-category roll-up."""
+        llm = [span for span in self.spans if span["kind"] == "llm"]
+        tools = [span for span in self.spans if span["kind"] == "tool"]
+        return {
+            "question_seconds": self.duration_seconds or 0.0,
+            "llm_seconds": sum(span["latency_seconds"] for span in llm),
+            "tool_seconds": sum(span["latency_seconds"] for span in tools),
+            "limiter_wait_seconds": sum(
+                span.get("limiter_wait_seconds", 0.0) for span in tools
+            ),
+            "llm_calls": len(llm),
+            "tool_calls": len(tools),
+            "prompt_tokens": sum(span.get("prompt_tokens") or 0 for span in llm),
+            "completion_tokens": sum(
+                span.get("completion_tokens") or 0 for span in llm
+            ),
+            "cached_tokens": sum(span.get("cached_tokens") or 0 for span in llm),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "category": self.category,
+            "question": self.question,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration_seconds,
+            "totals": self.totals(),
+            "spans": self.spans,
+        }
+
+
+class Tracer:
+    """
+    Collects a ``QuestionTrace`` per question and, when a directory is
+    configured, writes each one to its own JSON file as soon as the question
+    finishes. ``stats`` rolls the traces up into per-category p50/p95 latency
+    and token metrics for MLflow.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._traces: list[QuestionTrace] = []
+
+    def configure(self, directory: str | None) -> None:
+        """Set the directory trace files are written to (None keeps them in memory)."""
+        self.directory = directory
+
+    def path_for(self, category: str, question: str) -> str:
+        digest = hashlib.sha256(f"{category}\n{question}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest[:24]}.json")
+
+    def traces(self) -> list[QuestionTrace]:
+        """Finished question traces of this run."""
+        with self._lock:
+            return list(self._traces)
+
+    def reset(self) -> None:
+        """Drop traces recorded so far and trace files left by earlier runs."""
+        with self._lock:
+            self._traces = []
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".json.tmp")):
+                os.remove(os.path.join(self.directory, name))
+
+    @contextlib.contextmanager
+    def question(self, category: str, question: str):
+        """Trace every span opened while answering ``question``."""
+        trace = QuestionTrace(category, question)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            with self._lock:
+                self._traces.append(trace)
+            if self.directory:
+                self._write(trace)
+
+    @contextlib.contextmanager
+    def span(self, kind: str, name: str, **fields):
+        """
+        Time a ``"llm"`` or ``"tool"`` span of the current question. The
+        yielded dict can be filled in by the caller, and by ``annotate`` /
+        ``add_to_span`` from code running inside it.
+        """
+        trace = _current_trace.get()
+        span = {"kind": kind, "name": name, **fields}
+        if trace is None:
+            yield span
+            return
+        span["start_seconds"] = trace.offset()
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span["error"] = str(e)
+            raise
+        finally:
+            span["latency_seconds"] = time.perf_counter() - start
+            _current_span.reset(token)
+            trace.add(span)
+
+    def _write(self, trace: QuestionTrace) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(trace.category, trace.question)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(trace.to_dict(), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def stats(self, prefix: str = "trace") -> dict:
+        """Per-category p50/p95 of per-question latency and token totals."""
+        with self._lock:
+            traces = list(self._traces)
+        by_category: dict[str, list[dict]] = {}
+        for trace in traces:
+            by_category.setdefault(trace.category, []).append(trace.totals())
+        stats = {}
+        for category, totals in by_category.items():
+            stats[f"{prefix}_{category}_questions"] = len(totals)
+            for field in (
+                "question_seconds",
+                "llm_seconds",
+                "tool_seconds",
+                "limiter_wait_seconds",
+                "prompt_tokens",
+                "completion_tokens",
+                "cached_tokens",
+            ):
+                values = [total[field] for total in totals]
+                stats[f"{prefix}_{category}_{field}_p50"] = percentile(values, 50)
+                stats[f"{prefix}_{category}_{field}_p95"] = percentile(values, 95)
+        return stats
+
+
+# One tracer for every question of the run, sync and async
+tracer = Tracer()
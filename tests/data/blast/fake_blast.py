@@ -0,0 +1,50 @@
+"""Stand-in for a BLAST+ executable, used by tests/test_blast_backends.py.
+
+Reads the query FASTA on stdin and reports every subject in ``<db>.fasta``
+that contains the query, as BLAST XML for ``-outfmt 5`` and otherwise one
+tab-separated line per hit (``-outfmt 6``-like).
+"""
+
+import argparse
+import sys
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-db", required=True)
+parser.add_argument("-outfmt", default="0")
+args, _ = parser.parse_known_args()
+
+query = "".join(line.strip() for line in sys.stdin if not line.startswith(">"))
+if not query:
+    sys.exit("fake_blast: empty query")
+
+with open(f"{args.db}.fasta", encoding="utf-8") as f:
+    records = f.read().split(">")[1:]
+hits = []
+for record in records:
+    header, *lines = record.splitlines()
+    subject = "".join(lines)
+    start = subject.find(query)
+    if start >= 0:
+        hits.append((header.split()[0], header, start + 1, start + len(query)))
+
+if args.outfmt == "5":
+    print('<?xml version="1.0"?>\n<BlastOutput>')
+    print("<BlastOutput_program>blastn</BlastOutput_program>")
+    print(f"<BlastOutput_db>{args.db}</BlastOutput_db>")
+    print(f"<BlastOutput_query-len>{len(query)}</BlastOutput_query-len>")
+    print("<BlastOutput_iterations><Iteration><Iteration_hits>")
+    for subject_id, header, start, end in hits:
+        print(
+            f"<Hit><Hit_def>{header}</Hit_def><Hit_accession>{subject_id}</Hit_accession>"
+            f"<Hit_hsps><Hsp><Hsp_bit-score>{2 * len(query)}</Hsp_bit-score>"
+            f"<Hsp_evalue>0</Hsp_evalue><Hsp_query-from>1</Hsp_query-from>"
+            f"<Hsp_query-to>{len(query)}</Hsp_query-to><Hsp_hit-from>{start}</Hsp_hit-from>"
+            f"<Hsp_hit-to>{end}</Hsp_hit-to><Hsp_identity>{len(query)}</Hsp_identity>"
+            f"<Hsp_align-len>{len(query)}</Hsp_align-len></Hsp></Hit_hsps></Hit>"
+        )
+    print("</Iteration_hits></Iteration></BlastOutput_iterations>\n</BlastOutput>")
+else:
+    for subject_id, header, start, end in hits:
+        print(
+            f"query\t{subject_id}\t100.000\t{len(query)}\t0\t0\t1\t{len(query)}\t{start}\t{end}\t0.0\t{2 * len(query)}"
+        )
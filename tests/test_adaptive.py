@@ -0,0 +1,174 @@
+import asyncio
+import contextlib
+import threading
+import time
+from types import SimpleNamespace
+
+from src.adaptive import AdaptiveLimit, outcome_for_exception, outcome_for_status
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_successes_raise_the_limit_additively_up_to_the_maximum():
+    limit = AdaptiveLimit("llm", 2, max_limit=4, adaptive=True)
+
+    for _ in range(3):  # 2 -> 2.5 -> 2.9 -> 3.24
+        limit.record(0.1)
+    assert limit.limit == 3
+    for _ in range(20):
+        limit.record(0.1)
+
+    assert limit.limit == 4
+    assert [value for _, value in limit.history()] == [2, 3, 4]
+
+
+def test_throttling_halves_the_limit_once_per_round():
+    limit = AdaptiveLimit("llm", 8, max_limit=16, adaptive=True)
+    limit.record(10.0)
+
+    limit.record(None, "throttled")
+    limit.record(None, "error")
+
+    assert limit.limit == 4
+    stats = limit.stats("llm")
+    assert stats["llm_limit_decreases"] == 1
+    assert stats["llm_throttled"] == 1
+    assert stats["llm_errors"] == 1
+
+
+def test_rising_latency_lowers_the_limit():
+    limit = AdaptiveLimit(
+        "ncbi", 8, max_limit=16, adaptive=True, latency_tolerance=2.0, warmup=5
+    )
+    for _ in range(5):
+        limit.record(0.01)
+    before = limit.limit
+
+    for _ in range(20):
+        limit.record(0.5)
+
+    assert limit.limit < before
+
+
+def test_fixed_limit_ignores_observations():
+    limit = AdaptiveLimit("ncbi", 3)
+    limit.record(0.1)
+    limit.record(None, "throttled")
+
+    assert limit.limit == 3
+    assert limit.stats("ncbi")["ncbi_requests"] == 2
+
+
+def test_observe_classifies_outcomes():
+    limit = AdaptiveLimit("llm", 4)
+    with limit.observe() as request:
+        request.outcome = outcome_for_status(503)
+    try:
+        with limit.observe():
+            raise RateLimitError()
+    except RateLimitError:
+        pass
+
+    stats = limit.stats("llm")
+    assert (stats["llm_errors"], stats["llm_throttled"]) == (1, 1)
+    assert outcome_for_status(200) == "ok"
+    assert outcome_for_exception(ValueError()) == "error"
+
+
+def test_untimed_observations_leave_the_latency_signal_alone():
+    limit = AdaptiveLimit("ncbi", 4)
+    with limit.observe(timed=False):
+        time.sleep(0.01)
+
+    stats = limit.stats("ncbi")
+    assert stats["ncbi_requests"] == 1
+    assert stats["ncbi_latency_ewma_seconds"] == 0.0
+
+
+def test_ncbi_requests_take_a_token_inside_the_slot_and_time_the_call(monkeypatch):
+    from src import tools
+
+    events = []
+
+    class FakeLimit:
+        @contextlib.contextmanager
+        def slot(self):
+            events.append("slot")
+            yield
+
+        @contextlib.contextmanager
+        def observe(self, timed=True):
+            events.append(("observe", timed))
+            yield SimpleNamespace(outcome="ok")
+
+    monkeypatch.setattr(tools, "ncbi_concurrency", FakeLimit())
+    monkeypatch.setattr(
+        tools.ncbi_rate_limiter, "acquire", lambda: events.append("token") or 0.0
+    )
+    monkeypatch.setattr(
+        tools.http_session,
+        "request",
+        lambda method, url, **kwargs: SimpleNamespace(status_code=200, headers={}),
+    )
+
+    tools.ncbi_request("GET", f"{tools.NCBI_BASE_URL}esearch.fcgi")
+    tools.ncbi_request("GET", "https://blast.ncbi.nlm.nih.gov/Blast.cgi")
+
+    # Tokens are spent as requests go out, so queued callers do not burst
+    assert events == [
+        "slot",
+        "token",
+        ("observe", True),
+        "slot",
+        "token",
+        ("observe", False),
+    ]
+
+
+def test_slots_bound_threads_and_tasks():
+    limit = AdaptiveLimit("conversations", 2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with limit.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+    async def run_tasks():
+        running, most = [0], [0]
+
+        async def task():
+            async with limit.async_slot():
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+                await asyncio.sleep(0.01)
+                running[0] -= 1
+
+        await asyncio.gather(*(task() for _ in range(6)))
+        return most[0]
+
+    assert asyncio.run(run_tasks()) == 2
+    assert limit.stats("c")["c_peak_in_flight"] == 2
+
+
+def test_configure_resets_the_limit():
+    limit = AdaptiveLimit("conversations", 10)
+    limit.configure(limit=5, max_limit=20, adaptive=True)
+    assert (limit.limit, limit.max_limit) == (5, 20)
+
+    limit.configure(limit=7, adaptive=False)
+    assert (limit.limit, limit.max_limit) == (7, 7)
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from src import async_engine
+
+
+def _message(content=None, tool_calls=None):
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=content, tool_calls=tool_calls)
+            )
+        ]
+    )
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, messages, tools, tool_choice):
+        self.calls += 1
+        if messages[-1]["role"] == "tool":
+            answer = json.loads(messages[-1]["content"])["uids"][0]
+            return _message(content=json.dumps({"thoughts": "t", "answer": answer}))
+        call = SimpleNamespace(
+            id="call_1",
+            type="function",
+            function=SimpleNamespace(
+                name="esearch_ncbi",
+                arguments=json.dumps(
+                    {"database": "gene", "term": messages[-1]["content"], "retmax": 1}
+                ),
+            ),
+        )
+        return _message(tool_calls=[call])
+
+
+class _FakeClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_FakeCompletions())
+
+    async def close(self):
+        pass
+
+
+def test_process_dataset_async_runs_tool_conversations(monkeypatch):
+    client = _FakeClient()
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_esearch(database, term, retmax=5):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return json.dumps({"uids": [term.upper()]})
+
+    monkeypatch.setattr(async_engine, "get_async_client", lambda provider: client)
+    monkeypatch.setitem(
+        async_engine.ASYNC_AVAILABLE_FUNCTIONS, "esearch_ncbi", fake_esearch
+    )
+
+    dataset = {"Gene alias": {f"q{i}": f"Q{i}" for i in range(20)}}
+    config = {"ASYNC_LLM_CONCURRENCY": 8, "ASYNC_TOOL_CONCURRENCY": 4}
+    results = asyncio.run(
+        async_engine.process_dataset_async(
+            "azure", "gpt-4.1", dataset, True, False, config, 5, 1, 0
+        )
+    )
+
+    assert results["Gene alias"]["q3"]["prediction"] == "Q3"
+    assert results["Gene alias"]["q3"]["answer"] == "Q3"
+    assert client.chat.completions.calls == 40
+    assert 1 < in_flight["max"] <= 4
+
+
+def test_blocking_writes_run_off_the_event_loop(monkeypatch):
+    client = _FakeClient()
+    loop_thread = threading.get_ident()
+    threads = []
+
+    class _Recorder:
+        def __init__(self, name):
+            self.name = name
+
+        def __getattr__(self, method):
+            def record(*args, **kwargs):
+                threads.append((f"{self.name}.{method}", threading.get_ident()))
+
+            return record
+
+    async def fake_esearch(database, term, retmax=5):
+        return json.dumps({"uids": [term]})
+
+    monkeypatch.setattr(async_engine, "get_async_client", lambda provider: client)
+    monkeypatch.setitem(
+        async_engine.ASYNC_AVAILABLE_FUNCTIONS, "esearch_ncbi", fake_esearch
+    )
+    checkpoints = _Recorder("checkpoints")
+    checkpoints.load = lambda question: None
+
+    asyncio.run(
+        async_engine.process_dataset_async(
+            "azure",
+            "gpt-4.1",
+            {"Gene alias": {"q0": "Q0"}},
+            True,
+            False,
+            {},
+            5,
+            1,
+            0,
+            results_log=_Recorder("results_log"),
+            checkpoints=checkpoints,
+        )
+    )
+
+    names = {name for name, _ in threads}
+    assert {"checkpoints.save", "checkpoints.clear", "results_log.append"} <= names
+    assert all(thread != loop_thread for _, thread in threads)
@@ -0,0 +1,151 @@
+import concurrent.futures
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src import tools
+from src.batching import EsummaryBatcher, split_esummary_result
+from src.cache import ToolCache
+from src.projections import ToolProjections
+
+
+def fake_esummary(ids: list[str]) -> dict:
+    return {
+        "header": {"type": "esummary"},
+        "result": {
+            "uids": ids,
+            **{uid: {"uid": uid, "name": f"G{uid}"} for uid in ids},
+        },
+    }
+
+
+def test_split_matches_single_request():
+    batched = split_esummary_result(fake_esummary(["1", "2", "3"]), ["3", "1"])
+    assert batched == fake_esummary(["3", "1"])
+
+
+def test_concurrent_calls_share_one_request():
+    requests_made = []
+
+    def fetch(database, ids):
+        requests_made.append((database, ids))
+        return fake_esummary(ids)
+
+    batcher = EsummaryBatcher(fetch, window=0.2)
+    futures = [batcher.submit("gene", [str(uid)]) for uid in range(5)]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert requests_made == [("gene", ["0", "1", "2", "3", "4"])]
+    assert results[2] == fake_esummary(["2"])
+    assert batcher.stats()["esummary_batch_callers_per_request"] == 5
+
+
+def test_full_batch_flushes_early_and_errors_reach_every_caller():
+    def fetch(database, ids):
+        raise RuntimeError("NCBI down")
+
+    batcher = EsummaryBatcher(fetch, window=60, max_ids=2)
+    first = batcher.submit("gene", ["1"])
+    second = batcher.submit("gene", ["2"])
+    for future in (first, second):
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_one_invalid_uid_does_not_fail_the_other_callers():
+    requests_made = []
+
+    def fetch(database, ids):
+        requests_made.append(ids)
+        if "0" in ids:  # NCBI rejects the whole request
+            return {"header": {}, "esummaryresult": ["Invalid uid 0"], "error": "x"}
+        return fake_esummary(ids)
+
+    batcher = EsummaryBatcher(fetch, window=0.2)
+    futures = [batcher.submit("gene", [uid]) for uid in ["1", "0", "2"]]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert requests_made[0] == ["1", "0", "2"]
+    assert results[0] == fake_esummary(["1"])
+    assert "error" in results[1]
+    assert results[2] == fake_esummary(["2"])
+    assert batcher.stats()["esummary_batch_fallbacks"] == 1
+
+
+def test_full_batch_is_not_fetched_on_the_submitting_thread():
+    fetch_threads = []
+
+    def fetch(database, ids):
+        fetch_threads.append(threading.get_ident())
+        return fake_esummary(ids)
+
+    batcher = EsummaryBatcher(fetch, window=60, max_ids=2)
+    batcher.submit("gene", ["1"])
+    future = batcher.submit("gene", ["2"])
+
+    assert future.result(timeout=5) == fake_esummary(["2"])
+    assert fetch_threads and threading.get_ident() not in fetch_threads
+
+
+def test_symbols_are_not_batched():
+    assert (
+        tools.can_batch_esummary(["672", "7157"], 5) == tools.esummary_batcher.enabled
+    )
+    assert not tools.can_batch_esummary(["672", "BRCA1"], 5)
+
+
+def test_esummary_tool_output_is_unchanged_by_batching(tmp_path, monkeypatch):
+    requests_made = []
+
+    def fake_ncbi_request(method, url, **kwargs):
+        ids = kwargs["params"]["id"].split(",")
+        requests_made.append(ids)
+        return SimpleNamespace(
+            json=lambda: fake_esummary(ids), raise_for_status=lambda: None
+        )
+
+    monkeypatch.setattr(tools, "ncbi_request", fake_ncbi_request)
+    monkeypatch.setattr(
+        tools, "tool_cache", ToolCache(str(tmp_path / "tools.sqlite"), 60, 100)
+    )
+    monkeypatch.setattr(tools.esummary_batcher, "window", 0.2)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(
+            executor.map(
+                lambda uids: tools.esummary_ncbi("snp", uids),
+                [["7"], ["8", "9"], ["7"]],
+            )
+        )
+
+    assert len(requests_made) == 1
+    # snp documents are projected down to the fields the prompts use
+    assert json.loads(results[1]) == {"8": {"uid": "8"}, "9": {"uid": "9"}}
+    assert results[0] == results[2]
+
+
+def test_cached_esummary_follows_projection_settings(tmp_path, monkeypatch):
+    requests_made = []
+
+    def fake_ncbi_request(method, url, **kwargs):
+        ids = kwargs["params"]["id"].split(",")
+        requests_made.append(ids)
+        return SimpleNamespace(
+            json=lambda: fake_esummary(ids), raise_for_status=lambda: None
+        )
+
+    monkeypatch.setattr(tools, "ncbi_request", fake_ncbi_request)
+    monkeypatch.setattr(
+        tools, "tool_cache", ToolCache(str(tmp_path / "tools.sqlite"), 60, 100)
+    )
+    monkeypatch.setattr(tools.esummary_batcher, "window", 0)
+
+    projected = tools.esummary_ncbi("snp", ["7"])
+    monkeypatch.setattr(tools, "tool_projections", ToolProjections(enabled=False))
+    unprojected = tools.esummary_ncbi("snp", ["7"])
+
+    assert len(requests_made) == 2
+    assert json.loads(projected) == {"7": {"uid": "7"}}
+    assert json.loads(unprojected) == {"7": {"uid": "7", "name": "G7"}}
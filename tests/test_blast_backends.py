@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from src import tools
+from src.blast_backends import LOCAL_RID_PREFIX, LocalBlastBackend
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "blast")
+QUERY = "GGACAGCTGAGATCACATCAAGGATTCCAGAAAGAATTGGCACAGG"
+
+
+def _put_args(database="tiny", program="blastn"):
+    return {
+        "sequence": QUERY,
+        "program": program,
+        "database": database,
+        "megablast": True,
+        "hitlist_size": 5,
+    }
+
+
+def test_build_command_fills_placeholders():
+    backend = LocalBlastBackend("/dbs")
+    argv = backend.build_command(_put_args(), "XML")
+    assert argv == [
+        "blastn",
+        "-task",
+        "megablast",
+        "-db",
+        os.path.join("/dbs", "tiny"),
+        "-outfmt",
+        "5",
+        "-max_target_seqs",
+        "5",
+    ]
+
+
+def test_local_backend_through_blast_tools(tmp_path, monkeypatch):
+    # fake_blast.py stands in for BLAST+ and greps tiny.fasta, so this test
+    # covers the plumbing only. The next test runs real BLAST+ if installed.
+    command = f"{sys.executable} {os.path.join(DATA_DIR, 'fake_blast.py')} -db {{db}} -outfmt {{outfmt}}"
+    backend = LocalBlastBackend(DATA_DIR, command, max_workers=1)
+    monkeypatch.setattr(tools, "BLAST_BACKEND", "local")
+    monkeypatch.setattr(tools, "local_blast", backend)
+    monkeypatch.setattr(tools.blast_cache, "path", "")
+    try:
+        rid = json.loads(tools.blast_put(QUERY, "blastn", "tiny", True, 5))["rid"]
+        assert rid.startswith(LOCAL_RID_PREFIX)
+        report = json.loads(tools.blast_get(rid, "Text", raw=True))["report"]
+        assert "chr10_fragment" in report
+        assert "SLC38A6_fragment" not in report
+        hits = json.loads(tools.blast_get(rid, "Text"))["hits"]
+        assert [hit["accession"] for hit in hits] == ["chr10_fragment"]
+        assert hits[0]["percent_identity"] == 100.0
+        error = json.loads(tools.blast_get(f"{LOCAL_RID_PREFIX}NOPE", "Text"))
+        assert "error" in error
+    finally:
+        backend.shutdown()
+
+
+@pytest.mark.skipif(
+    not (shutil.which("blastn") and shutil.which("makeblastdb")),
+    reason="BLAST+ is not installed",
+)
+def test_local_backend_with_blast_plus(tmp_path):
+    subprocess.run(
+        [
+            "makeblastdb",
+            "-in",
+            os.path.join(DATA_DIR, "tiny.fasta"),
+            "-dbtype",
+            "nucl",
+            "-out",
+            str(tmp_path / "tiny"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    backend = LocalBlastBackend(str(tmp_path), max_workers=1)
+    try:
+        rid = backend.submit(_put_args())
+        returncode, stdout, stderr = backend.job(rid, "Tabular").result(timeout=120)
+        assert returncode == 0, stderr
+        assert stdout.split("\t")[1] == "chr10_fragment"
+    finally:
+        backend.shutdown()
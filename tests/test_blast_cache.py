@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src import tools
+from src.blast_jobs import BlastJobManager
+from src.cache import ToolCache
+
+
+@pytest.fixture
+def fake_blast(tmp_path, monkeypatch):
+    requests_made = []
+
+    def fake_ncbi_request(method, url, **kwargs):
+        params = kwargs.get("params") or kwargs.get("data")
+        requests_made.append(params["CMD"])
+        if params["CMD"] == "Put":
+            text = f"    RID = RID{len(requests_made)}\n    RTOE = 0\n"
+        elif params.get("FORMAT_OBJECT") == "SearchInfo":
+            text = "Status=READY\nThereAreHits=yes\n"
+        elif params["FORMAT_TYPE"] == "XML":
+            text = (
+                "<BlastOutput><BlastOutput_iterations><Iteration><Iteration_hits>"
+                f"<Hit><Hit_accession>{params['RID']}</Hit_accession></Hit>"
+                "</Iteration_hits></Iteration></BlastOutput_iterations></BlastOutput>"
+            )
+        else:
+            text = f"BLASTN report for {params['RID']}"
+        return SimpleNamespace(
+            text=text,
+            iter_content=lambda size: iter(
+                [text[:size].encode(), text[size:].encode()]
+            ),
+            raise_for_status=lambda: None,
+            close=lambda: None,
+        )
+
+    monkeypatch.setattr(tools, "ncbi_request", fake_ncbi_request)
+    monkeypatch.setattr(
+        tools, "blast_cache", ToolCache(str(tmp_path / "blast.sqlite"), 0, 100)
+    )
+    monkeypatch.setattr(
+        tools,
+        "blast_jobs",
+        BlastJobManager(tools.check_blast_status, min_interval=0.01),
+    )
+    return requests_made
+
+
+def test_repeated_sequence_is_served_from_cache(fake_blast):
+    rid = json.loads(tools.blast_put("ACGT ACGT", "blastn", "nt", True, 5))["rid"]
+    report = json.loads(tools.blast_get(rid, "Text", raw=True))["report"]
+    assert report == f"BLASTN report for {rid}"
+    assert fake_blast == ["Put", "Get", "Get"]
+
+    cached_rid = json.loads(tools.blast_put(">q\nacgtacgt\n", "blastn", "nt", True, 5))[
+        "rid"
+    ]
+    assert cached_rid.startswith(tools.CACHED_RID_PREFIX)
+    assert json.loads(tools.blast_get(cached_rid, "Text", True))["report"] == report
+    assert fake_blast == ["Put", "Get", "Get"]
+
+
+def test_different_search_parameters_are_not_shared(fake_blast):
+    rid = json.loads(tools.blast_put("ACGT", "blastn", "nt", True, 5))["rid"]
+    tools.blast_get(rid, "Text")
+    other = json.loads(tools.blast_put("ACGT", "blastn", "nt", True, 10))["rid"]
+    assert not other.startswith(tools.CACHED_RID_PREFIX)
+
+
+def test_cached_rid_in_new_format_resubmits(fake_blast):
+    rid = json.loads(tools.blast_put("ACGT", "blastn", "nt", True, 5))["rid"]
+    tools.blast_get(rid, "Text", raw=True)
+    cached_rid = json.loads(tools.blast_put("ACGT", "blastn", "nt", True, 5))["rid"]
+    result = json.loads(tools.blast_get(cached_rid, "Text"))
+    assert result["hits"][0]["accession"] not in (rid, cached_rid)
+    assert fake_blast.count("Put") == 2
+    assert json.loads(tools.blast_get(cached_rid, "Text")) == result
+    assert fake_blast.count("Put") == 2
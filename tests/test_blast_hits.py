@@ -0,0 +1,55 @@
+import os
+
+from src.blast_hits import BlastHitParser, parse_blast_xml
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "data", "blast", "sample_report.xml")
+
+
+def test_parse_blast_xml_returns_ranked_hits():
+    with open(SAMPLE, "rb") as f:
+        table = parse_blast_xml(f.read(), max_hits=10)
+
+    assert table["program"] == "blastn"
+    assert table["database"] == "nt"
+    assert table["query_length"] == 136
+    first, second = table["hits"]
+    assert first == {
+        "rank": 1,
+        "accession": "NC_000010",
+        "description": "Homo sapiens chromosome 10, GRCh38.p14 Primary Assembly",
+        "organism": "Homo sapiens",
+        "percent_identity": 100.0,
+        "evalue": 1.2e-62,
+        "bit_score": 252.052,
+        "query_start": 1,
+        "query_end": 136,
+        "subject_start": 7531973,
+        "subject_end": 7532108,
+    }
+    assert second["organism"] == "Pan troglodytes"
+    assert second["percent_identity"] == 94.83
+    assert (second["subject_start"], second["subject_end"]) == (300, 185)
+
+
+def test_parse_blast_xml_limits_hits_and_handles_no_hits():
+    with open(SAMPLE, encoding="utf-8") as f:
+        assert len(parse_blast_xml(f.read(), max_hits=1)["hits"]) == 1
+    empty = "<BlastOutput><BlastOutput_iterations><Iteration><Iteration_message>No hits found</Iteration_message></Iteration></BlastOutput_iterations></BlastOutput>"
+    assert parse_blast_xml(empty, max_hits=5)["hits"] == []
+
+
+def test_chunked_report_matches_whole_report_and_drops_read_hits():
+    with open(SAMPLE, "rb") as f:
+        content = f.read()
+    chunks = [content[i : i + 50] for i in range(0, len(content), 50)]
+
+    assert parse_blast_xml(iter(chunks), max_hits=10) == parse_blast_xml(
+        content, max_hits=10
+    )
+
+    parser = BlastHitParser(max_hits=10)
+    for chunk in chunks[:-1]:
+        parser.feed(chunk)
+    root = parser._open[0]
+    assert len(parser.hits) == 2
+    assert list(root.iter("Hit")) == []
@@ -0,0 +1,48 @@
+import time
+
+from src.blast_jobs import BlastJobManager
+
+
+def test_job_resolves_as_soon_as_ready():
+    polls = []
+
+    def check_status(rid):
+        polls.append(rid)
+        return ("READY", None) if len(polls) >= 2 else ("WAITING", None)
+
+    manager = BlastJobManager(check_status, min_interval=0.05, max_interval=0.1)
+    start = time.monotonic()
+    assert manager.track("RID1").result(timeout=5) == ("READY", None)
+    assert time.monotonic() - start < 1.0
+    assert polls == ["RID1", "RID1"]
+
+    # Finished jobs are remembered and not polled again.
+    assert manager.track("RID1").result(timeout=0) == ("READY", None)
+    assert len(polls) == 2
+    assert manager.stats()["blast_jobs_completed"] == 1
+
+
+def test_concurrent_callers_share_one_job():
+    calls = []
+
+    def check_status(rid):
+        calls.append(rid)
+        return "FAILED", f"BLAST job for RID {rid} failed."
+
+    manager = BlastJobManager(check_status, min_interval=0.01, max_interval=0.01)
+    futures = [manager.track("RID2") for _ in range(3)]
+    assert all(f is futures[0] for f in futures)
+    assert futures[0].result(timeout=5)[0] == "FAILED"
+    assert calls == ["RID2"]
+
+
+def test_repeated_status_errors_fail_the_job():
+    def check_status(rid):
+        raise ConnectionError("boom")
+
+    manager = BlastJobManager(
+        check_status, min_interval=0.01, max_interval=0.01, max_errors=2
+    )
+    status, message = manager.track("RID3").result(timeout=5)
+    assert status == "FAILED"
+    assert "boom" in message
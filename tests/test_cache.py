@@ -0,0 +1,54 @@
+from src import cache
+from src.cache import ToolCache, make_cache_key
+
+
+def test_cache_key_is_normalized():
+    a = make_cache_key("esearch_ncbi", {"database": "gene", "term": " BRCA1 "})
+    b = make_cache_key("esearch_ncbi", {"term": "brca1", "database": "Gene"})
+    assert a == b
+    assert a != make_cache_key("esearch_ncbi", {"database": "snp", "term": "brca1"})
+
+
+def test_cache_key_keeps_the_case_of_case_sensitive_arguments():
+    a = make_cache_key("blast_get", {"rid": "ABC123", "format_type": "Text"})
+    b = make_cache_key("blast_get", {"rid": "abc123", "format_type": "text"})
+    assert a != b
+    assert make_cache_key("efetch_ncbi", {"database": "Gene", "rettype": "FASTA"}) != (
+        make_cache_key("efetch_ncbi", {"database": "gene", "rettype": "fasta"})
+    )
+
+
+def test_cache_hit_miss_and_stats(tmp_path):
+    tool_cache = ToolCache(str(tmp_path / "cache.sqlite"), 3600, 10)
+    assert tool_cache.get("k", namespace="esearch_ncbi") is None
+    tool_cache.set("k", '{"uids": ["1"]}', namespace="esearch_ncbi")
+    assert tool_cache.get("k", namespace="esearch_ncbi") == '{"uids": ["1"]}'
+    stats = tool_cache.stats()
+    assert stats["tool_cache_hits"] == 1
+    assert stats["tool_cache_misses"] == 1
+    assert stats["tool_cache_esearch_ncbi_hits"] == 1
+
+
+def test_cache_ttl_expiry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    tool_cache = ToolCache(str(tmp_path / "cache.sqlite"), 60, 10)
+    tool_cache.set("k", "v")
+    now[0] += 61
+    assert tool_cache.get("k") is None
+
+
+def test_cache_lru_eviction(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    tool_cache = ToolCache(str(tmp_path / "cache.sqlite"), 0, 2)
+    for key in ("a", "b"):
+        now[0] += 1
+        tool_cache.set(key, key)
+    now[0] += 1
+    assert tool_cache.get("a") == "a"  # "b" is now least recently used
+    now[0] += 1
+    tool_cache.set("c", "c")
+    assert tool_cache.get("b") is None
+    assert tool_cache.get("a") == "a"
+    assert tool_cache.get("c") == "c"
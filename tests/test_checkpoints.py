@@ -0,0 +1,117 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src import llm_interface
+from src.checkpoints import (
+    ConversationCheckpoints,
+    outstanding_blast_rids,
+    pending_tool_calls,
+)
+
+
+class Crash(BaseException):
+    pass
+
+
+def _call(call_id, name, **arguments):
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def _tool(call_id, name, content):
+    return {
+        "role": "tool",
+        "tool_call_id": call_id,
+        "name": name,
+        "content": json.dumps(content),
+    }
+
+
+def test_pending_tool_calls_and_outstanding_rids():
+    messages = [
+        {"role": "user", "content": "q"},
+        {"role": "assistant", "tool_calls": [_call("1", "blast_put", sequence="A")]},
+        _tool("1", "blast_put", {"rid": "R1"}),
+        {
+            "role": "assistant",
+            "tool_calls": [
+                _call("2", "blast_get", rid="R1"),
+                _call("3", "esearch_ncbi", database="gene", term="TP53"),
+            ],
+        },
+        _tool("2", "blast_get", {"status": "WAITING"}),
+    ]
+    assert [c["id"] for c in pending_tool_calls(messages)] == ["3"]
+    assert outstanding_blast_rids(messages) == ["R1"]
+
+    messages.append(_tool("3", "esearch_ncbi", {"uids": ["7157"]}))
+    messages.append(
+        {"role": "assistant", "tool_calls": [_call("4", "blast_get", rid="R1")]}
+    )
+    messages.append(_tool("4", "blast_get", {"report": "hits"}))
+    assert pending_tool_calls(messages) == []
+    assert outstanding_blast_rids(messages) == []
+
+
+class _FakeClient:
+    def __init__(self, crash_after_tools=False):
+        self.calls = 0
+        self.crash_after_tools = crash_after_tools
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, tools, tool_choice):
+        self.calls += 1
+        if messages[-1]["role"] == "tool":
+            if self.crash_after_tools:
+                raise Crash()
+            answer = json.loads(messages[-1]["content"])["uids"][0]
+            content = json.dumps({"thoughts": "t", "answer": answer})
+            message = SimpleNamespace(content=content, tool_calls=None)
+        else:
+            call = _call("call_1", "esearch_ncbi", database="gene", term="TP53")
+            message = SimpleNamespace(
+                content=None,
+                tool_calls=[
+                    SimpleNamespace(
+                        id=call["id"],
+                        type="function",
+                        function=SimpleNamespace(**call["function"]),
+                    )
+                ],
+            )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_restarted_conversation_continues_from_last_turn(tmp_path, monkeypatch):
+    tool_runs = []
+
+    def fake_esearch(database, term, retmax=5):
+        tool_runs.append(term)
+        return json.dumps({"uids": ["7157"]})
+
+    monkeypatch.setitem(llm_interface.AVAILABLE_FUNCTIONS, "esearch_ncbi", fake_esearch)
+    checkpoints = ConversationCheckpoints(str(tmp_path), "run")
+
+    with pytest.raises(Crash):
+        llm_interface.call_llm_with_tools(
+            _FakeClient(crash_after_tools=True), "m", "q", 5, 1, 0, False, checkpoints
+        )
+    state = checkpoints.load("q")
+    assert state.turn == 1 and state.pending_tool_calls == []
+
+    client = _FakeClient()
+    response = llm_interface.call_llm_with_tools(
+        client, "m", "q", 5, 1, 0, False, checkpoints
+    )
+    assert response.answer == "7157"
+    assert client.calls == 1
+    assert tool_runs == ["TP53"]
+
+    checkpoints.clear("q")
+    assert not os.listdir(tmp_path)
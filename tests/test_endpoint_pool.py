@@ -0,0 +1,254 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src import llm_interface
+from src.endpoint_pool import EndpointPool
+from src.llm_budget import LLMBudgets
+
+
+class _ServerError(Exception):
+    status_code = 500
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+def _response(model):
+    return SimpleNamespace(
+        model=model,
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12),
+    )
+
+
+class _FakeClient:
+    def __init__(self, name, calls, fail_with=None):
+        self.closed = False
+
+        def create(**kwargs):
+            calls.append((name, kwargs["model"]))
+            if fail_with is not None:
+                raise fail_with
+            return _response(kwargs["model"])
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(specs, calls, failing=(), error=_ServerError, cooldown=30):
+    pool = EndpointPool()
+    pool.configure(
+        specs,
+        lambda spec, is_async: _FakeClient(
+            spec["name"], calls, error() if spec["name"] in failing else None
+        ),
+        cooldown,
+    )
+    return pool
+
+
+def test_requests_follow_weights_and_report_usage():
+    calls = []
+    pool = _pool([{"name": "a", "weight": 2}, {"name": "b"}], calls)
+    client = pool.wrap(is_async=False)
+
+    for _ in range(6):
+        client.chat.completions.create(model="gpt-4.1", messages=[])
+
+    assert [name for name, _ in calls].count("a") == 4
+    stats = pool.stats()
+    assert stats["llm_endpoint_a_requests"] == 4
+    assert stats["llm_endpoint_b_requests"] == 2
+    assert stats["llm_endpoint_b_prompt_tokens"] == 20
+    assert stats["llm_endpoint_b_errors"] == 0
+
+
+def test_least_loaded_endpoint_is_chosen():
+    pool = _pool([{"name": "a"}, {"name": "b"}], [])
+    busy = pool.acquire()
+    assert pool.acquire().name != busy.name
+
+
+def test_failing_endpoint_is_ejected_and_request_fails_over():
+    calls = []
+    pool = _pool([{"name": "a"}, {"name": "b"}], calls, failing={"a"})
+    client = pool.wrap(is_async=False)
+
+    for _ in range(3):
+        client.chat.completions.create(model="gpt-4.1", messages=[])
+
+    # "a" failed once and then sat out its cooldown
+    assert [name for name, _ in calls] == ["a", "b", "b", "b"]
+    stats = pool.stats()
+    assert stats["llm_endpoint_a_ejections"] == 1
+    assert stats["llm_endpoint_b_requests"] == 3
+
+
+def test_ejected_endpoint_returns_after_cooldown():
+    calls = []
+    pool = _pool([{"name": "a"}, {"name": "b"}], calls, failing={"a"}, cooldown=0)
+    client = pool.wrap(is_async=False)
+
+    client.chat.completions.create(model="gpt-4.1", messages=[])
+    client.chat.completions.create(model="gpt-4.1", messages=[])
+
+    assert [name for name, _ in calls].count("a") == 2
+
+
+def test_request_errors_are_not_retried_elsewhere():
+    calls = []
+    pool = _pool(
+        [{"name": "a"}, {"name": "b"}], calls, failing={"a", "b"}, error=_BadRequest
+    )
+
+    with pytest.raises(_BadRequest):
+        pool.wrap(is_async=False).chat.completions.create(model="m", messages=[])
+
+    assert len(calls) == 1
+    assert pool.stats()["llm_endpoint_a_ejections"] == 0
+
+
+def test_all_endpoints_failing_raises_the_last_error():
+    calls = []
+    pool = _pool([{"name": "a"}, {"name": "b"}], calls, failing={"a", "b"})
+
+    with pytest.raises(_ServerError):
+        pool.wrap(is_async=False).chat.completions.create(model="m", messages=[])
+
+    assert sorted(name for name, _ in calls) == ["a", "b"]
+
+
+def test_deployment_names_are_mapped_per_endpoint():
+    calls = []
+    pool = _pool([{"name": "a", "models": {"gpt-4.1": "gpt41-eu"}}], calls)
+
+    response = pool.wrap(is_async=False).chat.completions.create(
+        model="gpt-4.1", messages=[]
+    )
+
+    assert response.model == "gpt41-eu"
+
+
+def test_duplicate_endpoint_names_are_rejected():
+    with pytest.raises(ValueError):
+        _pool([{"name": "a"}, {"name": "a"}], [])
+
+
+def test_each_endpoint_is_paced_on_its_own_quota():
+    calls = []
+    budgets = LLMBudgets()
+    # One request per 10-second window and deployment
+    budgets.configure({"gpt-4.1": {"tpm": 1_000_000, "rpm": 6}}, headroom=1.0)
+    pool = EndpointPool()
+    pool.configure(
+        [{"name": "a"}, {"name": "b", "models": {"gpt-4.1": "gpt41-eu"}}],
+        lambda spec, is_async: budgets.wrap(
+            _FakeClient(spec["name"], calls), endpoint=spec
+        ),
+        delay=lambda spec, deployment: budgets.delay(deployment, spec),
+    )
+    client = pool.wrap(is_async=False)
+
+    client.chat.completions.create(model="gpt-4.1", messages=[])
+    client.chat.completions.create(model="gpt-4.1", messages=[])
+
+    # The second request skips "a", whose window is full, instead of waiting
+    assert calls == [("a", "gpt-4.1"), ("b", "gpt41-eu")]
+    stats = budgets.stats()
+    assert stats["llm_budget_a_gpt_4_1_requests"] == 1
+    assert stats["llm_budget_b_gpt41_eu_requests"] == 1
+    assert stats["llm_budget_b_gpt41_eu_wait_seconds"] == 0
+    assert budgets.delay("gpt-4.1", {"name": "a"}) > 0
+
+
+def test_endpoint_rate_limits_override_the_model_quota():
+    budgets = LLMBudgets()
+    budgets.configure({"gpt-4.1": {"tpm": 1000, "rpm": 6}})
+    spec = {"name": "big", "rate_limits": {"gpt-4.1": {"tpm": 9000, "rpm": 60}}}
+
+    assert budgets.budget("gpt-4.1", spec).tpm == 9000
+    assert budgets.budget("gpt-4.1", {"name": "small"}).tpm == 1000
+    assert budgets.budget("qwen3:4b", {"name": "small"}) is None
+
+
+def test_async_client_fails_over():
+    calls = []
+
+    def factory(spec, is_async):
+        async def create(**kwargs):
+            calls.append(spec["name"])
+            if spec["name"] == "a":
+                raise _ServerError()
+            return _response(kwargs["model"])
+
+        return SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+    pool = EndpointPool()
+    pool.configure([{"name": "a"}, {"name": "b"}], factory)
+    client = pool.wrap(is_async=True)
+
+    response = asyncio.run(client.chat.completions.create(model="m", messages=[]))
+
+    assert client.is_async
+    assert response.model == "m"
+    assert calls == ["a", "b"]
+
+
+def test_cancelled_request_does_not_leak_in_flight():
+    def factory(spec, is_async):
+        async def create(**kwargs):
+            await asyncio.sleep(10)
+
+        return SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+    pool = EndpointPool()
+    pool.configure([{"name": "a"}], factory)
+    client = pool.wrap(is_async=True)
+
+    async def cancel():
+        task = asyncio.ensure_future(
+            client.chat.completions.create(model="m", messages=[])
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+
+    endpoint = pool.endpoints[0]
+    assert endpoint.in_flight == 0
+    assert endpoint.errors == endpoint.ejections == 0
+
+
+def test_get_client_uses_configured_endpoints(monkeypatch):
+    monkeypatch.setenv("OLLAMA_API_KEY", "ollama")
+    monkeypatch.setattr(llm_interface, "llm_endpoints", {"ollama": EndpointPool()})
+    monkeypatch.setattr(llm_interface, "PROVIDERS", ("ollama",))
+    llm_interface.configure_endpoints(
+        {
+            "ollama": [
+                {"name": "gpu1", "endpoint": "http://gpu1:11434/v1"},
+                {"name": "gpu2", "endpoint": "http://gpu2:11434/v1"},
+            ]
+        }
+    )
+    pool = llm_interface.llm_endpoints["ollama"]
+
+    client = llm_interface.get_client("ollama")
+
+    assert client.chat.completions.create._pool is pool
+    assert [str(e.client(False).base_url) for e in pool.endpoints] == [
+        "http://gpu1:11434/v1/",
+        "http://gpu2:11434/v1/",
+    ]
+    # Failures go straight to the pool instead of being retried by the SDK
+    assert {e.client(False).max_retries for e in pool.endpoints} == {0}
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src import async_tools, tools
+from src.gene_index import GeneIndex, build_gene_index, parse_search_term
+
+GENE_INFO = str(Path(__file__).parent / "data" / "gene" / "sample.gene_info")
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "genes.sqlite")
+    assert build_gene_index([GENE_INFO], path) == 4
+    return GeneIndex(path)
+
+
+def test_search_by_symbol_alias_ensembl_and_gene_id(index):
+    assert index.search("SLC38A6", 5) == ["145389"]
+    assert index.search("snat6", 5) == ["145389"]
+    assert index.search("ENSG00000205220", 5) == ["5699"]
+    assert index.search("5699", 5) == ["5699"]
+
+
+def test_search_ranks_human_first_and_filters_organism(index):
+    assert index.search("LMP10", 5) == ["5699", "19171"]
+    assert index.search("PSMB10 AND mouse[orgn]", 5) == ["19171"]
+    assert index.search("LMP10[sym]", 5) == []
+
+
+def test_unsupported_queries_are_left_to_ncbi(index):
+    assert parse_search_term("PSMB10 OR PSMB9") is None
+    assert parse_search_term("kinase[title]") is None
+    assert index.search("PSMB10 AND Bos taurus[orgn]", 5) is None
+
+
+def test_summaries_match_esummary_shape(index):
+    data = index.summaries(["5699"])
+    summary = data["result"]["5699"]
+    assert data["result"]["uids"] == ["5699"]
+    assert summary["name"] == "PSMB10"
+    assert summary["otheraliases"] == "LMP10, MECL1, PRAAS5, beta2i"
+    assert summary["maplocation"] == "16q22.1"
+    assert summary["mim"] == ["176847"]
+    assert summary["organism"]["scientificname"] == "Homo sapiens"
+    assert index.summaries(["5699", "1"]) is None
+
+
+def test_tools_answer_gene_database_from_index(index, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("NCBI should not be called")
+
+    monkeypatch.setattr(tools, "gene_index", index)
+    monkeypatch.setattr(tools, "ncbi_request", no_network)
+    monkeypatch.setattr(async_tools, "ncbi_request_async", no_network)
+
+    assert json.loads(tools.esearch_ncbi("gene", "SNAT6")) == {"uids": ["145389"]}
+    summary = json.loads(tools.esummary_ncbi("gene", ["145389"]))
+    assert summary["145389"]["chromosome"] == "14"
+    result = asyncio.run(async_tools.esearch_ncbi("gene", "FAM66D"))
+    assert json.loads(result) == {"uids": ["100506258"]}
@@ -0,0 +1,50 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.http_session import PooledSession
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_pooled_session_reuses_connections(server):
+    session = PooledSession(pool_size=2)
+    for _ in range(5):
+        assert session.get(f"{server}/esearch.fcgi", timeout=5).json() == {"ok": True}
+    host = server.split("//")[1]
+    stats = session.stats()
+    assert stats[f"http_{host}_requests"] == 5
+    assert stats[f"http_{host}_connections_opened"] == 1
+
+
+def test_streamed_response_is_left_for_the_caller(server):
+    session = PooledSession(pool_size=1)
+    response = session.get(f"{server}/blast.cgi", timeout=5, stream=True)
+
+    assert not response._content_consumed
+    assert b"".join(response.iter_content(4)) == b'{"ok": true}'
+    host = server.split("//")[1]
+    assert session.stats()[f"http_{host}_bytes"] == len(b'{"ok": true}')
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src import llm_budget
+from src.llm_budget import LLMBudgets, RollingBudget, estimate_prompt_tokens
+from src.llm_cache import LLMCache
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+    response = SimpleNamespace(headers={"retry-after-ms": "10"})
+
+
+def test_estimate_falls_back_to_characters(monkeypatch, capsys):
+    monkeypatch.setattr(llm_budget, "tiktoken", None)
+    llm_budget._encoding.cache_clear()
+    llm_budget._log_fallback.cache_clear()
+    messages = [
+        {"role": "system", "content": "x" * 400},
+        {"role": "tool", "tool_call_id": "call_1", "content": "y" * 40},
+    ]
+
+    tokens = estimate_prompt_tokens("gpt-4.1", messages, tools=[{"name": "t"}])
+
+    # priming + framing + role/content/id chars / 4 + tools JSON / 4
+    assert tokens == 3 + 2 * 3 + (2 + 100) + (1 + 2 + 10) + 4
+    estimate_prompt_tokens("gpt-4.1-mini", messages)
+    # The fallback is reported once, not per model or message
+    assert capsys.readouterr().out.count("characters / 4") == 1
+    llm_budget._encoding.cache_clear()
+
+
+def test_requests_wait_for_tokens_to_leave_the_window():
+    budget = RollingBudget(tpm=100, rpm=1000, headroom=1.0, window_seconds=60)
+
+    first, wait = budget.reserve(60)
+    assert wait == 0
+    _, wait = budget.reserve(60)
+    assert wait == pytest.approx(60, abs=0.1)
+
+    # Once the first request reports its usage, later ones can start sooner
+    budget = RollingBudget(tpm=100, rpm=1000, headroom=1.0, window_seconds=60)
+    first, _ = budget.reserve(60)
+    budget.settle(first, 20)
+    assert budget.reserve(60)[1] == 0
+    assert budget.stats("b")["b_actual_tokens"] == 20
+
+
+def test_requests_per_minute_and_headroom_are_respected():
+    # 10-second windows get a sixth of the per-minute quota, here 0.5 * 24 / 6
+    budget = RollingBudget(tpm=10_000, rpm=24, headroom=0.5, window_seconds=10)
+    assert budget.reserve(1)[1] == 0
+    assert budget.reserve(1)[1] == 0
+    assert budget.reserve(1)[1] == pytest.approx(10, abs=0.1)
+
+
+def test_oversized_request_goes_out_on_an_empty_window():
+    budget = RollingBudget(tpm=100, rpm=10, headroom=1.0, window_seconds=60)
+    assert budget.reserve(500)[1] == 0
+    # ...and holds the window closed until the quota has paid for it
+    assert budget.reserve(1)[1] == pytest.approx(300, abs=0.1)
+
+
+def test_released_booking_frees_its_tokens():
+    budget = RollingBudget(tpm=100, rpm=1000, headroom=1.0, window_seconds=60)
+    entry, _ = budget.reserve(60)
+    budget.release(entry)
+    assert budget.reserve(60)[1] == 0
+
+
+def test_paced_client_pauses_on_429_and_retries():
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise _RateLimitError()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=42))
+
+    budgets = LLMBudgets()
+    budgets.configure({"gpt-4.1": {"tpm": 1_000_000, "rpm": 1000}})
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    client = budgets.wrap(fake)
+
+    client.chat.completions.create(model="gpt-4.1", messages=[])
+    # Models without a quota are passed straight through
+    client.chat.completions.create(model="qwen3:4b", messages=[])
+
+    assert len(calls) == 3
+    stats = budgets.stats()
+    assert stats["llm_budget_gpt_4_1_throttled"] == 1
+    assert stats["llm_budget_gpt_4_1_requests"] == 2
+    assert stats["llm_budget_gpt_4_1_actual_tokens"] == 42
+    # The throttled attempt's booking no longer counts against the window
+    assert [e[1] for e in budgets.budgets["gpt-4.1"]._entries] == [0, 42]
+    assert LLMBudgets().wrap(fake) is fake
+
+
+def test_record_replay_cache_wraps_an_async_paced_client(tmp_path):
+    async def create(**kwargs):
+        raise AssertionError("served from the cache")
+
+    budgets = LLMBudgets()
+    budgets.configure({"gpt-4.1": {"tpm": 1000, "rpm": 10}})
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    paced = budgets.wrap(fake)
+    client = LLMCache(str(tmp_path / "llm.sqlite"), "record").wrap(paced)
+
+    assert paced.is_async and client.is_async
+    assert asyncio.iscoroutinefunction(type(client.chat.completions.create).__call__)
+
+
+def test_paced_clients_leave_retries_to_the_budget(monkeypatch):
+    from src import llm_interface
+
+    monkeypatch.setenv("OLLAMA_API_KEY", "ollama")
+    monkeypatch.setenv("OLLAMA_API_ENDPOINT", "http://localhost:11434/v1")
+    assert llm_interface.get_client("ollama").max_retries == 2
+
+    budgets = LLMBudgets()
+    budgets.configure({"qwen3:4b": {"tpm": 1000, "rpm": 10}})
+    monkeypatch.setattr(llm_interface, "llm_budgets", budgets)
+    assert llm_interface.get_client("ollama").max_retries == 0
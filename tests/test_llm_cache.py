@@ -0,0 +1,109 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from src.llm_cache import LLMCache, LLMReplayMiss, completion_key
+from src.models import ResponseSchema
+
+
+def _completion(content):
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 1,
+            "model": "gpt-4.1",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+        }
+    )
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        return _completion(f"answer {self.calls}")
+
+
+def test_record_then_replay_without_calling_the_client(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    messages = [{"role": "user", "content": "Where is BRCA1?"}]
+    recorder = _FakeClient()
+    client = LLMCache(path, "record").wrap(recorder)
+    first = client.chat.completions.create(model="gpt-4.1", messages=messages)
+    again = client.chat.completions.create(model="gpt-4.1", messages=messages)
+    assert recorder.calls == 1
+    assert again.choices[0].message.content == first.choices[0].message.content
+
+    replayer = _FakeClient()
+    replay_cache = LLMCache(path, "replay")
+    replayed = replay_cache.wrap(replayer).chat.completions.create(
+        model="gpt-4.1", messages=messages
+    )
+    assert replayer.calls == 0
+    assert replayed.choices[0].message.content == "answer 1"
+    with pytest.raises(LLMReplayMiss):
+        replay_cache.wrap(replayer).chat.completions.create(
+            model="gpt-4.1", messages=[{"role": "user", "content": "where is brca1?"}]
+        )
+    assert replay_cache.stats()["llm_cache_replay_misses"] == 1
+
+
+def test_passthrough_returns_the_client_unwrapped(tmp_path):
+    client = _FakeClient()
+    assert LLMCache(str(tmp_path / "llm.sqlite")).wrap(client) is client
+
+
+def test_async_parse_replays_parsed_schema(tmp_path):
+    class _AsyncParse:
+        calls = 0
+
+        async def parse(self, **kwargs):
+            self.calls += 1
+            completion = _completion('{"thoughts": "t", "answer": "17q21.31"}')
+            data = completion.model_dump()
+            data["choices"][0]["message"]["parsed"] = {
+                "thoughts": "t",
+                "answer": "17q21.31",
+            }
+            return SimpleNamespace(model_dump_json=lambda: json.dumps(data))
+
+    async def create(**kwargs):
+        raise AssertionError("not used")
+
+    parse = _AsyncParse()
+    fake = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+        beta=SimpleNamespace(chat=SimpleNamespace(completions=parse)),
+    )
+    client = LLMCache(str(tmp_path / "llm.sqlite"), "record").wrap(fake)
+    kwargs = {"model": "gpt-4.1", "messages": [], "response_format": ResponseSchema}
+
+    asyncio.run(client.beta.chat.completions.parse(**kwargs))
+    replayed = asyncio.run(client.beta.chat.completions.parse(**kwargs))
+
+    assert parse.calls == 1
+    assert replayed.choices[0].message.parsed == ResponseSchema(
+        thoughts="t", answer="17q21.31"
+    )
+
+
+def test_key_covers_every_parameter():
+    base = {"model": "gpt-4.1", "messages": [{"role": "user", "content": "Q"}]}
+    assert completion_key("create", base) == completion_key("create", dict(base))
+    assert completion_key("create", base) != completion_key(
+        "create", {**base, "tool_choice": "none"}
+    )
+    assert completion_key("create", base) != completion_key("parse", base)
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from src import matrix
+
+
+def test_script_args_reads_the_src_main_command():
+    argv = matrix.script_args("scripts/genehop_azure_gpt41_mini_no_tools.sh")
+
+    assert argv == [
+        "--dataset_path",
+        "data/genehop.json",
+        "--provider",
+        "azure",
+        "--model",
+        "gpt-4.1-mini",
+        "--output_path",
+        "results/genehop_azure_gpt41_mini_no_tools.json",
+        "--no-tool-use",
+    ]
+
+
+def test_load_runs_from_yaml_entries_and_scripts(tmp_path):
+    path = tmp_path / "matrix.yaml"
+    path.write_text(
+        "runs:\n"
+        "  - {dataset_path: data/genehop_small.json, provider: ollama,"
+        " model: 'qwen3:4b', tool_use: true, cost_history: [a, b]}\n"
+        "  - --dataset_path data/genehop_small.json --provider azure"
+        " --model gpt-4.1 --output_path out.json\n"
+    )
+
+    runs = matrix.load_runs(str(path), ["scripts/genehop_azure_gpt41_tools.sh"])
+
+    assert [run.output_path for run in runs] == [
+        "results/genehop_azure_gpt41_tools.json",
+        "results/genehop_small_ollama_qwen3_4b_tools.json",
+        "out.json",
+    ]
+    assert runs[1].tool_use and runs[1].cost_history == ["a", "b"]
+    assert not runs[2].tool_use
+
+
+def test_check_runs_rejects_runs_that_cannot_share_a_process(tmp_path):
+    path = tmp_path / "matrix.yaml"
+    path.write_text(
+        "runs:\n"
+        "  - --dataset_path d.json --provider azure --model gpt-4.1 --output_path o.json\n"
+        "  - --dataset_path d.json --provider azure --model gpt-4.1-mini --output_path o.json\n"
+    )
+    with pytest.raises(ValueError, match="o.json"):
+        matrix.check_runs(matrix.load_runs(str(path), []), "src/config.yaml")
+
+    path.write_text(
+        "runs:\n"
+        "  - --dataset_path d.json --provider azure --model gpt-4.1"
+        " --output_path o.json --engine async\n"
+    )
+    with pytest.raises(ValueError, match="threads engine"):
+        matrix.check_runs(matrix.load_runs(str(path), []), "src/config.yaml")
+
+
+def test_run_matrix_runs_configs_in_parallel_with_own_tracers(monkeypatch, tmp_path):
+    path = tmp_path / "matrix.yaml"
+    path.write_text(
+        "runs:\n"
+        "  - {dataset_path: d.json, provider: azure, model: gpt-4.1}\n"
+        "  - {dataset_path: d.json, provider: azure, model: gpt-4.1, tool_use: true}\n"
+        "  - {dataset_path: d.json, provider: azure, model: gpt-4.1-mini}\n"
+    )
+    runs = matrix.load_runs(str(path), [])
+    started = []
+    both_running = threading.Barrier(2, timeout=5)
+
+    def fake_run_config(args, config, run_tracer, parent_run_id, max_workers, run_name):
+        started.append((run_name, run_tracer, parent_run_id, max_workers))
+        if len(started) <= 2:
+            both_running.wait()
+        if args.model == "gpt-4.1-mini":
+            raise RuntimeError("boom")
+        return {}
+
+    monkeypatch.setattr(matrix, "run_config", fake_run_config)
+
+    failed = matrix.run_matrix(runs, {}, 2, "parent", 5)
+
+    assert failed == {"d_azure_gpt_4_1_mini_no_tools": "boom"}
+    # Tool-use runs are started first, the failing run waits for a free slot
+    assert started[2][0] == "d_azure_gpt_4_1_mini_no_tools"
+    assert len({id(tracer) for _, tracer, _, _ in started}) == 3
+    assert {(parent, workers) for _, _, parent, workers in started} == {("parent", 5)}
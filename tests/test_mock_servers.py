@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+from openai import OpenAI
+
+from benchmarks.mock_servers import MockLLMServer, MockNCBIServer
+from src import llm_interface, tools
+from src.cache import ToolCache
+from src.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def servers(tmp_path, monkeypatch):
+    llm = MockLLMServer().start()
+    ncbi = MockNCBIServer(latency=0, throttle_rate=0.3, retry_after=0).start()
+    monkeypatch.setattr(tools, "NCBI_BASE_URL", ncbi.eutils_url)
+    monkeypatch.setattr(tools, "BLAST_BASE_URL", ncbi.blast_url)
+    monkeypatch.setattr(tools, "NCBI_DEFAULT_BACKOFF", 0)
+    monkeypatch.setattr(tools, "ncbi_rate_limiter", TokenBucket(1000))
+    monkeypatch.setattr(
+        tools, "tool_cache", ToolCache(str(tmp_path / "tools.sqlite"), 60, 100)
+    )
+    yield llm, ncbi
+    llm.stop()
+    ncbi.stop()
+
+
+def test_tool_conversation_against_mock_servers(servers):
+    llm, ncbi = servers
+    client = OpenAI(api_key="mock", base_url=f"{llm.url}/v1")
+
+    response = llm_interface.call_llm_with_tools(
+        client, "mock", "What is the official gene symbol of LMP10?", 5, 1, 0, False
+    )
+
+    assert response.answer.startswith("GENE")
+    assert llm.stats()["chat_completions"]["ok"] == 3
+    assert ncbi.stats()["esearch"]["ok"] == 1
+    assert ncbi.stats()["esummary"]["ok"] == 1
+
+
+def test_mock_ncbi_throttles_and_tools_retry(servers):
+    _, ncbi = servers
+    for i in range(10):
+        result = json.loads(tools.esearch_ncbi("snp", f"rs{i}", 3))
+        assert len(result["uids"]) == 3
+    assert sum(c.get("throttled", 0) for c in ncbi.stats().values()) > 0
+
+
+def test_blast_hits_are_parsed_from_the_streamed_report(servers, monkeypatch):
+    from src import async_tools
+    from src.blast_jobs import BlastJobManager
+
+    monkeypatch.setattr(
+        tools,
+        "blast_jobs",
+        BlastJobManager(tools.check_blast_status, min_interval=0.01),
+    )
+    monkeypatch.setattr(async_tools, "blast_jobs", tools.blast_jobs)
+    monkeypatch.setattr(async_tools, "BLAST_BASE_URL", servers[1].blast_url)
+    # Small chunks, and no report cache so both engines fetch the report
+    monkeypatch.setattr(tools, "BLAST_XML_CHUNK_SIZE", 64)
+    monkeypatch.setattr(async_tools, "BLAST_XML_CHUNK_SIZE", 64)
+    monkeypatch.setattr(tools, "blast_cache", ToolCache("", 0, 0))
+
+    rid = json.loads(tools.blast_put("ACGT" * 20, "blastn", "nt", True, 5))["rid"]
+    hits = json.loads(tools.blast_get(rid, "Text"))
+
+    async def get_async():
+        try:
+            return json.loads(await async_tools.blast_get(rid, "Text"))
+        finally:
+            await async_tools.close_async_http_client()
+
+    assert [hit["rank"] for hit in hits["hits"]] == [1, 2, 3, 4, 5]
+    assert asyncio.run(get_async()) == hits
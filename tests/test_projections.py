@@ -0,0 +1,56 @@
+import json
+
+from src.projections import ToolProjections, compact_text
+
+
+def test_esummary_keeps_prompt_fields_and_counts_savings():
+    projections = ToolProjections()
+    summaries = {
+        "5213": {
+            "uid": "5213",
+            "nomenclaturesymbol": "PFKL",
+            "maplocation": "21q22.3",
+            "locationhist": [{"chrstart": i} for i in range(50)],
+            "mim": ["171860"],
+        }
+    }
+    projected = projections.esummary("gene", summaries)
+
+    assert projected == {
+        "5213": {"uid": "5213", "nomenclaturesymbol": "PFKL", "maplocation": "21q22.3"}
+    }
+    stats = projections.stats()
+    assert stats["projection_esummary_ncbi_calls"] == 1
+    assert stats["projection_esummary_ncbi_bytes_saved"] == len(
+        json.dumps(summaries)
+    ) - len(json.dumps(projected))
+    assert stats["projection_esummary_ncbi_tokens_saved"] > 0
+
+
+def test_unknown_database_and_disabled_projection_pass_through():
+    summaries = {"1": {"uid": "1", "anything": "x"}}
+    assert ToolProjections().esummary("pubmed", summaries) == summaries
+    assert ToolProjections(enabled=False).esummary("gene", summaries) == summaries
+
+
+def test_projection_file_overrides_defaults(tmp_path):
+    path = tmp_path / "projections.json"
+    path.write_text(
+        json.dumps(
+            {
+                "esummary_fields": {"omim": ["title"]},
+                "efetch_max_chars": {"gene": 10},
+            }
+        )
+    )
+    projections = ToolProjections.from_file(str(path))
+    omim = {"1": {"title": "GSD7", "geneMap": [], "oid": "#232800"}}
+    assert projections.esummary("omim", omim) == {"1": {"title": "GSD7"}}
+    assert "genemap" not in projections.esummary_fields["omim"]
+    assert "snp" in projections.esummary_fields
+    assert projections.efetch("gene", "x" * 50) == "x" * 10
+
+
+def test_efetch_text_is_compacted():
+    content = "Entrezgene ::= {\n\n      track-info {\n        geneid 5213,\n"
+    assert compact_text(content) == "Entrezgene ::= {\n track-info {\n geneid 5213,"
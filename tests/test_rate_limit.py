@@ -0,0 +1,48 @@
+import pytest
+
+from src import rate_limit
+from src.rate_limit import TokenBucket, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_spaces_requests(clock):
+    bucket = TokenBucket(rate=3)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits == pytest.approx([0.0, 1 / 3, 2 / 3, 1.0])
+    clock[0] += 10.0
+    assert bucket.reserve() == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("rate", [3, 10])
+def test_no_one_second_window_exceeds_the_rate(clock, rate):
+    bucket = TokenBucket(rate=rate)
+    sent = []
+    # Bursts of callers after idle periods of different lengths
+    for idle in (0.0, 5.0, 0.2, 0.9, 3.0):
+        clock[0] += idle
+        sent += [clock[0] + bucket.reserve() for _ in range(2 * rate)]
+
+    for start in sent:
+        in_window = [t for t in sent if start <= t < start + 1.0 - 1e-9]
+        assert len(in_window) <= rate
+
+
+def test_token_bucket_backoff_pauses_tokens(clock):
+    bucket = TokenBucket(rate=10)
+    bucket.backoff(2.0)
+    assert bucket.reserve() == pytest.approx(2.1)
+    stats = bucket.stats("ncbi")
+    assert stats["ncbi_throttled"] == 1
+    assert stats["ncbi_wait_seconds"] == pytest.approx(2.1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3", 1.0) == 3.0
+    assert parse_retry_after(None, 1.0) == 1.0
+    assert parse_retry_after("not a date", 1.5) == 1.5
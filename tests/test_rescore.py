@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from src.cache import ToolCache
+from src.rescore import deltas, leaderboard, rescore_files
+
+
+def _write(path, predictions):
+    results = {
+        "Gene alias": {
+            "q1": {"answer": "BRCA1", "prediction": predictions[0]},
+            "q2": {"answer": "TP53", "prediction": predictions[1]},
+        },
+        "Gene location": {"q3": {"answer": "chr7", "prediction": predictions[2]}},
+    }
+    path.write_text(json.dumps(results))
+    return str(path)
+
+
+def test_rescore_files_caches_on_file_hash(tmp_path):
+    good = _write(tmp_path / "good.json", ["BRCA1", "TP53", "chr7"])
+    bad = _write(tmp_path / "bad.json", ["BRCA1", "x", "chr1"])
+    (tmp_path / "other.json").write_text("[1, 2]")
+    cache = ToolCache(str(tmp_path / "scores.sqlite"), ttl_seconds=0, max_entries=100)
+    paths = [good, bad, str(tmp_path / "other.json")]
+
+    scores = rescore_files(paths, cache, max_workers=2)
+
+    assert list(scores) == ["good", "bad"]
+    assert scores["good"]["questions"] == 3
+    assert scores["bad"]["metrics"]["overall_accuracy"] == pytest.approx(1 / 3)
+    assert scores["bad"]["metrics"]["Gene alias_accuracy"] == 0.5
+    assert cache.stats("c")["c_hits"] == 0
+
+    _write(tmp_path / "bad.json", ["BRCA1", "TP53", "chr1"])
+    rescored = rescore_files(paths, cache, max_workers=2)
+
+    assert rescored["good"] == scores["good"]
+    assert rescored["bad"]["metrics"]["Gene alias_accuracy"] == 1.0
+    assert cache.stats("c")["c_hits"] == 1
+
+
+def test_leaderboard_ranks_runs_and_deltas_against_baseline(tmp_path):
+    paths = [
+        _write(tmp_path / "base.json", ["BRCA1", "x", "chr1"]),
+        _write(tmp_path / "best.json", ["BRCA1", "TP53", "chr7"]),
+    ]
+    scores = rescore_files(paths, ToolCache("", 0, 0))
+
+    board = leaderboard(scores)
+    change = deltas(board, "base")
+
+    assert list(board.index) == ["best", "base"]
+    assert list(board.columns) == ["overall", "Gene alias", "Gene location"]
+    assert change.loc["best"].to_dict() == pytest.approx(
+        {"overall": 2 / 3, "Gene alias": 0.5, "Gene location": 1.0}
+    )
+    distance = leaderboard(scores, "average_levenshtein_distance")
+    assert list(distance.index) == ["best", "base"]
+    with pytest.raises(ValueError):
+        deltas(board, "missing")
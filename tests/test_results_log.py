@@ -0,0 +1,49 @@
+import json
+
+from src import main
+from src.results_log import ResultsLog, make_run_key
+
+RUN = make_run_key("data/geneturing.json", "azure", "gpt-4.1", True, False)
+
+
+def test_load_skips_other_runs_torn_lines_and_errors(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    log = ResultsLog(path, RUN)
+    log.reset()
+    log.append("Gene alias", "q1", {"answer": "A", "prediction": "A"})
+    log.append("Gene alias", "q2", {"answer": "B", "prediction": "ERROR_PROCESSING"})
+    ResultsLog(path, "other run").append("Gene alias", "q3", {"prediction": "C"})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"run": "torn')
+
+    assert log.load() == {"Gene alias": {"q1": {"answer": "A", "prediction": "A"}}}
+
+    log.append("Gene alias", "q2", {"answer": "B", "prediction": "B"})
+    assert set(log.load()["Gene alias"]) == {"q1", "q2"}
+
+
+def test_resume_only_runs_missing_questions(tmp_path, monkeypatch):
+    asked = []
+
+    def fake_process_single_question(client, model, question, *args, **kwargs):
+        asked.append(question)
+        return question, {"answer": args[-1], "thoughts": "", "prediction": "new"}
+
+    monkeypatch.setattr(main, "get_client", lambda provider: None)
+    monkeypatch.setattr(main, "process_single_question", fake_process_single_question)
+
+    dataset = {"Gene alias": {"q1": "A", "q2": "B"}, "Gene location": {"q3": "C"}}
+    log = ResultsLog(str(tmp_path / "run.jsonl"), RUN)
+    log.reset()
+    log.append("Gene alias", "q1", {"answer": "A", "thoughts": "", "prediction": "A"})
+
+    results = main.process_dataset(
+        "azure", "gpt-4.1", dataset, True, False, {}, "threads", log, log.load()
+    )
+
+    assert sorted(asked) == ["q2", "q3"]
+    assert results["Gene alias"]["q1"]["prediction"] == "A"
+    assert results["Gene location"]["q3"]["prediction"] == "new"
+    with open(log.path, encoding="utf-8") as f:
+        assert [json.loads(line)["question"] for line in f][0] == "q1"
+    assert set(log.load()["Gene alias"]) == {"q1", "q2"}
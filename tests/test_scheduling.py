@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.scheduling import (
+    CostModel,
+    order_questions,
+    schedule_report,
+    simulate_makespan,
+)
+
+QUESTIONS = [
+    ("Gene alias", "What is the official gene symbol of SNAT6?", "SLC38A6"),
+    ("Gene location", "Which chromosome is FAM66D gene located on?", "chr8"),
+    ("Human genome DNA aligment", "Align ACGT...", "chr15:91950805-91950932"),
+]
+
+
+def test_priors_start_blast_questions_first():
+    ordered = order_questions(QUESTIONS, CostModel())
+
+    assert [item[0] for item in ordered] == [
+        "Human genome DNA aligment",
+        "Gene alias",
+        "Gene location",
+    ]
+    assert order_questions(QUESTIONS, CostModel(), "dataset") == QUESTIONS
+    with pytest.raises(ValueError):
+        order_questions(QUESTIONS, CostModel(), "random")
+
+
+def test_traces_override_priors(tmp_path):
+    traces = [
+        ("Gene location", QUESTIONS[1][1], 400.0),
+        ("Gene alias", "another question", 30.0),
+        ("Gene alias", "a third question", 50.0),
+    ]
+    for i, (category, question, seconds) in enumerate(traces):
+        (tmp_path / f"{i}.json").write_text(
+            json.dumps(
+                {
+                    "category": category,
+                    "question": question,
+                    "duration_seconds": seconds,
+                }
+            )
+        )
+    (tmp_path / "broken.json").write_text("{")
+    model = CostModel()
+
+    assert model.load_traces([str(tmp_path), None]) == 3
+    assert model.estimate("Gene location", QUESTIONS[1][1]) == 400.0
+    assert model.estimate("Gene alias", QUESTIONS[0][1]) == 40.0
+    assert model.estimate("Human genome DNA aligment", "new") == 150.0
+    assert order_questions(QUESTIONS, model)[0][0] == "Gene location"
+
+
+def test_longest_first_shortens_the_simulated_makespan():
+    costs = [1.0] * 8 + [8.0]
+
+    assert simulate_makespan(costs, 2) == 12.0
+    assert simulate_makespan(sorted(costs, reverse=True), 2) == 8.0
+    assert simulate_makespan([], 3) == 0.0
+
+
+def test_schedule_report_compares_expected_and_actual():
+    traces = [
+        SimpleNamespace(
+            category=c, question=q, started_at=100.0 + i, duration_seconds=10.0
+        )
+        for i, (c, q, _) in enumerate(QUESTIONS)
+    ]
+
+    report = schedule_report(CostModel(), QUESTIONS, traces, workers=2)
+
+    assert report["schedule_actual_makespan_seconds"] == 12.0
+    assert report["schedule_expected_makespan_seconds"] == 150.0
+    assert report["schedule_dataset_order_expected_makespan_seconds"] == 165.0
+    assert report["schedule_Gene alias_expected_seconds"] == 15.0
+    assert report["schedule_Gene alias_actual_seconds"] == 10.0
+    assert report["schedule_mean_abs_error_seconds"] == pytest.approx((5 + 5 + 140) / 3)
+    assert schedule_report(CostModel(), QUESTIONS, [], workers=2) == {}
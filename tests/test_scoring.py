@@ -0,0 +1,90 @@
+import glob
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.scoring import score_many, score_results, summarize_scores
+
+RESULTS = sorted(
+    glob.glob(os.path.join(os.path.dirname(__file__), "..", "results", "*.json"))
+)
+
+
+def _row_by_row(results: dict) -> list[tuple]:
+    rows = []
+    for questions in results.values():
+        for details in questions.values():
+            answer, prediction = details.get("answer"), details.get("prediction")
+            scores = []
+            for metric in (
+                metrics.calculate_exact_match,
+                metrics.calculate_levenshtein_distance,
+                metrics.calculate_partial_match,
+            ):
+                try:
+                    scores.append(metric(answer, prediction))
+                except Exception:
+                    scores.append(None)
+            rows.append(tuple(scores))
+    return rows
+
+
+def _as_tuples(table: pd.DataFrame) -> list[tuple]:
+    columns = table[["match", "levenshtein_distance", "partial_match"]]
+    return [
+        tuple(None if pd.isna(value) else value for value in row)
+        for row in columns.itertuples(index=False)
+    ]
+
+
+EDGE_CASES = {
+    "species": {
+        "q1": {"answer": "human", "prediction": "Homo sapiens"},
+        "q2": {"answer": "TRUE", "prediction": "Yes"},
+        "q3": {"answer": "x", "prediction": None},
+    },
+    "lists": {
+        "q4": {"answer": ["a", "b"], "prediction": "a, c"},
+        "q5": {"answer": "a,b", "prediction": ["b"]},
+        "q6": {"answer": "  ", "prediction": "x"},
+        "q7": {"answer": 5, "prediction": "5"},
+    },
+}
+
+
+def test_scores_match_row_by_row_metrics_on_edge_cases():
+    table = score_results(EDGE_CASES)
+
+    assert list(table["question"]) == ["q1", "q2", "q3", "q4", "q5", "q6", "q7"]
+    assert _as_tuples(table) == _row_by_row(EDGE_CASES)
+    assert table.loc[0, "match"] == 1.0
+    assert table.loc[3, "partial_match"] == 0.5
+
+
+@pytest.mark.parametrize("path", RESULTS, ids=os.path.basename)
+def test_scores_match_row_by_row_metrics_on_results_files(path):
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+
+    assert _as_tuples(score_results(results)) == _row_by_row(results)
+
+
+def test_score_results_returns_none_without_rows():
+    assert score_results({}) is None
+    assert score_results({"category": {}}) is None
+
+
+def test_score_many_summarizes_each_source_like_one_file():
+    other = {"species": {"q1": {"answer": "rat", "prediction": "mouse"}}}
+
+    summaries = score_many({"edge": EDGE_CASES, "other": other, "empty": {}})
+
+    assert summaries["edge"] == pytest.approx(
+        summarize_scores(score_results(EDGE_CASES)), nan_ok=True
+    )
+    assert summaries["other"]["overall_accuracy"] == 0.0
+    assert summaries["other"]["species_accuracy"] == 0.0
+    assert summaries["empty"] == {}
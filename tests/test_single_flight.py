@@ -0,0 +1,68 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    executions = []
+
+    def slow_call():
+        executions.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "esearch_ncbi", "k", slow_call)
+        started.wait(5)
+        followers = [
+            executor.submit(flight.do, "esearch_ncbi", "k", slow_call) for _ in range(3)
+        ]
+        while flight.stats()["single_flight_shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result(5) for f in [leader, *followers]]
+
+    assert results == ["result"] * 4
+    assert len(executions) == 1
+    assert flight.stats()["single_flight_esearch_ncbi_calls"] == 4
+    assert flight.stats()["single_flight_esearch_ncbi_shared"] == 3
+
+
+def test_finished_calls_are_not_reused_and_errors_propagate():
+    flight = SingleFlight()
+    assert flight.do("t", "k", lambda: 1) == 1
+    assert flight.do("t", "k", lambda: 2) == 2
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("t", "k", fail)
+    assert flight.stats()["single_flight_shared"] == 0
+
+
+def test_async_calls_share_one_task():
+    flight = SingleFlight()
+    executions = []
+
+    async def call():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(
+            *(flight.do_async("efetch_ncbi", "k", call) for _ in range(5))
+        )
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(executions) == 1
+    assert flight.stats()["single_flight_efetch_ncbi_shared"] == 4
@@ -0,0 +1,43 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from src import llm_interface
+from src.llm_interface import ToolExecutor
+
+
+def _call(call_id, name, **arguments):
+    return SimpleNamespace(
+        id=call_id,
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments)),
+    )
+
+
+def test_tool_calls_run_concurrently_and_keep_order(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow_tool(term):
+        # Only returns once all three calls are running at the same time
+        barrier.wait()
+        return json.dumps({"term": term})
+
+    monkeypatch.setitem(llm_interface.AVAILABLE_FUNCTIONS, "slow_tool", slow_tool)
+    executor = ToolExecutor(max_workers=3)
+    calls = [_call(f"call_{i}", "slow_tool", term=f"t{i}") for i in range(3)]
+
+    responses = executor.run(calls)
+
+    assert [r["tool_call_id"] for r in responses] == ["call_0", "call_1", "call_2"]
+    assert [json.loads(r["content"])["term"] for r in responses] == ["t0", "t1", "t2"]
+
+
+def test_configure_resizes_pool(monkeypatch):
+    monkeypatch.setitem(
+        llm_interface.AVAILABLE_FUNCTIONS, "echo", lambda term: json.dumps(term)
+    )
+    executor = ToolExecutor(max_workers=1)
+    calls = [_call("a", "echo", term="x"), _call("b", "echo", term="y")]
+    assert [r["content"] for r in executor.run(calls)] == ['"x"', '"y"']
+    executor.configure(4)
+    assert executor.max_workers == 4
+    assert [r["tool_call_id"] for r in executor.run(calls)] == ["a", "b"]
@@ -0,0 +1,88 @@
+import json
+from types import SimpleNamespace
+
+from src import llm_interface
+from src.tracing import Tracer, add_to_span, annotate, percentile, tracer
+
+
+def _response(content=None, tool_calls=None, prompt_tokens=100):
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=content, tool_calls=tool_calls),
+                finish_reason="tool_calls" if tool_calls else "stop",
+            )
+        ],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=10,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=64),
+        ),
+    )
+
+
+def _call(call_id, term):
+    return SimpleNamespace(
+        id=call_id,
+        type="function",
+        function=SimpleNamespace(
+            name="traced_tool", arguments=json.dumps({"term": term})
+        ),
+    )
+
+
+class _FakeCompletions:
+    def create(self, model, messages, tools, tool_choice):
+        if messages[-1]["role"] == "tool":
+            return _response(json.dumps({"thoughts": "t", "answer": "a"}), None, 300)
+        return _response(tool_calls=[_call("call_1", "x"), _call("call_2", "y")])
+
+
+def test_question_trace_records_llm_and_tool_spans(tmp_path, monkeypatch):
+    def traced_tool(term):
+        annotate(cache="miss")
+        add_to_span("limiter_wait_seconds", 0.25)
+        return json.dumps({"term": term})
+
+    monkeypatch.setitem(llm_interface.AVAILABLE_FUNCTIONS, "traced_tool", traced_tool)
+    monkeypatch.setattr(tracer, "directory", str(tmp_path))
+    tracer.reset()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+
+    with tracer.question("Gene alias", "What is the official symbol of X?"):
+        llm_interface.call_llm_with_tools(
+            client, "gpt-4.1", "What is the official symbol of X?", 3, 1, 0, False
+        )
+
+    [path] = list(tmp_path.glob("*.json"))
+    trace = json.loads(path.read_text())
+    kinds = [(span["kind"], span["name"]) for span in trace["spans"]]
+    assert kinds.count(("llm", "gpt-4.1")) == 2
+    tools = [span for span in trace["spans"] if span["kind"] == "tool"]
+    assert sorted(span["tool_call_id"] for span in tools) == ["call_1", "call_2"]
+    assert all(span["cache"] == "miss" for span in tools)
+    assert all(span["bytes"] == len('{"term": "x"}') for span in tools)
+    assert trace["totals"]["prompt_tokens"] == 400
+    assert trace["totals"]["cached_tokens"] == 128
+    assert trace["totals"]["limiter_wait_seconds"] == 0.5
+    assert trace["spans"][0]["finish_reason"] == "tool_calls"
+
+    stats = tracer.stats()
+    assert stats["trace_Gene alias_questions"] == 1
+    assert stats["trace_Gene alias_prompt_tokens_p95"] == 400
+    tracer.reset()
+
+
+def test_spans_outside_a_question_are_not_recorded():
+    local = Tracer()
+    with local.span("tool", "esearch_ncbi") as span:
+        annotate(cache="hit")
+    assert "latency_seconds" not in span
+    assert local.stats() == {}
+
+
+def test_percentile_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile([7], 95) == 7